@@ -0,0 +1,103 @@
+"""
+Modo em lote do Primatech Investment Analyzer, sem Streamlit.
+
+Exemplos:
+    python -m antera report --scenario Base --hurdle 9
+    python -m antera report --hurdle 9 --formato csv --saida relatorios/
+    python -m antera scenarios
+    python -m antera funds --hurdle 9
+"""
+import os
+import sys
+import logging
+import argparse
+
+def _argumentos(argv):
+    parser = argparse.ArgumentParser(prog="python -m antera", description=__doc__.strip().splitlines()[0])
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    relatorio = comandos.add_parser("report", help="Calcula as tabelas do dashboard.")
+    relatorio.add_argument("--scenario", dest="cenario", help="Cenário salvo aplicado sobre os múltiplos das planilhas.")
+    relatorio.add_argument("--hurdle", dest="taxa", type=float, default=9.0, help="Taxa de correção (IPCA + %%). Padrão: 9.")
+    relatorio.add_argument("--hurdle-nominal", type=float, default=117000.0, help="Hurdle nominal em R$ mil. Padrão: 117000.")
+    relatorio.add_argument("--multiplo-maximo", type=float, default=10.0, help="Múltiplo máximo por empresa na tabela de meta.")
+    relatorio.add_argument("--tabelas", nargs="+", help="Tabelas a exibir (padrão: todas).")
+    relatorio.add_argument("--formato", choices=["texto", "csv", "json"], default="texto")
+    relatorio.add_argument("--saida", help="Diretório onde gravar um arquivo por tabela (padrão: saída padrão).")
+
+    comandos.add_parser("scenarios", help="Lista os cenários salvos.")
+
+    fundos = comandos.add_parser("funds", help="Totais por fundo e consolidados (registro em data/fundos.json).")
+    fundos.add_argument("--hurdle", dest="taxa", type=float, default=9.0, help="Taxa de correção (IPCA + %%). Padrão: 9.")
+    fundos.add_argument("--formato", choices=["texto", "csv", "json"], default="texto")
+    fundos.add_argument("--saida", help="Diretório onde gravar a tabela (padrão: saída padrão).")
+    return parser.parse_args(argv)
+
+def _exibir(tabelas, formato, saida):
+    if saida:
+        os.makedirs(saida, exist_ok=True)
+    for nome, tabela in tabelas.items():
+        if formato == "json":
+            conteudo = tabela.to_json(orient="records", force_ascii=False, date_format="iso", indent=2)
+        elif formato == "csv":
+            conteudo = tabela.to_csv(index=False)
+        else:
+            conteudo = f"== {nome} ==\n{tabela.to_string(index=False)}\n"
+        if saida:
+            extensao = {"texto": "txt"}.get(formato, formato)
+            with open(os.path.join(saida, f"{nome}.{extensao}"), "w", encoding="utf-8") as arquivo:
+                arquivo.write(conteudo)
+        else:
+            print(conteudo)
+
+def _relatorio(args):
+    """Tabelas do comando report, ou o código de saída em caso de erro."""
+    from modules import cenarios_local
+    from modules.engine import relatorio_dos_arquivos
+    cenarios = cenarios_local.carregar_todos()
+    cenario = None
+    if args.cenario:
+        if args.cenario not in cenarios:
+            print(f"Cenário '{args.cenario}' não encontrado.", file=sys.stderr)
+            return 2
+        cenario = cenarios[args.cenario]
+
+    tabelas = relatorio_dos_arquivos(args.hurdle_nominal, args.taxa, cenario, cenarios, args.multiplo_maximo)
+    if tabelas is None:
+        return 1
+    if args.tabelas:
+        desconhecidas = sorted(set(args.tabelas) - set(tabelas))
+        if desconhecidas:
+            print(f"Tabelas desconhecidas: {', '.join(desconhecidas)}. Disponíveis: {', '.join(tabelas)}.", file=sys.stderr)
+            return 2
+        tabelas = {nome: tabelas[nome] for nome in args.tabelas}
+    return tabelas
+
+def main(argv=None):
+    args = _argumentos(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    # Importados aqui para que --help responda sem carregar pandas/planilhas
+    from modules import cenarios_local
+    if args.comando == "scenarios":
+        for nome in cenarios_local.listar_cenarios():
+            print(nome)
+        return 0
+
+    if args.comando == "funds":
+        from modules.engine import consolidado_dos_arquivos
+        tabela = consolidado_dos_arquivos(args.taxa)
+        if tabela is None:
+            return 1
+        tabelas = {"fundos": tabela}
+    else:
+        tabelas = _relatorio(args)
+        if not isinstance(tabelas, dict):
+            return tabelas
+    import pandas as pd
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.max_rows", None):
+        _exibir(tabelas, args.formato, args.saida)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,20 +1,24 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-from datetime import datetime
 import os
-import requests
-import plotly.graph_objects as go
-import plotly.express as px
+import uuid
 
 # Importa os módulos personalizados
-from modules.portfolio import (
-    init_writeoff_status, 
-    sincronizar_writeoff_com_multiplos, 
-    sincronizar_multiplo_writeoff,
-    preparar_dados_iniciais,
-    gerar_analise_crescimento
+from modules.portfolio import init_writeoff_status, sincronizar_writeoff_com_multiplos
+from modules.parcelas import corrigir_parcelas_por_empresa
+from modules.estado import EstadoCarteira
+from modules.comparacao import montar_matriz_cenarios
+from modules.engine import (
+    carteira_compartilhada, sensibilidade_da_carteira, comparar_cenarios, consolidado_dos_arquivos
 )
+from modules.fundos import carregar_registro
+from modules.incremental import RecalculoIncremental
+from modules.retornos import calcular_retornos
+from modules.simulacao import simular_e_resumir
+from modules.meta import resolver_meta, fronteira_pareto
+from modules.nomes import juntar_por_empresa
+from modules.apuracao import carregar_apuracao, conciliar_apuracao
+from modules.instrumentacao import iniciar_execucao, finalizar_execucao, contadores, ler_execucoes
 from modules.scenarios import (
     carregar_cenarios, 
     salvar_cenario_atual, 
@@ -25,17 +29,26 @@ from modules.scenarios import (
 from modules.visualizations import (
     format_brazil,
     criar_grafico_aportes_no_tempo,
+    RESOLUCOES_APORTES,
     criar_grafico_distribuicao_portfolio,
     criar_grafico_participacao_fundo,
     criar_grafico_hurdle_vs_realizado,
+    criar_grafico_tornado,
+    criar_grafico_comparacao_cenarios,
+    criar_grafico_simulacao,
+    criar_grafico_fronteira,
     criar_grafico_uplift_empresa,
     criar_comparativo_valores,
     plot_comparativo
 )
 
 # Importa as funções dos arquivos existentes
-from callbacks import update_multiplo, update_multiplo_slider, toggle_writeoff
-from data_utils import carregar_dados, obter_ipca, calcular_ipca_acumulado, corrigir_ipca, carregar_parcelas_investimento
+from callbacks import selecionar_empresa, update_multiplo, update_multiplo_slider, toggle_writeoff, aplicar_edicoes_tabela
+from data_utils import (
+    carregar_dados, assinaturas_dados, corrigir_ipca_lote, carregar_parcelas_investimento,
+    TAXAS_HURDLE, ARQUIVO_PARCELAS
+)
+from modules.planilhas import assinatura_arquivo
 
 # Diretórios para localizar arquivos
 DIRETORIO_ATUAL = os.path.dirname(os.path.abspath(__file__))
@@ -46,6 +59,11 @@ DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
 # ---------------------------------------------------------------
 st.set_page_config(page_title="Primatech Investment Analyzer", layout="wide")
 
+# Registro de tempos desta execução (gravado em data/logs/execucoes.jsonl ao final)
+if 'id_sessao' not in st.session_state:
+    st.session_state.id_sessao = uuid.uuid4().hex[:12]
+iniciar_execucao(sessao=st.session_state.id_sessao)
+
 # Inicializa variáveis da sessão para cenários
 inicializar_session_state_cenarios()
 
@@ -57,21 +75,17 @@ with col_hurdle_val:
     st.write(f"Hurdle: R$ {format_brazil(hurdle_nominal)}")
 
 # Slider para ajuste de taxa (IPCA + X%)
-hurdle = st.slider("Taxa de Correção (IPCA + %)", 0.0, 15.0, 9.0, 0.5)
+hurdle = st.slider("Taxa de Correção (IPCA + %)", float(TAXAS_HURDLE[0]), float(TAXAS_HURDLE[-1]), 9.0, 0.5)
 
 fair_value, investimentos = carregar_dados()
 
 if fair_value is not None and investimentos is not None:
-    # Prepara os dados iniciais
-    df_empresas = preparar_dados_iniciais(fair_value, investimentos)
-    
-    # Se não existir no session_state, criamos; caso exista, não sobrescrevemos
-    if 'edited_df' not in st.session_state:
-        st.session_state.edited_df = df_empresas.copy()
-    else:
-        # Se o dataframe existe mas não tem a coluna Write-off, adicionamos
-        if "Write-off" not in st.session_state.edited_df.columns:
-            st.session_state.edited_df["Write-off"] = False
+    # Carteira inicial compartilhada pelas sessões do processo; cada sessão guarda
+    # só as próprias alterações sobre ela. Se já existir, não sobrescrevemos
+    base_carteira = carteira_compartilhada(assinaturas_dados())
+    if 'carteira' not in st.session_state:
+        st.session_state.carteira = EstadoCarteira(base_carteira)
+    carteira = st.session_state.carteira
     
     sincronizar_writeoff_com_multiplos()
     init_writeoff_status()
@@ -117,12 +131,12 @@ if fair_value is not None and investimentos is not None:
         
         col_table, col_placeholder = st.columns([1, 1], gap="small")
         with col_table:
-            new_cols = ["Múltiplo", "Empresa", "Valor Investido", "Fair Value", "Participação do Fundo (%)", "Data do Primeiro Investimento", "Write-off"]
-            final_cols = [c for c in new_cols if c in st.session_state.edited_df.columns]
-            st.session_state.edited_df = st.session_state.edited_df[final_cols]
-            
-            edited_df = st.data_editor(
-                st.session_state.edited_df,
+            # As edições chegam como delta (edited_rows) e são aplicadas no callback;
+            # a chave muda quando slider, campo numérico ou cenários alteram a carteira
+            chave_editor = f"table_edit_{carteira.versao}"
+            st.data_editor(
+                # O editor recebe uma cópia com nomes em texto (sem categorias fixas)
+                carteira.df.astype({'Empresa': str}),
                 column_config={
                     "Múltiplo": st.column_config.NumberColumn("Múltiplo", format="%.2fx", min_value=0.0, max_value=100.0, width=80),
                     "Empresa": st.column_config.TextColumn("Empresa", width=120),
@@ -133,28 +147,33 @@ if fair_value is not None and investimentos is not None:
                     "Write-off": st.column_config.CheckboxColumn("Write-off", width=80)
                 },
                 use_container_width=True,
-                key="table_edit"
+                key=chave_editor,
+                on_change=aplicar_edicoes_tabela,
+                args=(chave_editor,)
             )
-            st.session_state.edited_df = edited_df
+            
+            sem_fair_value = carteira.base.empresas_sem_fair_value
+            if sem_fair_value:
+                st.caption(f"Empresas sem Fair Value em fair_value.xlsx: {', '.join(sem_fair_value)}")
         
         with col_placeholder:
             st.markdown("## Configurar Múltiplo")
             company_selected = st.selectbox(
                 "Selecione a empresa para alterar o múltiplo",
-                options=edited_df["Empresa"].unique(),
-                key="select_company"
+                options=carteira.empresas,
+                key="select_company",
+                on_change=selecionar_empresa
             )
             
             # Obtém os valores atuais
-            current_row = edited_df.loc[edited_df["Empresa"] == company_selected].iloc[0]
-            current_value = float(current_row["Múltiplo"])
-            is_writeoff = bool(current_row.get("Write-off", False))
+            current_value = carteira.multiplo(company_selected)
+            is_writeoff = carteira.writeoff(company_selected)
             
             # Adiciona opção de write-off
             writeoff = st.checkbox(
                 "Write-off (perda total - múltiplo será 0)",
-                value=bool(current_row.get("Write-off", False)),
-                key=f"writeoff_{company_selected}",
+                value=is_writeoff,
+                key="multiplo_writeoff",
                 on_change=toggle_writeoff,
                 help="Marque esta opção caso a empresa tenha sido um write-off (perda total)."
             )
@@ -165,7 +184,7 @@ if fair_value is not None and investimentos is not None:
                 max_value=100.0,
                 value=current_value,
                 step=0.1,
-                key=f"num_{company_selected}",
+                key="multiplo_num",
                 format="%.1f",
                 on_change=update_multiplo
             )
@@ -176,7 +195,7 @@ if fair_value is not None and investimentos is not None:
                 max_value=50.0,
                 value=current_value,
                 step=1.0,
-                key=f"slider_{company_selected}",
+                key="multiplo_slider",
                 format="%.1f",
                 on_change=update_multiplo_slider
             )
@@ -185,12 +204,17 @@ if fair_value is not None and investimentos is not None:
         st.subheader("Crescimento Necessário por Empresa (IPCA+6%)")
         col_table2, col_graph = st.columns([1, 1])
         
-        active_investments = st.session_state.edited_df[
-            st.session_state.edited_df['Múltiplo'] > 0
-        ].copy()
-        
-        # Usa a função modularizada para gerar análise de crescimento
-        analise_crescimento = gerar_analise_crescimento(active_investments, corrigir_ipca)
+        # Tabelas e totais da carteira: só as empresas alteradas desde a execução
+        # anterior são recalculadas (ver modules/incremental.py)
+        if 'recalculo' not in st.session_state:
+            st.session_state.recalculo = RecalculoIncremental()
+        # Empresas com aportes no ledger são corrigidas parcela a parcela
+        resultados = st.session_state.recalculo.resultados(
+            carteira, investimentos, hurdle,
+            (assinaturas_dados(), assinatura_arquivo(ARQUIVO_PARCELAS)),
+            carregar_parcelas_investimento()
+        )
+        analise_crescimento = resultados['analise_crescimento']
         
         with col_table2:
             st.markdown("**Tabela de Crescimento**")
@@ -214,72 +238,184 @@ if fair_value is not None and investimentos is not None:
         # -----------------------------------------------------------
         # Seção de Resultados da Carteira
         # -----------------------------------------------------------
-        investimentos_ativos = investimentos[
-            investimentos['Empresa'].isin(st.session_state.edited_df['Empresa'].tolist())
-        ].copy()
-        investimentos_ativos.rename(
-            columns={'Valor Investido até a presente data (R$ mil)': 'Valor Investido'}, 
-            inplace=True
-        )
-        
-        valor_total_investido = investimentos['Valor Investido até a presente data (R$ mil)'].sum()
-        valor_total_ativo = investimentos_ativos['Valor Investido'].sum()
-        valor_hurdle = valor_total_ativo * (1 + (hurdle / 100))
-        total_investido = valor_total_investido / 1000
-
-        total_corrigido_ipca_6 = investimentos_ativos.apply(
-            lambda row: corrigir_ipca(
-                row['Valor Investido'],
-                row['Data do Primeiro Investimento'],
-                adicional=9.0
-            ),
-            axis=1
-        ).sum() / 1000
-        variacao_percentual = ((total_corrigido_ipca_6 - total_investido) / total_investido) * 100
+        investimentos_ativos = resultados['investimentos_ativos']
+        corrigido_ipca = resultados['correcao']['Corrigido IPCA'].to_numpy()
+        corrigido_ipca_6 = resultados['correcao']['Corrigido IPCA+6%'].to_numpy()
+        corrigido_ipca_hurdle = resultados['correcao']['Corrigido IPCA+Hurdle'].to_numpy()
 
-        total_ipca = investimentos_ativos.apply(
-            lambda row: corrigir_ipca(
-                row['Valor Investido'],
-                row['Data do Primeiro Investimento']
-            ),
-            axis=1
-        ).sum() / 1000
-
-        total_ipca_6 = investimentos_ativos.apply(
-            lambda row: corrigir_ipca(
-                row['Valor Investido'],
-                row['Data do Primeiro Investimento'],
-                adicional=6.0
-            ),
-            axis=1
-        ).sum() / 1000
-
-        total_ipca_hurdle = investimentos_ativos.apply(
-            lambda row: corrigir_ipca(
-                row['Valor Investido'],
-                row['Data do Primeiro Investimento'],
-                adicional=hurdle
-            ),
-            axis=1
-        ).sum() / 1000
+        totais = resultados['totais']
+        total_investido = totais['investido'] / 1000
+        total_ipca = totais['corrigido_ipca'] / 1000
+        total_ipca_6 = totais['corrigido_ipca_6'] / 1000
+        total_ipca_hurdle = totais['corrigido_hurdle'] / 1000
 
         st.subheader("Resultados da Carteira")
 
-        # Calcular total de vendas (excluindo write-offs)
-        vendas = analise_crescimento[~analise_crescimento['Write-off']]
-        total_sale = vendas["Sale"].sum() if "Sale" in vendas.columns else 0.0
+        # Sale total (excluindo write-offs) e valor perdido com write-offs
+        total_sale = totais['sale']
+        total_writeoff = totais['writeoff']
         
-        # Calcular total de write-offs
-        writeoffs = analise_crescimento[analise_crescimento['Write-off']]
-        total_writeoff = writeoffs["Valor Investido"].sum() if not writeoffs.empty else 0.0
+        col_hurdle, col_tornado = st.columns([1, 1])
+        with col_hurdle:
+            # Usar a função modularizada para criar o gráfico
+            fig_hurdle = criar_grafico_hurdle_vs_realizado(total_sale, hurdle_nominal, total_writeoff)
+            st.plotly_chart(fig_hurdle, use_container_width=True)
         
-        # Usar a função modularizada para criar o gráfico
-        fig_hurdle = criar_grafico_hurdle_vs_realizado(total_sale, hurdle_nominal, total_writeoff)
-        st.plotly_chart(fig_hurdle, use_container_width=True)
+        with col_tornado:
+            # Variação de (Sale − hurdle) ao perturbar o múltiplo de cada empresa e a taxa,
+            # calculada de uma vez sobre a grade de correção já em cache
+            sensibilidade = sensibilidade_da_carteira(resultados, hurdle_nominal, hurdle)
+            st.plotly_chart(criar_grafico_tornado(sensibilidade), use_container_width=True)
         
         # Adiciona informação sobre write-offs
         if total_writeoff > 0:
             st.info(f"**Write-offs não incluídos no cálculo:** R$ {format_brazil(total_writeoff)} mil")
+        
+        # TIR e múltiplos de retorno pelo ledger de parcelas, com a saída de cada
+        # empresa = Valor Investido × Múltiplo atual (recalculados a cada edição)
+        painel_retornos = st.expander(
+            "Retorno: TIR, TVPI, DPI e RVPI",
+            expanded=False,
+            key="painel_retornos",
+            on_change="rerun"
+        )
+        if painel_retornos.open:
+            with painel_retornos:
+                parcelas_retorno = carregar_parcelas_investimento()
+                if parcelas_retorno.empty:
+                    st.warning("Sem parcelas em data_investimentos.xlsx para calcular a TIR.")
+                else:
+                    retornos = calcular_retornos(parcelas_retorno, carteira.df)
+                    fundo = retornos.iloc[-1]
+                    col_tir, col_tvpi, col_dpi, col_rvpi = st.columns(4)
+                    col_tir.metric("TIR do fundo", f"{fundo['TIR (% a.a.)']:.2f}% a.a.")
+                    col_tvpi.metric("TVPI", f"{fundo['TVPI']:.2f}x")
+                    col_dpi.metric("DPI", f"{fundo['DPI']:.2f}x")
+                    col_rvpi.metric("RVPI", f"{fundo['RVPI']:.2f}x")
+                    st.dataframe(retornos.iloc[:-1].set_index('Empresa').round(2))
+                    sem_parcelas = retornos.attrs.get('empresas_sem_parcelas', [])
+                    if sem_parcelas:
+                        st.caption(f"Empresas sem parcelas em data_investimentos.xlsx: {', '.join(sem_parcelas)}")
+        
+        # Todos os cenários salvos avaliados de uma vez (carregados só com o painel aberto)
+        painel_cenarios = st.expander(
+            "Comparativo de Cenários",
+            expanded=False,
+            key="painel_cenarios",
+            on_change="rerun"
+        )
+        if painel_cenarios.open:
+            with painel_cenarios:
+                comparacao = comparar_cenarios(carteira.df, carregar_cenarios(), resultados, hurdle_nominal, hurdle)
+                st.plotly_chart(criar_grafico_comparacao_cenarios(comparacao, hurdle_nominal), use_container_width=True)
+                st.dataframe(comparacao.round(2))
+        
+        # Simulação de Monte Carlo das saídas (só roda com o painel aberto)
+        painel_simulacao = st.expander(
+            "Simulação de Monte Carlo das Saídas",
+            expanded=False,
+            key="painel_simulacao",
+            on_change="rerun"
+        )
+        if painel_simulacao.open:
+            with painel_simulacao:
+                col_sim1, col_sim2, col_sim3 = st.columns(3)
+                with col_sim1:
+                    prob_writeoff = st.number_input("Probabilidade de write-off (%)", 0.0, 100.0, 20.0, 5.0, key="sim_prob_writeoff")
+                    distribuicao = st.radio(
+                        "Distribuição do múltiplo",
+                        ["Lognormal", "Empírica (cenários salvos)"],
+                        key="sim_distribuicao",
+                        help="Lognormal com mediana no múltiplo atual, ou os múltiplos de cada empresa nos cenários salvos."
+                    )
+                with col_sim2:
+                    volatilidade = st.number_input("Volatilidade do múltiplo (desvio do log)", 0.0, 3.0, 0.75, 0.05, key="sim_volatilidade")
+                    n_simulacoes = st.selectbox("Simulações", [100_000, 250_000, 1_000_000], key="sim_n")
+                with col_sim3:
+                    correlacao_setor = st.slider(
+                        "Correlação dentro do setor", 0.0, 0.9, 0.3, 0.1, key="sim_correlacao",
+                        help="Empresas do mesmo Setor (data_investimentos.xlsx) têm sorteios correlacionados."
+                    )
+                
+                # Setor de cada empresa pelo ledger de parcelas (mesmo índice de nomes das planilhas)
+                df_setores = carregar_parcelas_investimento()
+                setores = None
+                if correlacao_setor > 0 and 'Setor' in df_setores.columns:
+                    setores, _ = juntar_por_empresa(carteira.df['Empresa'], df_setores.dropna(subset=['Setor']), 'Setor')
+                
+                amostras_empiricas = None
+                if distribuicao.startswith("Empírica"):
+                    _, matriz_multiplos, _ = montar_matriz_cenarios(
+                        carregar_cenarios(), carteira.df['Empresa'], carteira.df['Múltiplo'], carteira.df['Write-off']
+                    )
+                    amostras_empiricas = {j: coluna[coluna > 0] for j, coluna in enumerate(matriz_multiplos.T)}
+                
+                totais_simulados, prob_hurdle, percentis, contribuicoes = simular_e_resumir(
+                    carteira.df['Empresa'],
+                    carteira.df['Valor Investido'],
+                    carteira.df['Múltiplo'],
+                    hurdle_nominal,
+                    prob_writeoff=prob_writeoff / 100,
+                    volatilidade=volatilidade,
+                    setores=setores,
+                    correlacao=correlacao_setor,
+                    amostras_empiricas=amostras_empiricas,
+                    n_simulacoes=n_simulacoes,
+                    semente=42
+                )
+                st.metric("P(Sale total ≥ Hurdle)", f"{prob_hurdle * 100:.1f}%")
+                st.plotly_chart(criar_grafico_simulacao(totais_simulados, hurdle_nominal), use_container_width=True)
+                col_perc, col_contrib = st.columns([1, 2])
+                with col_perc:
+                    st.markdown("**Percentis do Sale total (R$ mil)**")
+                    st.dataframe(percentis.round(2))
+                with col_contrib:
+                    st.markdown("**Contribuição por empresa**")
+                    st.dataframe(contribuicoes.set_index('Empresa').round(2))
+        
+        # Múltiplos mínimos para atingir a meta (só calcula com o painel aberto)
+        painel_meta = st.expander(
+            "Meta: Saídas Necessárias para Atingir o Hurdle",
+            expanded=False,
+            key="painel_meta",
+            on_change="rerun"
+        )
+        if painel_meta.open:
+            with painel_meta:
+                requisito_ipca = totais['corrigido_hurdle']
+                opcoes_meta = {
+                    f"Hurdle nominal (R$ {format_brazil(hurdle_nominal)} mil)": hurdle_nominal,
+                    f"IPCA+{hurdle}% (R$ {format_brazil(requisito_ipca)} mil)": requisito_ipca,
+                    "O maior dos dois": max(hurdle_nominal, requisito_ipca)
+                }
+                col_meta1, col_meta2, col_meta3 = st.columns(3)
+                with col_meta1:
+                    rotulo_meta = st.radio("Meta", list(opcoes_meta), key="meta_alvo")
+                with col_meta2:
+                    multiplo_maximo = st.number_input("Múltiplo máximo por empresa", 1.0, 100.0, 10.0, 0.5, key="meta_teto")
+                with col_meta3:
+                    passo_multiplo = st.number_input("Passo do múltiplo", 0.1, 5.0, 0.1, 0.1, key="meta_passo")
+                meta = opcoes_meta[rotulo_meta]
+                
+                # Empresas ativas, sem write-off; write-offs continuam valendo zero
+                ativas = analise_crescimento[~analise_crescimento['Write-off']]
+                solucao, atingivel = resolver_meta(
+                    ativas['Empresa'], ativas['Valor Investido'], ativas['Múltiplo'],
+                    meta, multiplo_maximo, passo_multiplo
+                )
+                if solucao['Aumento'].sum() == 0:
+                    st.success("A meta já é atingida com os múltiplos atuais.")
+                elif atingivel:
+                    st.markdown(
+                        f"**Menor aumento total de múltiplo:** {solucao['Aumento'].sum():.1f}x "
+                        f"em {int((solucao['Aumento'] > 0).sum())} empresa(s)"
+                    )
+                else:
+                    st.warning("Nem todas as empresas no múltiplo máximo atingem a meta.")
+                st.dataframe(solucao[solucao['Aumento'] > 0].set_index('Empresa').round(2))
+                
+                fronteira = fronteira_pareto(ativas['Valor Investido'], ativas['Múltiplo'], meta)
+                st.plotly_chart(criar_grafico_fronteira(fronteira, multiplo_maximo), use_container_width=True)
 
     # -----------------------------------------------------------
     # COLUNA 2: Resumo da Carteira e Gráficos
@@ -287,102 +423,234 @@ if fair_value is not None and investimentos is not None:
     with col2:
         st.subheader("Gráficos de Investimentos")
         
+        # Cada painel só monta tabelas e gráficos quando está aberto; os totais dos
+        # títulos vêm dos agregados já calculados pelo motor (resultados['totais'])
         # NOVO: Adicionando o gráfico de Análise de Aportes no Tempo como expander na segunda coluna
-        with st.expander("Análise de Aportes no Tempo - Soma Cumulativa", expanded=False):
-            try:
-                # Carrega os dados de parcelas usando a função modularizada
-                df_parcelas = carregar_parcelas_investimento()
+        painel_aportes = st.expander(
+            "Análise de Aportes no Tempo - Soma Cumulativa",
+            expanded=False,
+            key="painel_aportes",
+            on_change="rerun"
+        )
+        if painel_aportes.open:
+            with painel_aportes:
+                try:
+                    # Carrega os dados de parcelas usando a função modularizada
+                    df_parcelas = carregar_parcelas_investimento()
                 
-                if not df_parcelas.empty:
-                    fig_temp = criar_grafico_aportes_no_tempo(df_parcelas)
-                    if fig_temp:
-                        st.plotly_chart(fig_temp, use_container_width=True)
+                    # Células que não puderam ser convertidas ficam de fora dos cálculos
+                    linhas_invalidas = df_parcelas.attrs.get('linhas_invalidas', [])
+                    if linhas_invalidas:
+                        st.warning(
+                            f"{len(linhas_invalidas)} célula(s) de data_investimentos.xlsx não puderam ser "
+                            "interpretadas e foram ignoradas:"
+                        )
+                        st.dataframe(pd.DataFrame(linhas_invalidas).set_index('Linha'))
+                
+                    if not df_parcelas.empty:
+                        resolucao_aportes = st.radio(
+                            "Resolução",
+                            list(RESOLUCOES_APORTES),
+                            index=list(RESOLUCOES_APORTES).index('Trimestral'),
+                            horizontal=True,
+                            key="aportes_resolucao"
+                        )
+                        fig_temp = criar_grafico_aportes_no_tempo(df_parcelas, resolucao_aportes)
+                        if fig_temp:
+                            st.plotly_chart(fig_temp, use_container_width=True)
+                        else:
+                            st.warning("Não há dados suficientes para exibir o gráfico cumulativo de investimentos.")
+                    
+                        # Correção parcela a parcela: cada aporte é corrigido a partir da sua própria data
+                        correcao_parcelas = corrigir_parcelas_por_empresa(
+                            df_parcelas, corrigir_ipca_lote, adicional=hurdle
+                        )
+                        correcao_parcelas[['Valor Investido', 'Valor Corrigido']] /= 1000  # R$ mil
+                        total_corrigido_parcelas = correcao_parcelas['Valor Corrigido'].sum()
+                        st.markdown(
+                            f"**Corrigido por parcela (IPCA+{hurdle}%):** R$ {format_brazil(total_corrigido_parcelas)} mil"
+                        )
+                        st.dataframe(correcao_parcelas.set_index('Empresa').round(2))
                     else:
                         st.warning("Não há dados suficientes para exibir o gráfico cumulativo de investimentos.")
-                else:
-                    st.warning("Não há dados suficientes para exibir o gráfico cumulativo de investimentos.")
-            except Exception as e:
-                st.error(f"Erro ao processar dados para o gráfico de aportes: {e}")
+                except Exception as e:
+                    st.error(f"Erro ao processar dados para o gráfico de aportes: {e}")
         
         # Adiciona gráfico para mostrar distribuição de vendas vs write-offs
-        with st.expander("Distribuição de Vendas vs Write-offs", expanded=True):
-            fig_distrib, total_vendas, total_writeoffs, total_sem_saida = criar_grafico_distribuicao_portfolio(st.session_state.edited_df)
+        painel_distribuicao = st.expander(
+            "Distribuição de Vendas vs Write-offs",
+            expanded=True,
+            key="painel_distribuicao",
+            on_change="rerun"
+        )
+        if painel_distribuicao.open:
+            with painel_distribuicao:
+                fig_distrib, total_vendas, total_writeoffs, total_sem_saida = criar_grafico_distribuicao_portfolio(carteira.df)
             
-            if fig_distrib:
-                st.plotly_chart(fig_distrib, use_container_width=True)
+                if fig_distrib:
+                    st.plotly_chart(fig_distrib, use_container_width=True)
                 
-                # Adiciona explicação dos valores
-                st.markdown(f"""
-                **Valores Detalhados:**
-                - **Vendas:** R$ {format_brazil(total_vendas)} mil (valor de saída)
-                - **Write-offs:** R$ {format_brazil(total_writeoffs)} mil (valor perdido)
-                - **Sem Saída:** R$ {format_brazil(total_sem_saida)} mil (valor ainda investido)
-                """)
-            else:
-                st.info("Não há dados suficientes para exibir o gráfico de distribuição.")
+                    # Adiciona explicação dos valores
+                    st.markdown(f"""
+                    **Valores Detalhados:**
+                    - **Vendas:** R$ {format_brazil(total_vendas)} mil (valor de saída)
+                    - **Write-offs:** R$ {format_brazil(total_writeoffs)} mil (valor perdido)
+                    - **Sem Saída:** R$ {format_brazil(total_sem_saida)} mil (valor ainda investido)
+                    """)
+                else:
+                    st.info("Não há dados suficientes para exibir o gráfico de distribuição.")
         
-        with st.expander("Participação do Fundo por Empresa", expanded=False):
-            df_ativos = st.session_state.edited_df[st.session_state.edited_df['Múltiplo'] > 0]
-            fig_port = criar_grafico_participacao_fundo(df_ativos)
-            st.plotly_chart(fig_port, use_container_width=True)
+        painel_participacao = st.expander(
+            "Participação do Fundo por Empresa",
+            expanded=False,
+            key="painel_participacao",
+            on_change="rerun"
+        )
+        if painel_participacao.open:
+            with painel_participacao:
+                df_ativos = carteira.df[carteira.df['Múltiplo'] > 0]
+                fig_port = criar_grafico_participacao_fundo(df_ativos)
+                st.plotly_chart(fig_port, use_container_width=True)
         
-        with st.expander(f"Comparativo: Valor Aprovado vs Valor Investido (Total Investido: R$ {total_investido:.2f} MM)", expanded=False):
-            valores_aprovados = investimentos_ativos['Valor Aprovado em CI (R$ mil)']
-            fig = criar_comparativo_valores(
-                investimentos_ativos, 
-                valores_aprovados=valores_aprovados
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        painel_aprovado = st.expander(
+            f"Comparativo: Valor Aprovado vs Valor Investido (Total Investido: R$ {total_investido:.2f} MM)",
+            expanded=False,
+            key="painel_aprovado",
+            on_change="rerun"
+        )
+        if painel_aprovado.open:
+            with painel_aprovado:
+                valores_aprovados = investimentos_ativos['Valor Aprovado em CI (R$ mil)']
+                fig = criar_comparativo_valores(
+                    investimentos_ativos, 
+                    valores_aprovados=valores_aprovados
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
-        with st.expander(f"Montante Total Investido Corrigido pelo IPCA (R$ {total_ipca:.2f} MM)", expanded=False):
-            investimentos_ativos['Valor Corrigido IPCA'] = investimentos_ativos.apply(
-                lambda row: corrigir_ipca(
-                    row['Valor Investido'],
-                    row['Data do Primeiro Investimento']
-                ),
-                axis=1
-            )
-            fig = plot_comparativo(
-                investimentos_ativos['Empresa'],
-                investimentos_ativos['Valor Investido'],
-                investimentos_ativos['Valor Corrigido IPCA'],
-                '#FF5722',
-                'Valor Corrigido'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        painel_ipca = st.expander(
+            f"Montante Total Investido Corrigido pelo IPCA (R$ {total_ipca:.2f} MM)",
+            expanded=False,
+            key="painel_ipca",
+            on_change="rerun"
+        )
+        if painel_ipca.open:
+            with painel_ipca:
+                fig = plot_comparativo(
+                    investimentos_ativos['Empresa'],
+                    investimentos_ativos['Valor Investido'],
+                    corrigido_ipca,
+                    '#FF5722',
+                    'Valor Corrigido'
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
-        with st.expander(f"Montante Total Investido Corrigido pelo IPCA+6% (R$ {total_ipca_6:.2f} MM)", expanded=False):
-            investimentos_ativos['Valor Corrigido IPCA+6%'] = investimentos_ativos.apply(
-                lambda row: corrigir_ipca(
-                    row['Valor Investido'],
-                    row['Data do Primeiro Investimento'],
-                    adicional=6.0
-                ),
-                axis=1
-            ).round(2)
-            fig = plot_comparativo(
-                investimentos_ativos['Empresa'],
-                investimentos_ativos['Valor Investido'],
-                investimentos_ativos['Valor Corrigido IPCA+6%'],
-                '#9C27B0',
-                'Valor Corrigido'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        painel_ipca_6 = st.expander(
+            f"Montante Total Investido Corrigido pelo IPCA+6% (R$ {total_ipca_6:.2f} MM)",
+            expanded=False,
+            key="painel_ipca_6",
+            on_change="rerun"
+        )
+        if painel_ipca_6.open:
+            with painel_ipca_6:
+                fig = plot_comparativo(
+                    investimentos_ativos['Empresa'],
+                    investimentos_ativos['Valor Investido'],
+                    corrigido_ipca_6.round(2),
+                    '#9C27B0',
+                    'Valor Corrigido'
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
-        with st.expander(f"Montante Total Investido Corrigido pelo IPCA+{hurdle}% (R$ {total_ipca_hurdle:.2f} MM)", expanded=False):
-            investimentos_ativos['Valor Corrigido IPCA+Hurdle'] = investimentos_ativos.apply(
-                lambda row: corrigir_ipca(
-                    row['Valor Investido'],
-                    row['Data do Primeiro Investimento'],
-                    adicional=hurdle
-                ),
-                axis=1
-            ).round(2)
-            fig = plot_comparativo(
-                investimentos_ativos['Empresa'],
-                investimentos_ativos['Valor Investido'],
-                investimentos_ativos['Valor Corrigido IPCA+Hurdle'],
-                '#3F51B5',
-                'Valor Corrigido'
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        painel_ipca_hurdle = st.expander(
+            f"Montante Total Investido Corrigido pelo IPCA+{hurdle}% (R$ {total_ipca_hurdle:.2f} MM)",
+            expanded=False,
+            key="painel_ipca_hurdle",
+            on_change="rerun"
+        )
+        if painel_ipca_hurdle.open:
+            with painel_ipca_hurdle:
+                fig = plot_comparativo(
+                    investimentos_ativos['Empresa'],
+                    investimentos_ativos['Valor Investido'],
+                    corrigido_ipca_hurdle.round(2),
+                    '#3F51B5',
+                    'Valor Corrigido'
+                )
+                st.plotly_chart(fig, use_container_width=True)
+        
+        # A apuração oficial só é lida quando o painel é aberto (a primeira leitura do Excel é lenta)
+        painel_apuracao = st.expander(
+            "Conciliação com a Apuração Oficial do Hurdle",
+            expanded=False,
+            key="painel_apuracao",
+            on_change="rerun"
+        )
+        if painel_apuracao.open:
+            with painel_apuracao:
+                try:
+                    apuracao, metadados_apuracao = carregar_apuracao()
+                    conciliacao = conciliar_apuracao(apuracao, metadados_apuracao, corrigir_ipca_lote)
+                    hurdle_oficial = conciliacao['Hurdle Oficial'].sum() / 1000
+                    hurdle_calculado = conciliacao['Hurdle Calculado'].sum() / 1000
+                    st.markdown(f"""
+                    **Apuração até {metadados_apuracao['data_referencia'].strftime('%d/%m/%Y')}:**
+                    - **Hurdle oficial:** R$ {format_brazil(hurdle_oficial)} mil
+                    - **Hurdle calculado:** R$ {format_brazil(hurdle_calculado)} mil
+                    - **Diferença:** R$ {format_brazil(hurdle_calculado - hurdle_oficial)} mil
+                    """)
+                    st.dataframe(conciliacao.set_index('Data').round(2))
+                except Exception as e:
+                    st.error(f"Erro ao conciliar a apuração do hurdle: {e}")
+    
+    # Visão consolidada, quando data/fundos.json registra mais de um fundo
+    registro_fundos = carregar_registro()
+    if len(registro_fundos) > 1:
+        st.markdown("---")
+        painel_fundos = st.expander(
+            f"Consolidado dos Fundos ({len(registro_fundos)})",
+            expanded=False,
+            key="painel_fundos",
+            on_change="rerun"
+        )
+        if painel_fundos.open:
+            with painel_fundos:
+                consolidado = consolidado_dos_arquivos(hurdle, registro_fundos)
+                if consolidado is not None:
+                    st.dataframe(consolidado.set_index('Fundo').round(2))
+
+registro_execucao = finalizar_execucao()
+
+# Painel de diagnóstico, visível com ?admin=1 na URL ou ANTERA_ADMIN=1 no ambiente
+if st.query_params.get("admin") == "1" or os.environ.get("ANTERA_ADMIN") == "1":
+    st.markdown("---")
+    painel_admin = st.expander(
+        "Diagnóstico de Desempenho (admin)",
+        expanded=False,
+        key="painel_admin",
+        on_change="rerun"
+    )
+    if painel_admin.open:
+        with painel_admin:
+            st.metric("Duração desta execução", f"{registro_execucao['duracao_ms']:.0f} ms")
+            col_trechos, col_caches = st.columns(2)
+            with col_trechos:
+                st.markdown("**Trechos desta execução (ms)**")
+                st.dataframe(
+                    pd.Series(registro_execucao['totais_ms'], name='Duração (ms)', dtype=float)
+                    .sort_values(ascending=False).round(1)
+                )
+            with col_caches:
+                st.markdown("**Caches (acumulado no processo)**")
+                caches = pd.DataFrame.from_dict(contadores(), orient='index')
+                if not caches.empty:
+                    consultas = caches['acertos'] + caches['faltas']
+                    caches['Taxa de acerto (%)'] = (caches['acertos'] / consultas.where(consultas > 0) * 100).round(1)
+                    st.dataframe(caches.sort_index())
+            
+            # Histórico recente: percentis de cada trecho entre as execuções gravadas
+            historico = ler_execucoes()
+            if historico:
+                tempos = pd.DataFrame([r['totais_ms'] for r in historico])
+                tempos.insert(0, 'Execução', [r['duracao_ms'] for r in historico])
+                st.markdown(f"**Últimas {len(historico)} execuções (ms)**")
+                st.dataframe(tempos.describe(percentiles=[0.5, 0.95]).T[['count', 'mean', '50%', '95%', 'max']].round(1))
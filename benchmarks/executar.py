@@ -0,0 +1,360 @@
+"""
+Benchmarks dos caminhos de cálculo do analisador sobre carteiras sintéticas.
+
+    python -m benchmarks.executar
+    python -m benchmarks.executar --tamanhos 10 1000 100000 --alvos corrigir_ipca_lote
+    python -m benchmarks.executar --base benchmarks/resultados/anterior.json
+
+Grava os tempos em JSON (um registro por alvo e tamanho), o expoente de
+escalonamento de cada alvo (inclinação de log(tempo) × log(empresas)) e as
+violações dos limites de benchmarks/limites.json ou da comparação com --base.
+Sai com código 1 se houver violação.
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+import data_utils
+from data_utils import corrigir_ipca, corrigir_ipca_lote
+from modules import portfolio, cenarios_local, visualizations
+from modules.portfolio import preparar_dados_iniciais, gerar_analise_crescimento
+from modules.parcelas import corrigir_parcelas_por_empresa, ler_parcelas_excel, VERSAO_PARCELAS_EXCEL
+from modules.planilhas import ler_planilha
+from modules.engine import montar_carteira, calcular_resultados
+from modules.estado import EstadoCarteira
+from modules.incremental import RecalculoIncremental
+from modules.retornos import calcular_retornos
+from benchmarks.sintetico import gerar_ipca, gerar_carteira, gravar_parcelas_excel
+
+DIRETORIO_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_LIMITES = os.path.join(DIRETORIO_BENCHMARKS, 'limites.json')
+DIRETORIO_RESULTADOS = os.path.join(DIRETORIO_BENCHMARKS, 'resultados')
+TAMANHOS_PADRAO = [10, 100, 1_000, 10_000, 100_000]
+# Abaixo deste tempo a comparação com a base é ruído de medição
+TEMPO_MINIMO_COMPARACAO = 0.005
+
+def usar_ipca_sintetico(serie):
+    """
+    Fixa a série do IPCA usada pelos cálculos (sem consultar o arquivo local nem a API).
+    """
+    data_utils.obter_ipca = lambda: serie
+    data_utils.construir_indice_ipca.clear()
+
+def _limpar_caches():
+    data_utils._calcular_grade_correcao.clear()
+    portfolio._cache_analise.limpar()
+    visualizations._cache_figuras.limpar()
+
+# Cada alvo recebe a carteira sintética e um diretório temporário, prepara o que
+# não deve ser medido e devolve a função medida. 'max_empresas' limita os tamanhos
+# dos alvos lentos por natureza (laço por empresa, escrita de Excel).
+
+def _corrigir_ipca(dados, _):
+    investimentos = dados['investimentos']
+    valores = investimentos['Valor Investido até a presente data (R$ mil)'].tolist()
+    datas = investimentos['Data do Primeiro Investimento'].tolist()
+    return lambda: [corrigir_ipca(v, d, 6.0) for v, d in zip(valores, datas)]
+
+def _corrigir_ipca_lote(dados, _):
+    investimentos = dados['investimentos']
+    return lambda: corrigir_ipca_lote(
+        investimentos['Valor Investido até a presente data (R$ mil)'],
+        investimentos['Data do Primeiro Investimento'],
+        adicional=6.0
+    )
+
+def _preparar_dados_iniciais(dados, _):
+    return lambda: preparar_dados_iniciais(dados['fair_value'], dados['investimentos'])
+
+def _gerar_analise_crescimento(dados, _):
+    carteira = montar_carteira(preparar_dados_iniciais(dados['fair_value'], dados['investimentos']))
+    ativas = carteira[carteira['Múltiplo'] > 0]
+    return lambda: gerar_analise_crescimento(ativas, corrigir_ipca_lote)
+
+def _calcular_resultados(dados, _):
+    carteira = montar_carteira(preparar_dados_iniciais(dados['fair_value'], dados['investimentos']))
+
+    def medir():
+        _limpar_caches()
+        return calcular_resultados(carteira, dados['investimentos'], 9.0)
+    return medir
+
+def _editar_multiplo(dados, _):
+    # Uma empresa ativa continua ativa: só a linha dela e os totais são recalculados
+    estado = EstadoCarteira(montar_carteira(preparar_dados_iniciais(dados['fair_value'], dados['investimentos'])))
+    recalculo = RecalculoIncremental()
+    recalculo.resultados(estado, dados['investimentos'], 9.0, 'sintetico')
+    empresa = next(e for e in estado.empresas if estado.multiplo(e) > 0)
+
+    def medir():
+        estado.definir_multiplo(empresa, estado.multiplo(empresa) + 0.5)
+        return recalculo.resultados(estado, dados['investimentos'], 9.0, 'sintetico')['totais']
+    return medir
+
+def _calcular_retornos(dados, _):
+    # Ledger já em cache: após editar um múltiplo, só a TIR é recalculada
+    carteira = montar_carteira(preparar_dados_iniciais(dados['fair_value'], dados['investimentos']))
+    calcular_retornos(dados['parcelas'], carteira)
+
+    def medir():
+        carteira.loc[0, 'Múltiplo'] += 0.5
+        return calcular_retornos(dados['parcelas'], carteira)
+    return medir
+
+def _corrigir_parcelas(dados, _):
+    return lambda: corrigir_parcelas_por_empresa(dados['parcelas'], corrigir_ipca_lote, adicional=9.0)
+
+def _carregar_parcelas_excel(dados, diretorio):
+    caminho = os.path.join(diretorio, 'data_investimentos.xlsx')
+    gravar_parcelas_excel(dados['parcelas'], caminho)
+    cache = os.path.join(diretorio, 'cache_frio')
+
+    def medir():
+        # Cache colunar vazio: lê o Excel, converte e grava o Parquet
+        for nome in os.listdir(cache) if os.path.isdir(cache) else []:
+            os.remove(os.path.join(cache, nome))
+        return ler_planilha(caminho, conversor=ler_parcelas_excel, diretorio_cache=cache,
+                            versao_conversor=VERSAO_PARCELAS_EXCEL)
+    return medir
+
+def _carregar_parcelas_cache(dados, diretorio):
+    caminho = os.path.join(diretorio, 'data_investimentos_cache.xlsx')
+    gravar_parcelas_excel(dados['parcelas'], caminho)
+    cache = os.path.join(diretorio, 'cache_quente')
+    ler_planilha(caminho, conversor=ler_parcelas_excel, diretorio_cache=cache,
+                 versao_conversor=VERSAO_PARCELAS_EXCEL)
+    return lambda: ler_planilha(caminho, conversor=ler_parcelas_excel, diretorio_cache=cache,
+                                versao_conversor=VERSAO_PARCELAS_EXCEL)
+
+def _cenario(dados):
+    investimentos = dados['investimentos']
+    return {
+        empresa: {"Múltiplo": float(multiplo), "Write-off": bool(multiplo == 0)}
+        for empresa, multiplo in zip(investimentos['Empresa'], investimentos['Múltiplo'])
+    }
+
+def _salvar_cenario(dados, diretorio):
+    caminho = os.path.join(diretorio, 'cenarios.sqlite')
+    cenario = _cenario(dados)
+    cenarios_local.salvar_cenario(cenarios_local.CENARIO_BASE, cenario, caminho=caminho, caminho_json=None)
+    alterado = {empresa: {**valores, "Múltiplo": valores["Múltiplo"] + 0.5} for empresa, valores in cenario.items()}
+    return lambda: cenarios_local.salvar_cenario("Otimista", alterado, caminho=caminho, caminho_json=None)
+
+def _carregar_cenario(dados, diretorio):
+    caminho = os.path.join(diretorio, 'cenarios_leitura.sqlite')
+    cenario = _cenario(dados)
+    cenarios_local.salvar_cenario(cenarios_local.CENARIO_BASE, cenario, caminho=caminho, caminho_json=None)
+    alterado = {empresa: {**valores, "Múltiplo": valores["Múltiplo"] + 0.5} for empresa, valores in list(cenario.items())[::2]}
+    cenarios_local.salvar_cenario("Otimista", alterado, caminho=caminho, caminho_json=None)
+    return lambda: cenarios_local.carregar_cenario("Otimista", caminho=caminho, caminho_json=None)
+
+def _figura(construir):
+    """Mede construção e serialização (o que o st.plotly_chart envia), sem o cache de figuras."""
+    def medir():
+        visualizations._cache_figuras.limpar()
+        figura = construir()
+        figura = figura[0] if isinstance(figura, tuple) else figura
+        return figura.to_json() if figura is not None else None
+    return medir
+
+def _grafico_comparativo(dados, _):
+    investimentos = dados['investimentos'].rename(columns={'Valor Investido até a presente data (R$ mil)': 'Valor Investido'})
+    return _figura(lambda: visualizations.plot_comparativo(
+        investimentos['Empresa'], investimentos['Valor Investido'],
+        investimentos['Valor Investido'] * 1.5, '#FF5722', 'Valor Corrigido'
+    ))
+
+def _grafico_distribuicao(dados, _):
+    carteira = montar_carteira(preparar_dados_iniciais(dados['fair_value'], dados['investimentos']))
+    return _figura(lambda: visualizations.criar_grafico_distribuicao_portfolio(carteira))
+
+def _grafico_participacao(dados, _):
+    return _figura(lambda: visualizations.criar_grafico_participacao_fundo(dados['investimentos']))
+
+def _grafico_aportes(dados, _):
+    return _figura(lambda: visualizations.criar_grafico_aportes_no_tempo(dados['parcelas'], 'Diária'))
+
+ALVOS = {
+    'corrigir_ipca': (_corrigir_ipca, 1_000),
+    'corrigir_ipca_lote': (_corrigir_ipca_lote, None),
+    'preparar_dados_iniciais': (_preparar_dados_iniciais, None),
+    'gerar_analise_crescimento': (_gerar_analise_crescimento, None),
+    'calcular_resultados': (_calcular_resultados, None),
+    'editar_multiplo': (_editar_multiplo, None),
+    'calcular_retornos': (_calcular_retornos, None),
+    'corrigir_parcelas_por_empresa': (_corrigir_parcelas, None),
+    'carregar_parcelas_excel': (_carregar_parcelas_excel, 1_000),
+    'carregar_parcelas_cache': (_carregar_parcelas_cache, 1_000),
+    'salvar_cenario': (_salvar_cenario, None),
+    'carregar_cenario': (_carregar_cenario, None),
+    'grafico_comparativo': (_grafico_comparativo, 10_000),
+    'grafico_distribuicao': (_grafico_distribuicao, None),
+    'grafico_participacao': (_grafico_participacao, 10_000),
+    'grafico_aportes': (_grafico_aportes, None)
+}
+
+def medir(funcao, repeticoes=5, tempo_minimo=0.2, max_repeticoes=50):
+    """
+    Executa 'funcao' ao menos 'repeticoes' vezes (e até somar 'tempo_minimo' segundos).
+    Retorna a lista de tempos em segundos.
+    """
+    tempos = []
+    while len(tempos) < repeticoes or (sum(tempos) < tempo_minimo and len(tempos) < max_repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+def expoente_escalonamento(registros):
+    """
+    Inclinação de log(tempo mínimo) × log(empresas): ~1 é linear, ~0 é constante.
+    Retorna None com menos de dois tamanhos.
+    """
+    if len(registros) < 2:
+        return None
+    empresas = np.log([r['empresas'] for r in registros])
+    tempos = np.log([max(r['segundos_min'], 1e-9) for r in registros])
+    return round(float(np.polyfit(empresas, tempos, 1)[0]), 3)
+
+def verificar(resultados, limites, base=None, tolerancia=1.5):
+    """
+    Compara os resultados com os limites ({alvo: {'empresas', 'max_segundos', 'max_expoente'}})
+    e, se informada, com uma execução anterior ('base'), tolerando 'tolerancia' vezes o tempo dela.
+    Retorna a lista de violações.
+    """
+    violacoes = []
+    por_chave = {(r['alvo'], r['empresas']): r for r in resultados['medicoes']}
+    for alvo, limite in limites.items():
+        registro = por_chave.get((alvo, limite.get('empresas')))
+        if registro is not None and 'max_segundos' in limite and registro['segundos_min'] > limite['max_segundos']:
+            violacoes.append(
+                f"{alvo} com {registro['empresas']} empresas: {registro['segundos_min']:.4f}s "
+                f"(limite {limite['max_segundos']}s)"
+            )
+        expoente = resultados['escalonamento'].get(alvo)
+        if expoente is not None and 'max_expoente' in limite and expoente > limite['max_expoente']:
+            violacoes.append(f"{alvo}: expoente de escalonamento {expoente} (limite {limite['max_expoente']})")
+    for registro in (base or {}).get('medicoes', []):
+        atual = por_chave.get((registro['alvo'], registro['empresas']))
+        if atual is None or max(atual['segundos_min'], registro['segundos_min']) < TEMPO_MINIMO_COMPARACAO:
+            continue
+        if atual['segundos_min'] > registro['segundos_min'] * tolerancia:
+            violacoes.append(
+                f"{registro['alvo']} com {registro['empresas']} empresas: {atual['segundos_min']:.4f}s "
+                f"contra {registro['segundos_min']:.4f}s na base (tolerância {tolerancia}x)"
+            )
+    return violacoes
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO_BENCHMARKS,
+            capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def executar(tamanhos=TAMANHOS_PADRAO, alvos=None, max_parcelas=50, anos_ipca=30,
+             repeticoes=5, semente=0, progresso=None):
+    """
+    Roda os alvos em cada tamanho de carteira. Retorna o dict gravado em JSON:
+    'metadados', 'medicoes' (alvo, empresas, parcelas, tempos) e 'escalonamento'.
+    """
+    usar_ipca_sintetico(gerar_ipca(anos_ipca, semente))
+    alvos = alvos or list(ALVOS)
+    medicoes = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in sorted(tamanhos):
+            dados = gerar_carteira(n, max_parcelas, anos_ipca, semente)
+            for alvo in alvos:
+                preparar, max_empresas = ALVOS[alvo]
+                if max_empresas is not None and n > max_empresas:
+                    continue
+                subdiretorio = tempfile.mkdtemp(dir=diretorio)
+                tempos = medir(preparar(dados, subdiretorio), repeticoes)
+                registro = {
+                    'alvo': alvo,
+                    'empresas': n,
+                    'parcelas': len(dados['parcelas']),
+                    'repeticoes': len(tempos),
+                    'segundos_min': min(tempos),
+                    'segundos_mediana': float(np.median(tempos))
+                }
+                medicoes.append(registro)
+                if progresso:
+                    progresso(registro)
+    escalonamento = {
+        alvo: expoente_escalonamento([r for r in medicoes if r['alvo'] == alvo])
+        for alvo in alvos
+    }
+    return {
+        'metadados': {
+            'data': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'processadores': os.cpu_count(),
+            'max_parcelas': max_parcelas,
+            'anos_ipca': anos_ipca,
+            'semente': semente
+        },
+        'medicoes': medicoes,
+        'escalonamento': escalonamento
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.executar", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Números de empresas.")
+    parser.add_argument("--alvos", nargs="+", choices=list(ALVOS), help="Alvos medidos (padrão: todos).")
+    parser.add_argument("--max-parcelas", type=int, default=50, help="Máximo de parcelas por empresa.")
+    parser.add_argument("--anos-ipca", type=int, default=30, help="Anos da série sintética do IPCA.")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", help="Arquivo JSON de resultados (padrão: benchmarks/resultados/<data>.json).")
+    parser.add_argument("--limites", default=ARQUIVO_LIMITES, help="Arquivo JSON de limites.")
+    parser.add_argument("--base", help="Resultados anteriores para detectar regressões.")
+    parser.add_argument("--tolerancia", type=float, default=1.5, help="Tempo máximo em relação à base (padrão: 1.5x).")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    def progresso(r):
+        print(f"{r['alvo']:<30} {r['empresas']:>7} empresas {r['parcelas']:>9} parcelas "
+              f"{r['segundos_min'] * 1000:>10.2f} ms", flush=True)
+
+    resultados = executar(args.tamanhos, args.alvos, args.max_parcelas, args.anos_ipca, args.repeticoes, progresso=progresso)
+
+    limites = {}
+    if args.limites and os.path.exists(args.limites):
+        with open(args.limites, encoding='utf-8') as arquivo:
+            limites = json.load(arquivo)
+    base = None
+    if args.base:
+        with open(args.base, encoding='utf-8') as arquivo:
+            base = json.load(arquivo)
+    resultados['violacoes'] = verificar(resultados, limites, base, args.tolerancia)
+
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+
+    print("\nExpoente de escalonamento (1 = linear):")
+    for alvo, expoente in resultados['escalonamento'].items():
+        print(f"  {alvo:<30} {expoente if expoente is not None else '-'}")
+    for violacao in resultados['violacoes']:
+        print(f"VIOLAÇÃO: {violacao}", file=sys.stderr)
+    print(f"\nResultados gravados em {saida}")
+    return 1 if resultados['violacoes'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Gerador de carteiras sintéticas para os benchmarks, no mesmo formato das
+planilhas de data/ (fair_value.xlsx, investimentos.xlsx, data_investimentos.xlsx)
+e da série do IPCA devolvida por obter_ipca.
+"""
+import numpy as np
+import pandas as pd
+
+SETORES = ['AgroTech', 'BioTech', 'EdTech', 'EnergyTech', 'FinTech', 'HealthTech',
+           'IndTech', 'LogTech', 'RetailTech', 'SaaS']
+
+def gerar_ipca(anos=30, semente=0):
+    """
+    Série mensal sintética do IPCA com 'anos' anos, terminando no mês anterior
+    ao atual (índice 'data', colunas 'valor' em % e 'variacao_decimal').
+    """
+    rng = np.random.default_rng(semente)
+    fim = pd.Timestamp.now().normalize().replace(day=1) - pd.DateOffset(months=1)
+    datas = pd.date_range(end=fim, periods=anos * 12, freq='MS', name='data')
+    serie = pd.DataFrame({'valor': np.round(rng.normal(0.4, 0.3, datas.size), 2)}, index=datas)
+    serie['variacao_decimal'] = serie['valor'] / 100
+    return serie
+
+def gerar_carteira(n_empresas, max_parcelas=50, anos=30, semente=0):
+    """
+    Gera uma carteira com 'n_empresas' empresas, cada uma com 1 a 'max_parcelas'
+    parcelas espalhadas pelos últimos 'anos' anos.
+    Retorna dict com 'fair_value' e 'investimentos' (colunas lidas das planilhas,
+    valores em R$ mil) e 'parcelas' (ledger já convertido, valores em R$).
+    """
+    rng = np.random.default_rng(semente)
+    hoje = np.datetime64(pd.Timestamp.now().normalize(), 'D')
+    empresas = np.array([f"Empresa {i:06d}" for i in range(n_empresas)], dtype=object)
+
+    # Parcelas: primeira data uniforme no período; as seguintes a cada 1 a 6 meses
+    n_parcelas = rng.integers(1, max_parcelas + 1, n_empresas)
+    dona = np.repeat(np.arange(n_empresas), n_parcelas)
+    inicio_grupo = np.repeat(np.cumsum(n_parcelas) - n_parcelas, n_parcelas)
+    intervalos = rng.integers(30, 181, dona.size)
+    intervalos[inicio_grupo] = 0
+    acumulado = np.cumsum(intervalos)
+    deslocamentos = acumulado - acumulado[inicio_grupo]
+    primeiras = hoje - rng.integers(30, anos * 365, n_empresas).astype('timedelta64[D]')
+    datas = np.minimum(primeiras[dona] + deslocamentos.astype('timedelta64[D]'), hoje)
+    valores_parcelas = np.round(rng.lognormal(np.log(500_000), 0.8, dona.size), -3)
+
+    parcelas = pd.DataFrame({
+        'Empresa': empresas[dona],
+        'Setor': np.asarray(SETORES, dtype=object)[rng.integers(0, len(SETORES), n_empresas)][dona],
+        'Data Investimento': datas.astype('datetime64[ns]'),
+        'Valor Investido': valores_parcelas
+    })
+
+    investido = np.bincount(dona, weights=valores_parcelas, minlength=n_empresas) / 1000
+    multiplos = np.where(rng.random(n_empresas) < 0.1, 0.0, np.round(rng.lognormal(0.0, 0.7, n_empresas), 1))
+    investimentos = pd.DataFrame({
+        'Empresa': empresas,
+        'Valor Aprovado em CI (R$ mil)': np.round(investido * rng.uniform(1.0, 1.5, n_empresas)),
+        'Valor Investido até a presente data (R$ mil)': np.round(investido),
+        'Participação do Fundo (%)': np.round(rng.uniform(5, 60, n_empresas), 1),
+        'Data do Primeiro Investimento': pd.to_datetime(primeiras).strftime('%d/%m/%y').to_numpy(dtype=object),
+        'Múltiplo': multiplos,
+        'Write-off': multiplos == 0
+    })
+
+    com_fair_value = rng.random(n_empresas) < 0.9
+    fair_value = pd.DataFrame({
+        'Empresa': empresas[com_fair_value],
+        'Valor Primatec (R$ mil)': np.round(investido[com_fair_value] * rng.lognormal(0.0, 0.5, com_fair_value.sum()))
+    })
+    return {'fair_value': fair_value, 'investimentos': investimentos, 'parcelas': parcelas}
+
+def gravar_parcelas_excel(parcelas, caminho):
+    """
+    Grava o ledger no formato de data_investimentos.xlsx (datas dd/mm/aaaa em texto).
+    """
+    planilha = parcelas.copy()
+    planilha['Data Investimento'] = planilha['Data Investimento'].dt.strftime('%d/%m/%Y')
+    planilha.to_excel(caminho, index=False)
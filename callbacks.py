@@ -1,80 +1,56 @@
-import time
-import streamlit as st
+from modules.interface import st
+
+def sincronizar_widgets_empresa(comp):
+    """
+    Copia múltiplo e write-off da empresa (estado da carteira) para os widgets
+    de configuração, mantendo campo numérico, slider e checkbox alinhados.
+    Os widgets têm chaves fixas e mostram sempre a empresa selecionada.
+    """
+    carteira = st.session_state.carteira
+    if comp not in carteira:
+        return
+    multiplo = carteira.multiplo(comp)
+    st.session_state["multiplo_num"] = multiplo
+    st.session_state["multiplo_slider"] = multiplo
+    st.session_state["multiplo_writeoff"] = carteira.writeoff(comp)
+
+# Função callback que leva os valores da empresa escolhida para os widgets de configuração
+def selecionar_empresa():
+    sincronizar_widgets_empresa(st.session_state["select_company"])
 
 # Função callback que atualiza o "Múltiplo" na tabela global a partir do number_input
 def update_multiplo():
     comp = st.session_state["select_company"]
-    new_val = st.session_state[f"num_{comp}"]
-    
-    # Atualiza múltiplo no DataFrame
-    st.session_state.edited_df.loc[
-        st.session_state.edited_df["Empresa"] == comp, "Múltiplo"
-    ] = new_val
-    
-    # Atualiza também o slider para manter sincronizado
-    st.session_state[f"slider_{comp}"] = new_val
-    
-    # Se o múltiplo for 0, marca como write-off automaticamente
-    if new_val == 0:
-        st.session_state[f"writeoff_{comp}"] = True
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Write-off"
-        ] = True
-    # Se o múltiplo for maior que 0, desmarca write-off automaticamente
-    else:
-        st.session_state[f"writeoff_{comp}"] = False
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Write-off"
-        ] = False
+    new_val = st.session_state["multiplo_num"]
+
+    # Atualiza múltiplo (e write-off, se o múltiplo for 0) só na linha da empresa
+    st.session_state.carteira.definir_multiplo(comp, new_val)
+    sincronizar_widgets_empresa(comp)
 
 # Função callback que atualiza o "Múltiplo" na tabela global a partir do slider
 def update_multiplo_slider():
-    time.sleep(1)  # Pequeno atraso para melhorar a experiência do usuário
     comp = st.session_state["select_company"]
-    new_val = st.session_state[f"slider_{comp}"]
-    
-    # Atualiza múltiplo no DataFrame
-    st.session_state.edited_df.loc[
-        st.session_state.edited_df["Empresa"] == comp, "Múltiplo"
-    ] = new_val
-    
-    # Atualiza também o campo numérico para manter sincronizado
-    st.session_state[f"num_{comp}"] = new_val
-    
-    # Se o múltiplo for 0, marca como write-off automaticamente
-    if new_val == 0:
-        st.session_state[f"writeoff_{comp}"] = True
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Write-off"
-        ] = True
-    # Se o múltiplo for maior que 0, desmarca write-off automaticamente
-    else:
-        st.session_state[f"writeoff_{comp}"] = False
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Write-off"
-        ] = False
+    new_val = st.session_state["multiplo_slider"]
+
+    # Grava só a linha da empresa e atualiza o campo numérico e o checkbox
+    st.session_state.carteira.definir_multiplo(comp, new_val)
+    sincronizar_widgets_empresa(comp)
 
 # Função callback que alterna o status de write-off e ajusta o múltiplo correspondentemente
 def toggle_writeoff():
     comp = st.session_state["select_company"]
-    is_writeoff = st.session_state[f"writeoff_{comp}"]
-    
-    # Atualiza a coluna Write-off no DataFrame
-    st.session_state.edited_df.loc[
-        st.session_state.edited_df["Empresa"] == comp, "Write-off"
-    ] = is_writeoff
-    
-    # Quando marcar write-off, define como 0
-    if is_writeoff:
-        st.session_state[f"num_{comp}"] = 0.0
-        st.session_state[f"slider_{comp}"] = 0.0
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Múltiplo"
-        ] = 0.0
-    # Quando desmarcar write-off, define como 1
-    else:
-        st.session_state[f"num_{comp}"] = 1.0
-        st.session_state[f"slider_{comp}"] = 1.0
-        st.session_state.edited_df.loc[
-            st.session_state.edited_df["Empresa"] == comp, "Múltiplo"
-        ] = 1.0
+    is_writeoff = st.session_state["multiplo_writeoff"]
+
+    # Quando marcar write-off, define múltiplo 0; quando desmarcar, define 1
+    st.session_state.carteira.definir_writeoff(comp, is_writeoff)
+    sincronizar_widgets_empresa(comp)
+
+# Função callback que aplica as edições feitas diretamente na tabela
+def aplicar_edicoes_tabela(chave_editor):
+    edicoes = st.session_state[chave_editor].get("edited_rows", {})
+    alteradas = st.session_state.carteira.aplicar_edicoes(edicoes)
+
+    # Mantém os widgets da empresa selecionada alinhados com a tabela
+    comp = st.session_state.get("select_company")
+    if comp in alteradas:
+        sincronizar_widgets_empresa(comp)
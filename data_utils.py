@@ -1,9 +1,11 @@
 import os
-import requests
 import pandas as pd
 import numpy as np
-import streamlit as st
-from datetime import datetime
+from modules.ipca_local import ler_serie_local, precisa_sincronizar, sincronizar_ipca
+from modules.planilhas import assinatura_arquivo, ler_planilha
+from modules.parcelas import ler_parcelas_excel, VERSAO_PARCELAS_EXCEL
+from modules.interface import cache_data, erro, aviso
+from modules.instrumentacao import medido
 
 def format_brazil(value: float) -> str:
     """
@@ -16,119 +18,255 @@ def format_brazil(value: float) -> str:
 DIRETORIO_ATUAL = os.path.dirname(os.path.abspath(__file__))
 DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
 
-@st.cache_data
-def carregar_dados():
+# Colunas usadas de cada planilha (as demais não são lidas do cache colunar)
+COLUNAS_FAIR_VALUE = ['Empresa', 'Valor Primatec (R$ mil)']
+COLUNAS_INVESTIMENTOS = [
+    'Empresa',
+    'Valor Aprovado em CI (R$ mil)',
+    'Valor Investido até a presente data (R$ mil)',
+    'Participação do Fundo (%)',
+    'Data do Primeiro Investimento',
+    'Múltiplo',
+    'Write-off'
+]
+
+def ler_dados_fundo(caminho_fair_value, caminho_investimentos):
     """
-    Lê os arquivos fair_value.xlsx e investimentos.xlsx,
-    garantindo a existência das colunas necessárias.
+    Lê o par fair value / investimentos de um fundo pelo cache colunar (ver ler_planilha),
+    completando "Múltiplo" (1.0) e "Write-off" (False) quando a planilha não os traz.
+    Não exibe mensagens: erros de leitura são propagados.
+    """
+    fair_value = ler_planilha(caminho_fair_value, COLUNAS_FAIR_VALUE)
+    investimentos = ler_planilha(caminho_investimentos, COLUNAS_INVESTIMENTOS)
+    if 'Múltiplo' not in investimentos.columns:
+        investimentos['Múltiplo'] = 1.0
+    if 'Write-off' not in investimentos.columns:
+        investimentos['Write-off'] = False
+    return fair_value, investimentos
+
+@cache_data
+def _carregar_dados(assinatura_fair_value, assinatura_investimentos):
+    """
+    Lê fair_value.xlsx e investimentos.xlsx pelo cache colunar (ver ler_planilha).
+    As assinaturas (tamanho, data de modificação) dos arquivos fazem parte da chave
+    do cache, então uma planilha alterada é relida sem reiniciar o app.
     """
     try:
-        caminho_fair_value = os.path.join(DIRETORIO_DADOS, 'fair_value.xlsx')
-        caminho_investimentos = os.path.join(DIRETORIO_DADOS, 'investimentos.xlsx')
-        # Ler fair_value.xlsx
-        fair_value = pd.read_excel(caminho_fair_value)
-        # Ler investimentos.xlsx; se a coluna "Múltiplo" não existir, cria com valor padrão 1.0
-        investimentos = pd.read_excel(caminho_investimentos)
-        if 'Múltiplo' not in investimentos.columns:
-            investimentos['Múltiplo'] = 1.0
-        if 'Write-off' not in investimentos.columns:
-            investimentos['Write-off'] = False
-        return fair_value, investimentos
+        return ler_dados_fundo(
+            os.path.join(DIRETORIO_DADOS, 'fair_value.xlsx'),
+            os.path.join(DIRETORIO_DADOS, 'investimentos.xlsx')
+        )
     except FileNotFoundError as e:
-        st.error(f"❌ Erro ao carregar os arquivos: {e}")
+        erro(f"❌ Erro ao carregar os arquivos: {e}")
         return None, None
     except Exception as e:
-        st.error(f"❌ Erro inesperado ao carregar os arquivos: {e}")
+        erro(f"❌ Erro inesperado ao carregar os arquivos: {e}")
         return None, None
 
-@st.cache_data
+def assinaturas_dados():
+    """
+    Assinaturas (tamanho, data de modificação) de fair_value.xlsx e investimentos.xlsx:
+    mudam quando alguma das planilhas é alterada.
+    """
+    return (
+        assinatura_arquivo(os.path.join(DIRETORIO_DADOS, 'fair_value.xlsx')),
+        assinatura_arquivo(os.path.join(DIRETORIO_DADOS, 'investimentos.xlsx'))
+    )
+
+@medido()
+def carregar_dados():
+    """
+    Lê os arquivos fair_value.xlsx e investimentos.xlsx,
+    garantindo a existência das colunas necessárias.
+    """
+    return _carregar_dados(*assinaturas_dados())
+
+@medido()
+@cache_data(ttl="12h")
 def obter_ipca():
     """
-    Obtém a série histórica de IPCA via API do BCB (código 433).
-    Se der erro, retorna None.
+    Obtém a série histórica de IPCA (BCB, código 433) do arquivo local data/ipca.sqlite.
+    A API só é consultada quando faltam meses no arquivo, e apenas para esses meses.
+    Se a atualização falhar, usa a série local; sem dados locais, retorna None.
     """
-    try:
-        url = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.433/dados?formato=json"
-        response = requests.get(url)
-        if response.status_code == 200:
-            if not response.text:
-                st.error("A API do BCB retornou resposta vazia. Usando valor fixo de IPCA.")
-                return None
-            try:
-                json_data = response.json()
-            except ValueError as ve:
-                st.error(f"Erro ao decodificar JSON da API do BCB: {ve}. Usando valor fixo de IPCA.")
-                return None
-            if not json_data:
-                st.error("A API do BCB não retornou dados. Usando valor fixo de IPCA.")
+    if precisa_sincronizar():
+        try:
+            sincronizar_ipca()
+        except Exception as e:
+            dados = ler_serie_local()
+            if dados is None:
+                erro(f"Erro ao obter dados do IPCA: {e}. Usando valor fixo de IPCA.")
                 return None
-            dados = pd.DataFrame(json_data)
-            if 'data' not in dados.columns or 'valor' not in dados.columns:
-                st.error("Resposta da API não contém os dados esperados. Usando valor fixo de IPCA.")
-                return None
-            dados['data'] = pd.to_datetime(dados['data'], format='%d/%m/%Y')
-            dados['valor'] = pd.to_numeric(dados['valor'], errors='coerce')
-            dados.dropna(subset=['valor'], inplace=True)
-            dados.set_index('data', inplace=True)
-            dados['variacao_decimal'] = dados['valor'] / 100
+            aviso(
+                f"Não foi possível atualizar o IPCA ({e}). "
+                f"Usando a série local até {dados.index.max().strftime('%m/%Y')}."
+            )
             return dados
-        else:
-            st.error("Erro ao acessar API do BCB. Status code: " + str(response.status_code))
-            return None
-    except Exception as e:
-        st.error(f"Erro ao obter dados do IPCA: {e}. Usando valor fixo de IPCA.")
+    dados = ler_serie_local()
+    if dados is None:
+        erro("A série local do IPCA está vazia. Usando valor fixo de IPCA.")
+    return dados
+
+# IPCA anual usado quando a série do BCB não está disponível
+IPCA_FALLBACK = 0.045
+
+@cache_data(ttl="12h")
+def construir_indice_ipca():
+    """
+    Monta o índice acumulado do IPCA a partir da série do BCB.
+    Retorna (datas, fatores), onde fatores[i] é o produto de (1 + variação)
+    dos meses anteriores a datas[i] (fatores tem um elemento a mais que datas).
+    Se a série não estiver disponível, retorna None.
+    """
+    df_ipca = obter_ipca()
+    if df_ipca is None:
         return None
+    df_ipca = df_ipca.sort_index()
+    datas = df_ipca.index.values.astype('datetime64[ns]')
+    variacoes = df_ipca['variacao_decimal'].to_numpy(dtype=float)
+    fatores = np.concatenate(([1.0], np.cumprod(1 + variacoes)))
+    return datas, fatores
+
+def versao_ipca():
+    """
+    Identifica a versão da série do IPCA em uso (tamanho, último mês e data de hoje),
+    para invalidar caches de valores corrigidos quando a série ou o dia mudam.
+    """
+    hoje = pd.Timestamp.now().strftime('%Y-%m-%d')
+    indice = construir_indice_ipca()
+    if indice is None:
+        return f"fixo-{IPCA_FALLBACK}-{hoje}"
+    datas, fatores = indice
+    return f"{len(datas)}-{datas[-1]}-{fatores[-1]:.12g}-{hoje}"
+
+def converter_datas(datas):
+    """
+    Converte uma sequência de datas (dd/mm/aa, dd/mm/aaaa ou datetime)
+    para um array datetime64, de uma só vez. Os formatos podem vir misturados:
+    cada um é lido com formato explícito só nas datas que o anterior não resolveu
+    (dd/mm/aaaa, depois dd/mm/aa e, por fim, aaaa-mm-dd). Datas inválidas viram NaT.
+    """
+    datas = pd.Series(datas)
+    convertidas = pd.to_datetime(datas, format='%d/%m/%Y', errors='coerce')
+    for formato in ('%d/%m/%y', 'ISO8601'):
+        faltantes = convertidas.isna() & datas.notna()
+        if not faltantes.any():
+            break
+        convertidas[faltantes] = pd.to_datetime(datas[faltantes], format=formato, errors='coerce')
+    return convertidas.to_numpy(dtype='datetime64[ns]')
+
+def fator_ipca_acumulado(datas, data_final=None):
+    """
+    Retorna, para cada data, o fator (1 + IPCA acumulado) desde a data até hoje
+    (ou até 'data_final', inclusive o mês de data_final).
+    Resolve todas as datas com uma única busca binária no índice acumulado.
+    """
+    datas = np.asarray(datas, dtype='datetime64[ns]')
+    indice = construir_indice_ipca()
+    if indice is None:
+        return np.full(datas.shape, 1 + IPCA_FALLBACK)  # Valor fixo se a API falhar
+    datas_ipca, fatores = indice
+    posicoes = np.searchsorted(datas_ipca, datas, side='left')
+    if data_final is None:
+        fator_final = fatores[-1]
+    else:
+        fim = np.datetime64(pd.Timestamp(data_final), 'ns')
+        posicao_final = np.searchsorted(datas_ipca, fim, side='right')
+        fator_final = fatores[posicao_final]
+        posicoes = np.minimum(posicoes, posicao_final)
+    return fator_final / fatores[posicoes]
+
+def anos_desde(datas, data_final=None):
+    """
+    Retorna o número de anos (dias corridos / 365,25) entre cada data e hoje
+    (ou 'data_final').
+    """
+    datas = np.asarray(datas, dtype='datetime64[ns]')
+    fim = pd.Timestamp.now() if data_final is None else pd.Timestamp(data_final)
+    dias = (np.datetime64(fim, 'ns') - datas).astype('timedelta64[D]').astype(float)
+    return dias / 365.25
+
+@medido()
+def corrigir_ipca_lote(valores, datas_investimento, adicional=0.0, data_final=None):
+    """
+    Versão vetorizada de corrigir_ipca: corrige todos os valores de uma vez
+    pelo IPCA acumulado desde cada data de investimento até hoje (ou 'data_final'),
+    aplicando 'adicional'% ao ano. 'adicional' pode ser um número ou um array
+    (uma taxa por valor).
+    """
+    valores = np.asarray(valores, dtype=float)
+    datas = converter_datas(datas_investimento)
+    taxa = 1 + np.asarray(adicional, dtype=float) / 100
+    fator_ipca = fator_ipca_acumulado(datas, data_final)
+    return valores * fator_ipca * taxa ** anos_desde(datas, data_final)
+
+# Valores possíveis do slider "Taxa de Correção (IPCA + %)"
+TAXAS_HURDLE = np.round(np.arange(0.0, 15.0 + 0.5, 0.5), 1)
+
+@cache_data(ttl="12h")
+def _calcular_grade_correcao(valores, datas_investimento, taxas, versao):
+    """
+    Grade de calcular_grade_correcao. 'versao' (ver versao_ipca) só compõe a chave
+    do cache: a grade é refeita quando a série do IPCA ou o dia mudam.
+    """
+    valores = np.asarray(valores, dtype=float)
+    datas = converter_datas(datas_investimento)
+    base = valores * fator_ipca_acumulado(datas)
+    fatores_taxa = 1 + np.asarray(taxas, dtype=float) / 100
+    return base[:, None] * fatores_taxa[None, :] ** anos_desde(datas)[:, None]
+
+@medido()
+def calcular_grade_correcao(valores, datas_investimento, taxas=TAXAS_HURDLE):
+    """
+    Calcula a matriz empresas × taxas com os valores corrigidos pelo IPCA + taxa,
+    em uma única passada vetorizada. O resultado fica em cache por conjunto de
+    dados e versão do IPCA, então mover o slider vira apenas uma consulta de coluna.
+    """
+    return _calcular_grade_correcao(valores, datas_investimento, taxas, versao_ipca())
+
+def coluna_da_grade(grade, taxa, taxas=TAXAS_HURDLE):
+    """
+    Retorna os valores corrigidos por IPCA + 'taxa' a partir da grade pré-calculada.
+    """
+    posicoes = np.flatnonzero(np.isclose(np.asarray(taxas, dtype=float), taxa))
+    if posicoes.size == 0:
+        raise ValueError(f"Taxa {taxa}% não está na grade de correção.")
+    return grade[:, posicoes[0]]
 
 def calcular_ipca_acumulado(data_inicial):
     """
     Calcula o IPCA acumulado desde data_inicial até hoje.
     Se não conseguir baixar via API, usa 4,5% fixo de fallback.
     """
-    df_ipca = obter_ipca()
-    if df_ipca is None:
-        return 0.045  # Valor fixo se a API falhar
-    data_inicial = pd.to_datetime(data_inicial)
-    mask = (df_ipca.index >= data_inicial)
-    ipca_periodo = df_ipca[mask]
-    ipca_acumulado = np.prod(1 + ipca_periodo['variacao_decimal']) - 1
-    return ipca_acumulado
+    datas = converter_datas([data_inicial])
+    return float(fator_ipca_acumulado(datas)[0] - 1)
 
 def corrigir_ipca(valor, data_investimento, adicional=0.0):
     """
     Corrige 'valor' pelo IPCA acumulado desde data_investimento até hoje
     e aplica 'adicional'% ao ano (ex.: IPCA+6%), proporcional ao intervalo.
     """
-    data_investimento = pd.to_datetime(data_investimento)
-    ipca_acum = calcular_ipca_acumulado(data_investimento)
-    anos = (pd.Timestamp.now() - data_investimento).days / 365.25
-    valor_corrigido_ipca = valor * (1 + ipca_acum)
-    valor_final = valor_corrigido_ipca * ((1 + adicional/100) ** anos)
-    return valor_final
+    return float(corrigir_ipca_lote([valor], [data_investimento], adicional)[0])
+
+ARQUIVO_PARCELAS = os.path.join(DIRETORIO_DADOS, 'data_investimentos.xlsx')
 
-def carregar_parcelas_investimento():
+@cache_data
+def _carregar_parcelas(caminho, assinatura):
     """
-    Carrega dados de parcelas de investimento para análise de aportes no tempo.
+    Lê e converte o ledger de parcelas uma única vez por versão do arquivo
+    ('assinatura' entra na chave do cache); a conversão fica gravada no cache colunar
+    e é refeita quando VERSAO_PARCELAS_EXCEL muda.
+    """
+    return ler_planilha(caminho, conversor=ler_parcelas_excel, versao_conversor=VERSAO_PARCELAS_EXCEL)
+
+@medido()
+def carregar_parcelas_investimento(caminho=ARQUIVO_PARCELAS):
+    """
+    Carrega o ledger de parcelas de investimento (padrão: data_investimentos.xlsx).
+    As células que não puderam ser convertidas ficam em attrs['linhas_invalidas'].
     """
     try:
-        caminho_parcelas = os.path.join(DIRETORIO_DADOS, 'data_investimentos.xlsx')
-        df_parcelas = pd.read_excel(caminho_parcelas)
-        df_parcelas["Data Investimento"] = pd.to_datetime(
-            df_parcelas["Data Investimento"], 
-            format="%d/%m/%Y", 
-            errors="coerce"
-        )
-        
-        # Converter valores de investimento para formato numérico
-        df_parcelas["Valor Investido"] = (
-            df_parcelas["Valor Investido"]
-            .astype(str)
-            .str.replace("R\\$","", regex=True)
-            .str.replace("\\.","", regex=True)
-            .str.replace(",",".", regex=True)
-        )
-        df_parcelas["Valor Investido"] = pd.to_numeric(df_parcelas["Valor Investido"], errors="coerce")
-        
-        return df_parcelas
+        return _carregar_parcelas(caminho, assinatura_arquivo(caminho))
     except Exception as e:
-        st.error(f"Erro ao carregar data_investimentos.xlsx: {e}")
+        erro(f"Erro ao carregar {os.path.basename(caminho)}: {e}")
         return pd.DataFrame(columns=["Empresa", "Setor", "Data Investimento", "Valor Investido"])
@@ -0,0 +1,136 @@
+import os
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from openpyxl import load_workbook
+from modules.planilhas import assinatura_arquivo, ler_planilha
+from modules.interface import cache_data
+from modules.instrumentacao import medido
+
+# Diretórios para localizar arquivos
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
+ARQUIVO_APURACAO = os.path.join(DIRETORIO_DADOS, 'FIP PRIMATEC_APURAÇÃO HURDLE RATE_21.01.25.xlsx')
+
+ABA_APURACAO = '3. APURAÇÃO HURDLE RATE'
+COTISTAS = ['FINEP', 'ANTERA', 'BDMG', 'BNDES', 'BANDES', 'FAPEMIG']
+
+# Posições (0 = coluna A) das colunas da aba de apuração
+COL_DATA = 2
+COL_APORTES = slice(3, 9)
+COL_AMORTIZACOES = slice(9, 15)
+COL_VALOR_PARCIAL = 21
+COL_INDICE_BASE = 25
+COL_QUANT_IPCA = 32
+COL_DIAS = 35
+COL_JUROS = 36
+
+# Versão da conversão de _ler_apuracao_excel: incrementar ao alterá-la, para que a
+# apuração compilada no cache colunar (ver ler_planilha) seja refeita
+VERSAO_APURACAO_EXCEL = 1
+
+def _ler_apuracao_excel(caminho):
+    """
+    Lê a aba de apuração com openpyxl e devolve as linhas de aportes/amortizações
+    em formato colunar, com os metadados da apuração em 'attrs'. É lenta
+    (a planilha tem um styles.xml muito grande), por isso o resultado é
+    compilado em disco por ler_planilha.
+    """
+    wb = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        linhas = [list(linha) for linha in wb[ABA_APURACAO].iter_rows(values_only=True)]
+    finally:
+        wb.close()
+
+    # Data de referência e número-índice do IPCA ficam abaixo do rótulo "DATA ATUAL"
+    data_referencia, indice_referencia, taxa = None, None, None
+    for i, linha in enumerate(linhas):
+        if 'DATA ATUAL' in linha:
+            coluna = linha.index('DATA ATUAL')
+            for abaixo in linhas[i + 1:]:
+                if isinstance(abaixo[coluna], datetime):
+                    data_referencia, indice_referencia = abaixo[coluna], abaixo[coluna + 1]
+                    break
+        if taxa is None and any(isinstance(v, str) and 'CUSTO DE OPORTUNIDADE' in v for v in linha):
+            taxa = next((v for v in linha[COL_JUROS:] if isinstance(v, float)), None)
+        if data_referencia is not None and taxa is not None:
+            break
+    if data_referencia is None:
+        raise ValueError(f"Data de referência ('DATA ATUAL') não encontrada na aba {ABA_APURACAO}.")
+
+    # Linhas de movimentação: coluna de data preenchida com datetime, até o rodapé "QUANT."
+    registros = [
+        linha for linha in linhas
+        if isinstance(linha[COL_DATA], datetime) and linha[COL_DIAS] is not None
+    ]
+    tabela = pd.DataFrame(registros).apply(pd.to_numeric, errors='coerce')
+    
+    apuracao = pd.DataFrame({
+        'Data': pd.to_datetime([linha[COL_DATA] for linha in registros]),
+        'Aportes': tabela.iloc[:, COL_APORTES].sum(axis=1).to_numpy(),
+        'Amortizações': tabela.iloc[:, COL_AMORTIZACOES].sum(axis=1).to_numpy(),
+        'Valor Parcial': tabela[COL_VALOR_PARCIAL].to_numpy(),
+        'Índice IPCA Base': tabela[COL_INDICE_BASE].to_numpy(),
+        'Quantidade IPCA': tabela[COL_QUANT_IPCA].to_numpy(),
+        'Dias': tabela[COL_DIAS].to_numpy(),
+        'Juros Oficial': tabela[COL_JUROS].to_numpy()
+    })
+    apuracao.attrs = {
+        'data_referencia': pd.Timestamp(data_referencia).isoformat(),
+        'indice_referencia': float(indice_referencia),
+        'taxa': float(taxa) if taxa is not None else 0.06
+    }
+    return apuracao
+
+@cache_data
+def _ler_apuracao(caminho, assinatura):
+    """
+    Devolve a apuração compilada (cache colunar em data/.cache, ver ler_planilha),
+    lendo o Excel apenas quando a planilha ou VERSAO_APURACAO_EXCEL mudam.
+    'assinatura' entra na chave do cache.
+    """
+    apuracao = ler_planilha(caminho, conversor=_ler_apuracao_excel, versao_conversor=VERSAO_APURACAO_EXCEL)
+    return apuracao, dict(apuracao.attrs)
+
+@medido()
+def carregar_apuracao(caminho=ARQUIVO_APURACAO):
+    """
+    Carrega a apuração oficial do hurdle (FIP PRIMATEC) em formato colunar.
+    Retorna (apuracao, metadados), onde metadados traz data_referencia,
+    indice_referencia (número-índice do IPCA na data) e taxa (custo de oportunidade).
+    """
+    apuracao, metadados = _ler_apuracao(caminho, assinatura_arquivo(caminho))
+    return apuracao, dict(metadados, data_referencia=pd.Timestamp(metadados['data_referencia']))
+
+@medido()
+def conciliar_apuracao(apuracao, metadados, corrigir_ipca_lote):
+    """
+    Recalcula todas as linhas da apuração com o motor de IPCA do dashboard,
+    em uma única passada vetorizada, e devolve os valores oficiais, os calculados
+    e as diferenças por linha.
+    """
+    data_referencia = metadados['data_referencia']
+    valores = apuracao['Valor Parcial'].to_numpy(dtype=float)
+
+    ipca_oficial = apuracao['Quantidade IPCA'].to_numpy(dtype=float) * metadados['indice_referencia']
+    hurdle_oficial = ipca_oficial + apuracao['Juros Oficial'].to_numpy(dtype=float)
+
+    taxa_pct = metadados['taxa'] * 100
+    ipca_calculado = corrigir_ipca_lote(valores, apuracao['Data'], data_final=data_referencia)
+    hurdle_calculado = corrigir_ipca_lote(valores, apuracao['Data'], adicional=taxa_pct, data_final=data_referencia)
+
+    conciliacao = pd.DataFrame({
+        'Data': apuracao['Data'],
+        'Valor Parcial': valores,
+        'IPCA Oficial': ipca_oficial,
+        'IPCA Calculado': ipca_calculado,
+        'Delta IPCA': ipca_calculado - ipca_oficial,
+        'Hurdle Oficial': hurdle_oficial,
+        'Hurdle Calculado': hurdle_calculado,
+        'Delta Hurdle': hurdle_calculado - hurdle_oficial
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        conciliacao['Delta Hurdle (%)'] = np.where(
+            hurdle_oficial != 0, conciliacao['Delta Hurdle'] / hurdle_oficial * 100, np.nan
+        )
+    return conciliacao
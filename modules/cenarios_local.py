@@ -0,0 +1,242 @@
+import os
+import json
+import sqlite3
+from datetime import datetime
+
+# Diretórios para localizar arquivos
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
+ARQUIVO_CENARIOS_DB = os.path.join(DIRETORIO_DADOS, 'cenarios.sqlite')
+ARQUIVO_CENARIOS_JSON = os.path.join(DIRETORIO_DADOS, 'cenarios.json')
+
+# Cenário de referência: os demais guardam só as empresas que diferem dele
+CENARIO_BASE = 'Base'
+
+def _conectar(caminho):
+    """
+    Abre o arquivo SQLite de cenários (modo WAL), criando as tabelas se necessário.
+    """
+    diretorio = os.path.dirname(caminho)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio)
+    # isolation_level=None: as transações são abertas explicitamente com BEGIN IMMEDIATE
+    conexao = sqlite3.connect(caminho, timeout=10, isolation_level=None)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.execute("PRAGMA foreign_keys=ON")
+    conexao.executescript("""
+        CREATE TABLE IF NOT EXISTS cenarios (
+            id INTEGER PRIMARY KEY,
+            nome TEXT NOT NULL UNIQUE,
+            criado_em TEXT NOT NULL,
+            atualizado_em TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cenarios_atualizado_em ON cenarios (atualizado_em);
+        CREATE TABLE IF NOT EXISTS valores (
+            cenario_id INTEGER NOT NULL REFERENCES cenarios (id) ON DELETE CASCADE,
+            empresa TEXT NOT NULL,
+            multiplo REAL NOT NULL,
+            writeoff INTEGER NOT NULL,
+            PRIMARY KEY (cenario_id, empresa)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS controle (chave TEXT PRIMARY KEY, valor TEXT);
+    """)
+    return conexao
+
+def _abrir(caminho, caminho_json):
+    """
+    Conecta ao repositório, importando o cenarios.json legado na primeira abertura.
+    """
+    conexao = _conectar(caminho)
+    migrado = conexao.execute("SELECT valor FROM controle WHERE chave = 'migrado_json'").fetchone()
+    if migrado is None:
+        _migrar_json(conexao, caminho_json)
+    return conexao
+
+def _migrar_json(conexao, caminho_json):
+    """
+    Importa os cenários de cenarios.json (Base primeiro, para os demais virarem deltas).
+    """
+    cenarios = {}
+    if caminho_json and os.path.exists(caminho_json):
+        with open(caminho_json, 'r') as f:
+            cenarios = json.load(f)
+    conexao.execute("BEGIN IMMEDIATE")
+    try:
+        # Outra sessão pode ter migrado enquanto esta esperava a trava
+        if conexao.execute("SELECT 1 FROM controle WHERE chave = 'migrado_json'").fetchone() is None:
+            nomes = sorted(cenarios, key=lambda nome: nome != CENARIO_BASE)
+            for nome in nomes:
+                _gravar(conexao, nome, cenarios[nome])
+            conexao.execute(
+                "INSERT INTO controle (chave, valor) VALUES ('migrado_json', ?)",
+                (datetime.now().isoformat(timespec='seconds'),)
+            )
+        conexao.execute("COMMIT")
+    except Exception:
+        conexao.execute("ROLLBACK")
+        raise
+
+def _id_cenario(conexao, nome):
+    linha = conexao.execute("SELECT id FROM cenarios WHERE nome = ?", (nome,)).fetchone()
+    return linha[0] if linha else None
+
+def _gravar(conexao, nome, dados_empresas):
+    """
+    Grava um cenário dentro da transação aberta. Cenários comuns guardam só as
+    empresas que diferem da Base; ao gravar a Base, os deltas dos demais são
+    recalculados para continuarem representando os mesmos valores.
+    """
+    agora = datetime.now().isoformat(timespec='seconds')
+    conexao.execute(
+        "INSERT INTO cenarios (nome, criado_em, atualizado_em) VALUES (?, ?, ?) "
+        "ON CONFLICT (nome) DO UPDATE SET atualizado_em = excluded.atualizado_em",
+        (nome, agora, agora)
+    )
+    cenario_id = _id_cenario(conexao, nome)
+    base_id = _id_cenario(conexao, CENARIO_BASE)
+    linhas = [
+        (cenario_id, empresa, float(dados.get("Múltiplo", 0.0)), int(bool(dados.get("Write-off", False))))
+        for empresa, dados in dados_empresas.items()
+    ]
+
+    if cenario_id == base_id:
+        # Materializa os demais cenários com a Base antiga antes de trocá-la...
+        conexao.execute("""
+            INSERT OR IGNORE INTO valores (cenario_id, empresa, multiplo, writeoff)
+            SELECT c.id, b.empresa, b.multiplo, b.writeoff
+            FROM cenarios c, valores b
+            WHERE b.cenario_id = ? AND c.id != ?
+        """, (base_id, base_id))
+        conexao.execute("DELETE FROM valores WHERE cenario_id = ?", (base_id,))
+        conexao.executemany("INSERT INTO valores VALUES (?, ?, ?, ?)", linhas)
+        # ...e remove deles o que passou a coincidir com a Base nova
+        conexao.execute("""
+            DELETE FROM valores
+            WHERE cenario_id != :base AND EXISTS (
+                SELECT 1 FROM valores b
+                WHERE b.cenario_id = :base AND b.empresa = valores.empresa
+                  AND b.multiplo = valores.multiplo AND b.writeoff = valores.writeoff
+            )
+        """, {'base': base_id})
+        return
+
+    conexao.execute("DELETE FROM valores WHERE cenario_id = ?", (cenario_id,))
+    conexao.executemany("INSERT INTO valores VALUES (?, ?, ?, ?)", linhas)
+    if base_id is not None:
+        conexao.execute("""
+            DELETE FROM valores
+            WHERE cenario_id = :cenario AND EXISTS (
+                SELECT 1 FROM valores b
+                WHERE b.cenario_id = :base AND b.empresa = valores.empresa
+                  AND b.multiplo = valores.multiplo AND b.writeoff = valores.writeoff
+            )
+        """, {'cenario': cenario_id, 'base': base_id})
+
+def salvar_cenario(nome, dados_empresas, caminho=ARQUIVO_CENARIOS_DB, caminho_json=ARQUIVO_CENARIOS_JSON):
+    """
+    Cria ou substitui um cenário ({empresa: {"Múltiplo": x, "Write-off": bool}})
+    em uma única transação, sem reescrever os demais.
+    """
+    conexao = _abrir(caminho, caminho_json)
+    try:
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            _gravar(conexao, nome, dados_empresas)
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+    finally:
+        conexao.close()
+
+def excluir_cenario(nome, caminho=ARQUIVO_CENARIOS_DB, caminho_json=ARQUIVO_CENARIOS_JSON):
+    """
+    Exclui um cenário. A Base só pode ser excluída quando for o único cenário,
+    pois os demais dependem dela. Retorna True se o cenário existia.
+    """
+    conexao = _abrir(caminho, caminho_json)
+    try:
+        conexao.execute("BEGIN IMMEDIATE")
+        try:
+            total = conexao.execute("SELECT COUNT(*) FROM cenarios").fetchone()[0]
+            if nome == CENARIO_BASE and total > 1:
+                raise ValueError("O cenário Base é a referência dos demais e não pode ser excluído.")
+            excluidos = conexao.execute("DELETE FROM cenarios WHERE nome = ?", (nome,)).rowcount
+            conexao.execute("COMMIT")
+        except Exception:
+            conexao.execute("ROLLBACK")
+            raise
+    finally:
+        conexao.close()
+    return excluidos > 0
+
+def listar_cenarios(desde=None, ate=None, caminho=ARQUIVO_CENARIOS_DB, caminho_json=ARQUIVO_CENARIOS_JSON):
+    """
+    Lista os nomes dos cenários na ordem de criação. 'desde' e 'ate' (datetime ou
+    texto ISO) filtram pela data da última atualização.
+    """
+    condicoes, parametros = [], []
+    if desde is not None:
+        condicoes.append("atualizado_em >= ?")
+        parametros.append(desde.isoformat() if hasattr(desde, 'isoformat') else str(desde))
+    if ate is not None:
+        condicoes.append("atualizado_em <= ?")
+        parametros.append(ate.isoformat() if hasattr(ate, 'isoformat') else str(ate))
+    filtro = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+    conexao = _abrir(caminho, caminho_json)
+    try:
+        linhas = conexao.execute(f"SELECT nome FROM cenarios {filtro} ORDER BY criado_em, id", parametros).fetchall()
+    finally:
+        conexao.close()
+    return [linha[0] for linha in linhas]
+
+def _montar(linhas):
+    """
+    Converte linhas (cenário, empresa, múltiplo, write-off) no formato de cenarios.json.
+    """
+    cenarios = {}
+    for nome, empresa, multiplo, writeoff in linhas:
+        cenarios.setdefault(nome, {})[empresa] = {"Múltiplo": multiplo, "Write-off": bool(writeoff)}
+    return cenarios
+
+# Valores de cada cenário: o delta próprio mais as empresas da Base que ele não altera
+_CONSULTA_VALORES = """
+    SELECT c.nome, v.empresa, v.multiplo, v.writeoff
+    FROM cenarios c JOIN valores v ON v.cenario_id = c.id
+    WHERE {filtro}
+    UNION ALL
+    SELECT c.nome, b.empresa, b.multiplo, b.writeoff
+    FROM cenarios c
+    JOIN cenarios base ON base.nome = :base AND base.id != c.id
+    JOIN valores b ON b.cenario_id = base.id
+    WHERE {filtro} AND NOT EXISTS (
+        SELECT 1 FROM valores v WHERE v.cenario_id = c.id AND v.empresa = b.empresa
+    )
+"""
+
+def carregar_cenario(nome, caminho=ARQUIVO_CENARIOS_DB, caminho_json=ARQUIVO_CENARIOS_JSON):
+    """
+    Carrega um cenário completo (Base + delta). Retorna None se não existir.
+    """
+    conexao = _abrir(caminho, caminho_json)
+    try:
+        linhas = conexao.execute(
+            _CONSULTA_VALORES.format(filtro="c.nome = :nome"), {'nome': nome, 'base': CENARIO_BASE}
+        ).fetchall()
+        existe = _id_cenario(conexao, nome) is not None
+    finally:
+        conexao.close()
+    return _montar(linhas).get(nome, {}) if existe else None
+
+def carregar_todos(caminho=ARQUIVO_CENARIOS_DB, caminho_json=ARQUIVO_CENARIOS_JSON):
+    """
+    Carrega todos os cenários completos, na ordem de criação, no formato de cenarios.json.
+    """
+    conexao = _abrir(caminho, caminho_json)
+    try:
+        nomes = [linha[0] for linha in conexao.execute("SELECT nome FROM cenarios ORDER BY criado_em, id")]
+        linhas = conexao.execute(_CONSULTA_VALORES.format(filtro="1 = 1"), {'base': CENARIO_BASE}).fetchall()
+    finally:
+        conexao.close()
+    cenarios = _montar(linhas)
+    return {nome: cenarios.get(nome, {}) for nome in nomes}
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+def montar_matriz_cenarios(cenarios, empresas, multiplos_atuais, writeoffs_atuais):
+    """
+    Monta as matrizes cenários × empresas de múltiplos e write-offs a partir de
+    {nome: {empresa: {"Múltiplo", "Write-off"}}} (formato de carregar_cenarios).
+    Empresas que o cenário não menciona ficam com o valor atual da carteira;
+    empresas do cenário que não estão na carteira são ignoradas.
+    Retorna (nomes, multiplos, writeoffs).
+    """
+    nomes = list(cenarios)
+    indice = pd.Index(empresas)
+    multiplos = np.tile(np.asarray(multiplos_atuais, dtype=float), (len(nomes), 1))
+    writeoffs = np.tile(np.asarray(writeoffs_atuais, dtype=bool), (len(nomes), 1))
+
+    # Achata todos os cenários em listas e grava na matriz com indexação avançada
+    linhas, empresas_cenario, valores_multiplo, valores_writeoff = [], [], [], []
+    for i, nome in enumerate(nomes):
+        for empresa, dados in cenarios[nome].items():
+            linhas.append(i)
+            empresas_cenario.append(empresa)
+            valores_multiplo.append(dados.get("Múltiplo", 0.0))
+            valores_writeoff.append(dados.get("Write-off", False))
+    colunas = indice.get_indexer(empresas_cenario) if empresas_cenario else np.array([], dtype=int)
+    encontradas = colunas >= 0
+    linhas = np.asarray(linhas, dtype=int)[encontradas]
+    colunas = colunas[encontradas]
+    multiplos[linhas, colunas] = np.asarray(valores_multiplo, dtype=float)[encontradas]
+    writeoffs[linhas, colunas] = np.asarray(valores_writeoff, dtype=bool)[encontradas]
+
+    # Mesma regra do dashboard: múltiplo 0 equivale a write-off
+    return nomes, multiplos, writeoffs | (multiplos == 0)
+
+def avaliar_cenarios(nomes, multiplos, writeoffs, valores_investidos, total_corrigido, hurdle_nominal, taxa):
+    """
+    Avalia todos os cenários de uma vez (produtos matriz × vetor).
+    'valores_investidos' está alinhado às colunas das matrizes; 'total_corrigido'
+    é o total investido corrigido por IPCA + 'taxa'%. Valores em R$ mil.
+    Retorna DataFrame indexado pelo nome do cenário com Sale, perda com write-offs,
+    distância ao hurdle nominal e cobertura do IPCA + taxa.
+    """
+    valores = np.nan_to_num(np.asarray(valores_investidos, dtype=float))
+    vendas = np.where(writeoffs, 0.0, multiplos) @ valores
+    perdas = writeoffs.astype(float) @ valores
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cobertura = np.where(total_corrigido > 0, vendas / total_corrigido * 100, np.nan)
+    comparacao = pd.DataFrame({
+        'Sale': vendas,
+        'Perda Write-off': perdas,
+        'Write-offs': writeoffs.sum(axis=1),
+        'Distância ao Hurdle': hurdle_nominal - vendas,
+        f'Cobertura IPCA+{taxa}% (%)': cobertura
+    }, index=pd.Index(nomes, name='Cenário'))
+    return comparacao
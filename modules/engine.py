@@ -0,0 +1,318 @@
+"""
+Motor de cálculo da carteira, sem interface: recebe DataFrames e devolve DataFrames,
+sem ler nem gravar st.session_state. É usado pelo dashboard (app.py) e pelo modo
+em lote (python -m antera).
+"""
+import numpy as np
+import pandas as pd
+from data_utils import (
+    carregar_dados, carregar_parcelas_investimento, corrigir_ipca_lote, versao_ipca,
+    calcular_grade_correcao, coluna_da_grade, TAXAS_HURDLE
+)
+from modules.portfolio import preparar_dados_iniciais, gerar_analise_crescimento
+from modules.parcelas import grade_parcelas_por_empresa
+from modules.estado import EstadoCarteira, CarteiraBase
+from modules.comparacao import montar_matriz_cenarios, avaliar_cenarios
+from modules.sensibilidade import calcular_sensibilidade
+from modules.meta import resolver_meta
+from modules.retornos import calcular_retornos
+from modules.instrumentacao import medido
+from modules.interface import cache_resource
+from modules.fundos import carregar_registro, carregar_fundos
+
+# Colunas da tabela editável da carteira, na ordem exibida no dashboard
+COLUNAS_CARTEIRA = [
+    "Múltiplo", "Empresa", "Valor Investido", "Fair Value",
+    "Participação do Fundo (%)", "Data do Primeiro Investimento", "Write-off"
+]
+
+def montar_carteira(df_empresas):
+    """
+    Monta a tabela da carteira (múltiplo e write-off por empresa) a partir de
+    preparar_dados_iniciais, com write-off marcado nas empresas de múltiplo 0.
+    """
+    colunas = [c for c in COLUNAS_CARTEIRA if c in df_empresas.columns]
+    return EstadoCarteira(df_empresas[colunas]).df
+
+@cache_resource
+def carteira_compartilhada(assinaturas):
+    """
+    Carteira inicial das planilhas de data/ como CarteiraBase, uma por processo:
+    as sessões do dashboard guardam só as próprias alterações sobre ela.
+    'assinaturas' (ver assinaturas_dados) só compõe a chave do cache, para que uma
+    planilha alterada gere uma nova base. Retorna None se as planilhas não puderem ser lidas.
+    """
+    fair_value, investimentos = carregar_dados()
+    if fair_value is None or investimentos is None:
+        return None
+    df_empresas = preparar_dados_iniciais(fair_value, investimentos)
+    colunas = [c for c in COLUNAS_CARTEIRA if c in df_empresas.columns]
+    return CarteiraBase(df_empresas[colunas])
+
+def aplicar_cenario(carteira, dados_empresas):
+    """
+    Retorna uma cópia da carteira com os múltiplos do cenário
+    ({empresa: {"Múltiplo", "Write-off"}}). Empresas citadas no cenário ficam em
+    write-off se o múltiplo for 0; as demais mantêm os valores atuais.
+    """
+    carteira = carteira.copy()
+    multiplos = carteira['Empresa'].map(
+        {empresa: float(dados.get("Múltiplo", 0.0)) for empresa, dados in dados_empresas.items()}
+    )
+    no_cenario = multiplos.notna().to_numpy()
+    carteira['Múltiplo'] = np.where(no_cenario, multiplos, carteira['Múltiplo']).astype(float)
+    carteira['Write-off'] = np.where(no_cenario, carteira['Múltiplo'] == 0, carteira['Write-off']).astype(bool)
+    return carteira
+
+def investimentos_da_carteira(investimentos, carteira):
+    """
+    Linhas de investimentos.xlsx das empresas da carteira, com a coluna de valor
+    renomeada para "Valor Investido".
+    """
+    ativos = investimentos[investimentos['Empresa'].isin(carteira['Empresa'].tolist())].copy()
+    ativos.rename(columns={'Valor Investido até a presente data (R$ mil)': 'Valor Investido'}, inplace=True)
+    return ativos
+
+def corrigir_grade_por_parcelas(grade, empresas, parcelas):
+    """
+    Substitui, na grade de correção (empresas × TAXAS_HURDLE), as linhas das empresas
+    com aportes no ledger de 'parcelas' pela soma dos aportes corrigidos um a um
+    (ver grade_parcelas_por_empresa). As demais empresas mantêm a correção do
+    Valor Investido inteiro desde a Data do Primeiro Investimento.
+    """
+    if parcelas is None or parcelas.empty:
+        return grade
+    grade_parcelas, com_parcelas = grade_parcelas_por_empresa(parcelas, empresas, calcular_grade_correcao)
+    if grade_parcelas is None:
+        return grade
+    return np.where(com_parcelas[:, None], grade_parcelas, grade)
+
+def grade_correcao_da_carteira(investimentos_ativos, parcelas=None):
+    """
+    Grade empresas × TAXAS_HURDLE dos valores corrigidos das linhas de
+    'investimentos_ativos': parcela a parcela para as empresas com aportes no ledger
+    e, sem ele, pelo Valor Investido desde a Data do Primeiro Investimento.
+    """
+    grade = calcular_grade_correcao(
+        investimentos_ativos['Valor Investido'],
+        investimentos_ativos['Data do Primeiro Investimento']
+    )
+    return corrigir_grade_por_parcelas(grade, investimentos_ativos['Empresa'], parcelas)
+
+@medido()
+def calcular_resultados(carteira, investimentos, taxa, parcelas=None):
+    """
+    Calcula as tabelas e totais do dashboard para a carteira e a taxa (IPCA + taxa%).
+    Com o ledger de 'parcelas', os valores corrigidos das empresas que têm aportes nele
+    são a soma das parcelas corrigidas a partir de suas datas (ver grade_correcao_da_carteira).
+    O IPCA+6% da análise de crescimento sai da mesma correção.
+    Retorna dict com:
+      - 'analise_crescimento': análise das empresas com múltiplo > 0;
+      - 'investimentos_ativos': investimentos das empresas da carteira;
+      - 'grade_correcao': matriz empresas × TAXAS_HURDLE de valores corrigidos;
+      - 'correcao': valor investido e corrigido por IPCA, IPCA+6% e IPCA+taxa, por empresa;
+      - 'totais': totais em R$ mil (investido, corrigidos, Sale e write-offs).
+    """
+    ativas = carteira[carteira['Múltiplo'] > 0].copy()
+    ipca_6 = coluna_da_grade(grade_correcao_da_carteira(ativas, parcelas), 6.0)
+    analise_crescimento = gerar_analise_crescimento(ativas, corrigir_ipca_lote, versao_ipca(), ipca_6)
+
+    investimentos_ativos = investimentos_da_carteira(investimentos, carteira)
+    # Grade calculada uma vez por conjunto de dados (em cache); cada taxa é uma consulta de coluna
+    grade_correcao = grade_correcao_da_carteira(investimentos_ativos, parcelas)
+    correcao = pd.DataFrame({
+        'Empresa': investimentos_ativos['Empresa'].to_numpy(),
+        'Valor Investido': investimentos_ativos['Valor Investido'].to_numpy(dtype=float),
+        'Corrigido IPCA': coluna_da_grade(grade_correcao, 0.0),
+        'Corrigido IPCA+6%': coluna_da_grade(grade_correcao, 6.0),
+        'Corrigido IPCA+Hurdle': coluna_da_grade(grade_correcao, taxa)
+    })
+
+    # Sale exclui write-offs; write-offs somam o valor investido perdido em toda a
+    # carteira (as empresas de múltiplo 0 não estão na análise de crescimento)
+    writeoff = analise_crescimento['Write-off'].to_numpy(dtype=bool)
+    writeoff_carteira = carteira['Write-off'].fillna(False).to_numpy(dtype=bool)
+    totais = {
+        'investido': float(investimentos['Valor Investido até a presente data (R$ mil)'].sum()),
+        'investido_ativo': float(correcao['Valor Investido'].sum()),
+        'corrigido_ipca': float(correcao['Corrigido IPCA'].sum()),
+        'corrigido_ipca_6': float(correcao['Corrigido IPCA+6%'].sum()),
+        'corrigido_hurdle': float(correcao['Corrigido IPCA+Hurdle'].sum()),
+        'sale': float(analise_crescimento['Sale'].to_numpy()[~writeoff].sum()),
+        'writeoff': float(carteira['Valor Investido'].to_numpy(dtype=float)[writeoff_carteira].sum())
+    }
+    return {
+        'analise_crescimento': analise_crescimento,
+        'investimentos_ativos': investimentos_ativos,
+        'grade_correcao': grade_correcao,
+        'correcao': correcao,
+        'totais': totais
+    }
+
+@medido()
+def sensibilidade_da_carteira(resultados, hurdle_nominal, taxa):
+    """
+    Sensibilidade de (Sale − hurdle) aos múltiplos e à taxa (ver calcular_sensibilidade).
+    """
+    analise = resultados['analise_crescimento']
+    return calcular_sensibilidade(
+        analise['Empresa'],
+        analise['Valor Investido'],
+        analise['Múltiplo'],
+        analise['Write-off'],
+        hurdle_nominal,
+        resultados['grade_correcao'].sum(axis=0),
+        taxa,
+        TAXAS_HURDLE
+    )
+
+@medido()
+def comparar_cenarios(carteira, cenarios, resultados, hurdle_nominal, taxa):
+    """
+    Avalia a carteira atual ("(Atual)") e todos os 'cenarios' de uma vez (ver avaliar_cenarios).
+    """
+    nomes, multiplos, writeoffs = montar_matriz_cenarios(
+        {"(Atual)": {}, **cenarios},
+        carteira['Empresa'],
+        carteira['Múltiplo'],
+        carteira['Write-off']
+    )
+    return avaliar_cenarios(
+        nomes, multiplos, writeoffs,
+        carteira['Valor Investido'],
+        resultados['totais']['corrigido_hurdle'],
+        hurdle_nominal,
+        taxa
+    )
+
+def resumir_resultados(resultados, hurdle_nominal, taxa):
+    """
+    Tabela de indicadores da carteira (R$ mil), uma linha por indicador.
+    """
+    totais = resultados['totais']
+    indicadores = {
+        'Hurdle nominal': hurdle_nominal,
+        'Sale total': totais['sale'],
+        'Write-offs': totais['writeoff'],
+        'Distância ao hurdle': hurdle_nominal - totais['sale'],
+        'Total investido': totais['investido'],
+        'Corrigido IPCA': totais['corrigido_ipca'],
+        'Corrigido IPCA+6%': totais['corrigido_ipca_6'],
+        f'Corrigido IPCA+{taxa}%': totais['corrigido_hurdle']
+    }
+    return pd.DataFrame({'Indicador': list(indicadores), 'Valor (R$ mil)': list(indicadores.values())})
+
+def gerar_relatorio(fair_value, investimentos, hurdle_nominal, taxa, cenario=None,
+                    cenarios=None, multiplo_maximo=10.0, parcelas=None):
+    """
+    Calcula todas as tabelas do dashboard sem interface.
+    'cenario' ({empresa: {"Múltiplo", "Write-off"}}) é aplicado sobre os múltiplos
+    das planilhas; 'cenarios' ({nome: cenário}) entra na comparação de cenários.
+    Com o ledger de 'parcelas', os valores corrigidos das empresas com aportes nele
+    são calculados parcela a parcela e o relatório inclui a tabela de retornos
+    (TIR, TVPI, DPI e RVPI). Retorna dict {nome da tabela: DataFrame}.
+    """
+    carteira = montar_carteira(preparar_dados_iniciais(fair_value, investimentos))
+    if cenario is not None:
+        carteira = aplicar_cenario(carteira, cenario)
+    resultados = calcular_resultados(carteira, investimentos, taxa, parcelas)
+
+    analise = resultados['analise_crescimento']
+    ativas = analise[~analise['Write-off']]
+    meta, _ = resolver_meta(
+        ativas['Empresa'], ativas['Valor Investido'], ativas['Múltiplo'],
+        hurdle_nominal, multiplo_maximo
+    )
+    tabelas = {
+        'resumo': resumir_resultados(resultados, hurdle_nominal, taxa),
+        'carteira': carteira,
+        'crescimento': analise,
+        'correcao': resultados['correcao'],
+        'sensibilidade': sensibilidade_da_carteira(resultados, hurdle_nominal, taxa),
+        'cenarios': comparar_cenarios(carteira, cenarios or {}, resultados, hurdle_nominal, taxa).reset_index(),
+        'meta': meta[meta['Aumento'] > 0].reset_index(drop=True)
+    }
+    if parcelas is not None and not parcelas.empty:
+        tabelas['retornos'] = calcular_retornos(parcelas, carteira)
+    return tabelas
+
+def relatorio_dos_arquivos(hurdle_nominal, taxa, cenario=None, cenarios=None, multiplo_maximo=10.0):
+    """
+    Lê as planilhas de data/ (inclusive o ledger de parcelas) e gera o relatório (ver gerar_relatorio).
+    Retorna None se as planilhas não puderem ser lidas.
+    """
+    fair_value, investimentos = carregar_dados()
+    if fair_value is None or investimentos is None:
+        return None
+    return gerar_relatorio(
+        fair_value, investimentos, hurdle_nominal, taxa, cenario, cenarios, multiplo_maximo,
+        parcelas=carregar_parcelas_investimento()
+    )
+
+@medido()
+def consolidar_fundos(dados_fundos, taxa, hurdles=None, parcelas=None):
+    """
+    Totais por fundo e consolidados (R$ mil), no mesmo critério de calcular_resultados.
+    'dados_fundos' é {nome: (fair_value, investimentos)} (ver carregar_fundos) e
+    'hurdles' ({nome: hurdle nominal}) é opcional. "Write-offs" soma o valor investido
+    das empresas em write-off (múltiplo 0). As carteiras são empilhadas e
+    corrigidas em uma única grade, com um só índice do IPCA para todos os fundos;
+    nos fundos com ledger em 'parcelas' ({nome: DataFrame}), as empresas com aportes
+    são corrigidas parcela a parcela. Os totais por fundo saem de somas agrupadas.
+    Retorna um DataFrame com uma linha por fundo e a linha "Consolidado".
+    """
+    nomes = list(dados_fundos)
+    carteiras = [montar_carteira(preparar_dados_iniciais(*dados)) for dados in dados_fundos.values()]
+    fundo = np.repeat(np.arange(len(nomes)), [len(c) for c in carteiras])
+    carteira = pd.concat(carteiras, ignore_index=True) if carteiras else pd.DataFrame(columns=COLUNAS_CARTEIRA)
+
+    valores = carteira['Valor Investido'].to_numpy(dtype=float)
+    multiplos = carteira['Múltiplo'].to_numpy(dtype=float)
+    ativas = multiplos > 0
+    writeoff = carteira['Write-off'].to_numpy(dtype=bool)
+    grade = calcular_grade_correcao(carteira['Valor Investido'], carteira['Data do Primeiro Investimento'])
+    for i, nome in enumerate(nomes):
+        if (parcelas or {}).get(nome) is not None:
+            linhas = fundo == i
+            grade[linhas] = corrigir_grade_por_parcelas(grade[linhas], carteira['Empresa'][linhas], parcelas[nome])
+
+    def por_fundo(pesos):
+        return np.bincount(fundo, weights=pesos, minlength=len(nomes))
+
+    tabela = pd.DataFrame({
+        'Fundo': nomes,
+        'Empresas': np.bincount(fundo, minlength=len(nomes)),
+        'Total investido': por_fundo(valores),
+        'Corrigido IPCA': por_fundo(coluna_da_grade(grade, 0.0)),
+        'Corrigido IPCA+6%': por_fundo(coluna_da_grade(grade, 6.0)),
+        f'Corrigido IPCA+{taxa}%': por_fundo(coluna_da_grade(grade, taxa)),
+        # Mesmo arredondamento da coluna Sale de gerar_analise_crescimento
+        'Sale': por_fundo(np.where(ativas & ~writeoff, np.round(valores * multiplos, 2), 0.0)),
+        'Write-offs': por_fundo(np.where(writeoff, valores, 0.0)),
+        'Hurdle nominal': [np.nan if (hurdles or {}).get(nome) is None else float(hurdles[nome]) for nome in nomes]
+    })
+    consolidado = tabela.drop(columns='Fundo').sum(min_count=1)
+    # Sem o hurdle de algum fundo, o consolidado também fica sem hurdle
+    if tabela['Hurdle nominal'].isna().any():
+        consolidado['Hurdle nominal'] = np.nan
+    tabela.loc[len(tabela)] = {'Fundo': 'Consolidado', **consolidado.to_dict()}
+    tabela['Empresas'] = tabela['Empresas'].astype(int)
+    tabela['Distância ao hurdle'] = tabela['Hurdle nominal'] - tabela['Sale']
+    return tabela
+
+def consolidado_dos_arquivos(taxa, registro=None):
+    """
+    Carrega os fundos do registro (padrão: data/fundos.json) e consolida os totais
+    (ver consolidar_fundos). Retorna None se nenhum fundo puder ser lido.
+    """
+    if registro is None:
+        registro = carregar_registro()
+    dados_fundos = carregar_fundos(registro)
+    if not dados_fundos:
+        return None
+    hurdles = {nome: dados.get('hurdle_nominal') for nome, dados in registro.items()}
+    parcelas = {
+        nome: carregar_parcelas_investimento(registro[nome]['parcelas'])
+        for nome in dados_fundos if registro[nome].get('parcelas')
+    }
+    return consolidar_fundos(dados_fundos, taxa, hurdles, parcelas)
@@ -0,0 +1,218 @@
+import pandas as pd
+
+class CarteiraBase:
+    """
+    Carteira inicial das planilhas, imutável: no dashboard há uma por processo
+    (st.cache_resource), compartilhada por todas as sessões. "Empresa" é categórica,
+    o write-off já segue o múltiplo e os arrays não aceitam escrita.
+    """
+
+    def __init__(self, df):
+        df = df.reset_index(drop=True).copy()
+        self.empresas_sem_fair_value = list(df.attrs.get('empresas_sem_fair_value', []))
+        # attrs seriam copiados a cada leitura de célula
+        df.attrs = {}
+        df['Múltiplo'] = df['Múltiplo'].astype(float)
+        df['Write-off'] = df['Múltiplo'].to_numpy() == 0
+        df['Empresa'] = df['Empresa'].astype('category')
+        # Inteiros no menor tipo que os comporta; floats ficam em 64 bits para os
+        # totais não mudarem
+        for coluna in df.select_dtypes('integer').columns:
+            df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+        self.df = df
+        self.multiplos = df['Múltiplo'].to_numpy()
+        self.multiplos.flags.writeable = False
+        self.nomes = df['Empresa'].astype(object).to_numpy()
+        self.posicoes = {empresa: i for i, empresa in enumerate(self.nomes)}
+        self.colunas = {coluna: j for j, coluna in enumerate(df.columns)}
+
+    def __len__(self):
+        return len(self.df)
+
+class EstadoCarteira:
+    """
+    Estado editável da carteira (múltiplo e write-off por empresa) de uma sessão,
+    em cópia sob escrita: a sessão guarda só as alterações (posição → valor) sobre
+    a CarteiraBase compartilhada, e 'df' é montado quando pedido.
+    Cada alteração localiza a linha em um dicionário e grava só aquela linha.
+    Mantém a regra do dashboard: múltiplo 0 equivale a write-off.
+    """
+
+    def __init__(self, base):
+        if not isinstance(base, CarteiraBase):
+            base = CarteiraBase(base)
+        self.base = base
+        # Alterações da sessão: múltiplos por posição e demais células por (posição, coluna)
+        self._multiplos = {}
+        self._celulas = {}
+        # Nomes alterados na tabela: posição → nome novo e nome novo → posição
+        self._nomes = {}
+        self._renomeadas = {}
+        # DataFrame montado (a própria base enquanto não houver alterações)
+        self._df = None
+        # Alterações vindas de controles fora da tabela (slider, campo numérico,
+        # cenários). Muda a cada alteração desse tipo, para o editor da tabela
+        # descartar edições antigas que sobrescreveriam o valor novo.
+        self.versao = 0
+        # Empresas cujo múltiplo/write-off mudou, em ordem (ver alteradas_desde);
+        # revisao_base muda quando qualquer outra coluna é alterada
+        self._historico = []
+        self.revisao_base = 0
+
+    @property
+    def df(self):
+        """
+        Carteira com as alterações da sessão. Sem alterações é a própria base
+        (somente leitura); com alterações, uma cópia rasa da base em que só as
+        colunas alteradas ocupam memória nova.
+        """
+        if self._df is None:
+            if not self._multiplos and not self._celulas:
+                self._df = self.base.df
+            else:
+                df = self.base.df.copy(deep=False)
+                multiplos = self.base.multiplos.copy()
+                if self._multiplos:
+                    multiplos[list(self._multiplos)] = list(self._multiplos.values())
+                df['Múltiplo'] = multiplos
+                df['Write-off'] = multiplos == 0
+                # Demais células, coluna a coluna; o tipo da coluna se amplia se preciso
+                # (ex.: valor decimal em coluna inteira, nome fora das categorias)
+                por_coluna = {}
+                for (posicao, coluna), valor in self._celulas.items():
+                    por_coluna.setdefault(coluna, {})[posicao] = valor
+                for coluna, valores in por_coluna.items():
+                    novos = pd.Series(valores, dtype=object).reindex(df.index)
+                    serie = df[coluna].astype(object) if coluna == 'Empresa' else df[coluna]
+                    df[coluna] = serie.mask(df.index.isin(list(valores)), novos).infer_objects()
+                self._df = df
+        return self._df
+
+    def _posicao(self, empresa):
+        posicao = self._renomeadas.get(empresa)
+        if posicao is None:
+            posicao = self.base.posicoes[empresa]
+            if posicao in self._nomes:
+                raise KeyError(empresa)
+        return posicao
+
+    def __contains__(self, empresa):
+        try:
+            self._posicao(empresa)
+        except KeyError:
+            return False
+        return True
+
+    @property
+    def empresas(self):
+        if not self._nomes:
+            return self.base.nomes.tolist()
+        return [self._nomes.get(i, nome) for i, nome in enumerate(self.base.nomes)]
+
+    @property
+    def alteracoes(self):
+        """Número de alterações de múltiplo/write-off desde a criação do estado."""
+        return len(self._historico)
+
+    def alteradas_desde(self, alteracoes):
+        """
+        Empresas com múltiplo/write-off alterado depois das primeiras 'alteracoes'
+        alterações (sem repetição, na ordem da última alteração de cada uma).
+        """
+        return list(dict.fromkeys(reversed(self._historico[alteracoes:])))[::-1]
+
+    def _multiplo_na_posicao(self, posicao):
+        return self._multiplos.get(posicao, float(self.base.multiplos[posicao]))
+
+    def multiplo(self, empresa):
+        return self._multiplo_na_posicao(self._posicao(empresa))
+
+    def writeoff(self, empresa):
+        return self.multiplo(empresa) == 0
+
+    def _valor(self, posicao, coluna):
+        if coluna == 'Empresa':
+            return self._nomes.get(posicao, self.base.nomes[posicao])
+        chave = (posicao, coluna)
+        if chave in self._celulas:
+            return self._celulas[chave]
+        return self.base.df.iat[posicao, self.base.colunas[coluna]]
+
+    def _gravar(self, posicao, coluna, valor):
+        # Múltiplo e write-off de um DataFrame já montado e próprio da sessão são
+        # atualizados na célula; a base compartilhada nunca é alterada e, nos demais
+        # casos, o próximo 'df' monta a cópia de novo
+        if self._df is not None and self._df is not self.base.df and coluna in ('Múltiplo', 'Write-off'):
+            self._df.iat[posicao, self.base.colunas[coluna]] = valor
+        else:
+            self._df = None
+
+    def definir_multiplo(self, empresa, valor, externo=True):
+        """
+        Define o múltiplo da empresa; múltiplo 0 marca write-off e maior que 0 desmarca.
+        Retorna True se algo mudou.
+        """
+        valor = float(valor)
+        posicao = self._posicao(empresa)
+        if self._multiplo_na_posicao(posicao) == valor:
+            return False
+        if valor == self.base.multiplos[posicao]:
+            self._multiplos.pop(posicao, None)
+        else:
+            self._multiplos[posicao] = valor
+        self._gravar(posicao, 'Múltiplo', valor)
+        self._gravar(posicao, 'Write-off', valor == 0)
+        self._historico.append(empresa)
+        if externo:
+            self.versao += 1
+        return True
+
+    def definir_writeoff(self, empresa, writeoff, externo=True):
+        """
+        Marca (múltiplo 0) ou desmarca (múltiplo 1) o write-off da empresa.
+        Retorna True se algo mudou.
+        """
+        if self.writeoff(empresa) == bool(writeoff):
+            return False
+        return self.definir_multiplo(empresa, 0.0 if writeoff else 1.0, externo)
+
+    def aplicar_edicoes(self, edicoes):
+        """
+        Aplica o delta do st.data_editor ({posição da linha: {coluna: valor}}),
+        gravando apenas as células cujo valor difere do estado atual.
+        Retorna as empresas alteradas.
+        """
+        alteradas = []
+        for posicao, colunas in edicoes.items():
+            posicao = int(posicao)
+            if posicao >= len(self.base):
+                continue
+            empresa = self._valor(posicao, 'Empresa')
+            # Múltiplo tem precedência: se ambos foram editados, o write-off segue o múltiplo
+            if 'Múltiplo' in colunas and colunas['Múltiplo'] is not None:
+                mudou = self.definir_multiplo(empresa, colunas['Múltiplo'], externo=False)
+            elif 'Write-off' in colunas:
+                mudou = self.definir_writeoff(empresa, colunas['Write-off'], externo=False)
+            else:
+                mudou = False
+            for coluna, valor in colunas.items():
+                if coluna in ('Múltiplo', 'Write-off') or coluna not in self.base.colunas:
+                    continue
+                if self._valor(posicao, coluna) != valor:
+                    if coluna == 'Empresa':
+                        self._renomeadas.pop(self._nomes.get(posicao), None)
+                        self._nomes[posicao] = valor
+                        self._renomeadas[valor] = posicao
+                    self._celulas[(posicao, coluna)] = valor
+                    self._gravar(posicao, coluna, valor)
+                    self.revisao_base += 1
+                    mudou = True
+            if mudou:
+                alteradas.append(self._valor(posicao, 'Empresa'))
+        return alteradas
+
+    def sincronizar_writeoff(self):
+        """
+        Mantida por compatibilidade: a base já nasce com write-off = (múltiplo 0)
+        e definir_multiplo mantém a regra linha a linha.
+        """
@@ -0,0 +1,93 @@
+"""
+Registro dos fundos (data/fundos.json) e carga das planilhas de todos eles.
+
+O registro segue o formato de cenarios.json, um objeto por nome:
+    {"FIP PRIMATEC": {"fair_value": "fair_value.xlsx",
+                      "investimentos": "investimentos.xlsx",
+                      "parcelas": "data_investimentos.xlsx",
+                      "hurdle_nominal": 117000}}
+Caminhos relativos são resolvidos a partir de data/; "parcelas" (ledger de aportes,
+usado na correção parcela a parcela) e "hurdle_nominal" (R$ mil) são opcionais.
+"""
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from data_utils import ler_dados_fundo, DIRETORIO_DADOS
+from modules.planilhas import assinatura_arquivo
+from modules.interface import cache_data, erro
+from modules.instrumentacao import medido
+
+ARQUIVO_FUNDOS = os.path.join(DIRETORIO_DADOS, 'fundos.json')
+# Registro usado quando data/fundos.json não existe: as planilhas de data/
+REGISTRO_PADRAO = {
+    'FIP PRIMATEC': {
+        'fair_value': 'fair_value.xlsx',
+        'investimentos': 'investimentos.xlsx',
+        'parcelas': 'data_investimentos.xlsx'
+    }
+}
+# Leituras simultâneas (o Parquet do cache colunar é lido fora do GIL)
+MAX_THREADS = 8
+
+def _resolver(caminho):
+    return caminho if os.path.isabs(caminho) else os.path.join(DIRETORIO_DADOS, caminho)
+
+def carregar_registro(caminho=ARQUIVO_FUNDOS):
+    """
+    Lê o registro de fundos: {nome: {"fair_value", "investimentos", "parcelas", "hurdle_nominal"}},
+    com os caminhos já resolvidos ("parcelas" é None quando o fundo não tem ledger). Sem o arquivo, ou se ele for inválido, usa REGISTRO_PADRAO.
+    """
+    registro = REGISTRO_PADRAO
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                registro = json.load(f)
+            if not isinstance(registro, dict) or not registro:
+                raise ValueError("o registro deve ser um objeto com ao menos um fundo")
+        except (OSError, ValueError) as e:
+            erro(f"Erro ao ler o registro de fundos ({e}). Usando apenas {', '.join(REGISTRO_PADRAO)}.")
+            registro = REGISTRO_PADRAO
+    return {
+        nome: {
+            'fair_value': _resolver(dados['fair_value']),
+            'investimentos': _resolver(dados['investimentos']),
+            'parcelas': _resolver(dados['parcelas']) if dados.get('parcelas') else None,
+            'hurdle_nominal': dados.get('hurdle_nominal')
+        }
+        for nome, dados in registro.items()
+    }
+
+def _ler_fundo(arquivos):
+    try:
+        return ler_dados_fundo(*arquivos), None
+    except Exception as e:
+        return None, str(e)
+
+@cache_data
+def _carregar_fundos(arquivos, assinaturas, max_threads):
+    """
+    Lê as planilhas de todos os fundos em paralelo. 'arquivos' é uma tupla de
+    (nome, fair_value, investimentos); as assinaturas dos arquivos fazem parte da
+    chave do cache, então só uma planilha alterada leva a uma nova leitura.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(max_threads, len(arquivos)))) as executor:
+        lidos = list(executor.map(_ler_fundo, [(fv, inv) for _, fv, inv in arquivos]))
+    dados = {nome: resultado for (nome, _, _), (resultado, falha) in zip(arquivos, lidos) if falha is None}
+    falhas = {nome: falha for (nome, _, _), (_, falha) in zip(arquivos, lidos) if falha is not None}
+    return dados, falhas
+
+@medido()
+def carregar_fundos(registro=None, max_threads=MAX_THREADS):
+    """
+    Carrega fair value e investimentos de cada fundo do registro (padrão: carregar_registro()).
+    Retorna {nome: (fair_value, investimentos)}; fundos cujas planilhas não puderam
+    ser lidas ficam de fora, com uma mensagem de erro.
+    """
+    if registro is None:
+        registro = carregar_registro()
+    arquivos = tuple((nome, dados['fair_value'], dados['investimentos']) for nome, dados in registro.items())
+    assinaturas = tuple((assinatura_arquivo(fv), assinatura_arquivo(inv)) for _, fv, inv in arquivos)
+    dados, falhas = _carregar_fundos(arquivos, assinaturas, max_threads)
+    for nome, falha in falhas.items():
+        erro(f"❌ Erro ao carregar as planilhas do fundo {nome}: {falha}")
+    return dados
@@ -0,0 +1,175 @@
+"""
+Recálculo incremental dos resultados da carteira para o dashboard: mesma saída de
+engine.calcular_resultados, mas cada nó só é recalculado quando suas entradas mudam.
+
+    planilha de investimentos, ledger de parcelas, colunas fixas da carteira, IPCA
+        → FV Part., grade, IPCA+6% e tabela de correção (reconstrução vetorizada)
+    taxa
+        → coluna IPCA+taxa da tabela de correção e seu total
+    múltiplo/write-off de uma empresa (EstadoCarteira.alteradas_desde)
+        → Sale da linha; totais de Sale e FV Part. das ativas e de write-offs
+          (em toda a carteira) pela diferença
+    FV Part. das ativas
+        → Peso na Carteira (calculado só quando a tabela de crescimento é pedida)
+
+Editar o múltiplo de uma empresa custa o mesmo em qualquer tamanho de carteira.
+"""
+import numpy as np
+import pandas as pd
+from data_utils import versao_ipca, coluna_da_grade
+from modules.engine import investimentos_da_carteira, grade_correcao_da_carteira
+from modules.memo import impressao_digital
+from modules.instrumentacao import medido
+
+class RecalculoIncremental:
+    """
+    Resultados da carteira mantidos entre execuções (um por sessão).
+    Valores de Sale e write-off são somados em centavos inteiros, então os totais
+    atualizados pela diferença são exatos.
+    """
+
+    def __init__(self):
+        self._chave_base = None
+        self._alteracoes = 0
+        self._taxa = None
+        self._analise = None
+
+    @medido('recalculo_incremental')
+    def resultados(self, estado, investimentos, taxa, versao_dados=None, parcelas=None):
+        """
+        Resultados (ver calcular_resultados) da carteira 'estado' (um EstadoCarteira),
+        com a correção parcela a parcela das empresas que têm aportes em 'parcelas'.
+        'versao_dados' identifica a planilha de investimentos e o ledger de parcelas
+        (ex.: assinaturas dos arquivos); sem ela, os dois são identificados pela
+        impressão digital do conteúdo.
+        """
+        if versao_dados is None:
+            versao_dados = impressao_digital(investimentos, parcelas)
+        chave = (id(estado), estado.revisao_base, versao_dados, versao_ipca())
+        if chave != self._chave_base:
+            self._reconstruir(estado, investimentos, parcelas)
+            self._chave_base = chave
+        else:
+            for empresa in estado.alteradas_desde(self._alteracoes):
+                self._atualizar_empresa(empresa, estado.multiplo(empresa), estado.writeoff(empresa))
+        self._alteracoes = estado.alteracoes
+        if taxa != self._taxa:
+            self._correcao['Corrigido IPCA+Hurdle'] = coluna_da_grade(self._grade, taxa)
+            self._totais['corrigido_hurdle'] = float(self._correcao['Corrigido IPCA+Hurdle'].sum())
+            self._taxa = taxa
+
+        totais = dict(self._totais)
+        totais['sale'] = self._sale / 100
+        totais['writeoff'] = self._writeoff / 100
+        return {
+            'analise_crescimento': self.analise(),
+            'investimentos_ativos': self._investimentos_ativos,
+            'grade_correcao': self._grade,
+            'correcao': self._correcao,
+            'totais': totais
+        }
+
+    def _reconstruir(self, estado, investimentos, parcelas):
+        df = estado.df
+        self._empresas = df['Empresa'].to_numpy()
+        self._linhas = {empresa: i for i, empresa in enumerate(self._empresas)}
+        self._valores = df['Valor Investido'].to_numpy(dtype=float)
+        self._multiplos = df['Múltiplo'].to_numpy(dtype=float).copy()
+        self._writeoffs = df['Write-off'].fillna(False).to_numpy(dtype=bool).copy()
+        self._participacao = df['Participação do Fundo (%)'].to_numpy(dtype=float)
+        fair_value = df['Fair Value'].to_numpy(dtype=float)
+        self._fv_part = np.where(
+            ~np.isnan(fair_value) & (self._participacao > 0),
+            fair_value * (self._participacao / 100.0),
+            np.nan
+        )
+        # IPCA+6% de cada linha pela mesma correção (parcela a parcela) dos totais
+        self._ipca_6 = coluna_da_grade(grade_correcao_da_carteira(df, parcelas), 6.0)
+        self._valores_centavos = np.rint(self._valores * 100).astype(np.int64)
+        self._sales_centavos = np.rint(self._valores * self._multiplos * 100).astype(np.int64)
+
+        ativas = self._multiplos > 0
+        self._sale = int(self._sales_centavos[ativas & ~self._writeoffs].sum())
+        # Write-offs têm múltiplo 0: entram no total mesmo fora das ativas
+        self._writeoff = int(self._valores_centavos[self._writeoffs].sum())
+        self._soma_fv_part = float(np.nansum(self._fv_part[ativas]))
+        self._analise = None
+
+        self._investimentos_ativos = investimentos_da_carteira(investimentos, df)
+        self._grade = grade_correcao_da_carteira(self._investimentos_ativos, parcelas)
+        self._correcao = pd.DataFrame({
+            'Empresa': self._investimentos_ativos['Empresa'].to_numpy(),
+            'Valor Investido': self._investimentos_ativos['Valor Investido'].to_numpy(dtype=float),
+            'Corrigido IPCA': coluna_da_grade(self._grade, 0.0),
+            'Corrigido IPCA+6%': coluna_da_grade(self._grade, 6.0)
+        })
+        self._totais = {
+            'investido': float(investimentos['Valor Investido até a presente data (R$ mil)'].sum()),
+            'investido_ativo': float(self._correcao['Valor Investido'].sum()),
+            'corrigido_ipca': float(self._correcao['Corrigido IPCA'].sum()),
+            'corrigido_ipca_6': float(self._correcao['Corrigido IPCA+6%'].sum())
+        }
+        self._taxa = None
+
+    def _contribuir(self, i, sinal):
+        """
+        Soma (sinal=1) ou retira (sinal=-1) a linha i do total de write-offs e, se a
+        empresa estiver ativa, dos totais de Sale e FV Part.
+        """
+        if self._writeoffs[i]:
+            self._writeoff += sinal * int(self._valores_centavos[i])
+        if self._multiplos[i] <= 0:
+            return
+        if not self._writeoffs[i]:
+            self._sale += sinal * int(self._sales_centavos[i])
+        if not np.isnan(self._fv_part[i]):
+            self._soma_fv_part += sinal * float(self._fv_part[i])
+
+    def _atualizar_empresa(self, empresa, multiplo, writeoff):
+        i = self._linhas.get(empresa)
+        if i is None:
+            return
+        ativa_antes = self._multiplos[i] > 0
+        self._contribuir(i, -1)
+        self._multiplos[i] = multiplo
+        self._writeoffs[i] = writeoff
+        self._sales_centavos[i] = np.rint(self._valores[i] * multiplo * 100)
+        self._contribuir(i, 1)
+
+        if self._analise is None:
+            return
+        if ativa_antes and multiplo > 0:
+            # Conjunto de ativas inalterado: o Peso na Carteira das demais não muda
+            linha = self._linha_analise[i]
+            colunas = self._analise.columns
+            self._analise.iat[linha, colunas.get_loc('Múltiplo')] = round(float(multiplo), 2)
+            self._analise.iat[linha, colunas.get_loc('Sale')] = self._sales_centavos[i] / 100
+            self._analise.iat[linha, colunas.get_loc('Write-off')] = bool(writeoff)
+        else:
+            self._analise = None
+
+    def analise(self):
+        """
+        Tabela de crescimento das empresas com múltiplo > 0 (ver gerar_analise_crescimento),
+        montada só quando pedida depois de uma mudança no conjunto de empresas ativas.
+        """
+        if self._analise is None:
+            posicoes = np.flatnonzero(self._multiplos > 0)
+            fv_part = self._fv_part[posicoes]
+            if self._soma_fv_part != 0:
+                peso = fv_part / self._soma_fv_part * 100
+            else:
+                peso = 0
+            self._analise = pd.DataFrame({
+                'Empresa': self._empresas[posicoes],
+                'Valor Investido': self._valores[posicoes],
+                'FV Part.': fv_part,
+                'IPCA+6%': self._ipca_6[posicoes],
+                'Participação do Fundo (%)': self._participacao[posicoes],
+                'Múltiplo': self._multiplos[posicoes],
+                'Sale': self._sales_centavos[posicoes] / 100,
+                'Write-off': self._writeoffs[posicoes],
+                'Peso na Carteira': peso
+            }).round(2)
+            self._linha_analise = {int(posicao): linha for linha, posicao in enumerate(posicoes)}
+        return self._analise
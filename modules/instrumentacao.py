@@ -0,0 +1,169 @@
+"""
+Instrumentação leve das execuções do dashboard: trechos nomeados com tempo de
+execução e contadores de acertos/faltas/descartes de cada cache. Cada execução
+do script vira um registro em data/logs/execucoes.jsonl (arquivo rotativo).
+Fora de uma execução iniciada com iniciar_execucao, os trechos não gravam nada.
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_EXECUCOES = os.path.join(DIRETORIO_ATUAL, 'data', 'logs', 'execucoes.jsonl')
+TAMANHO_MAXIMO_LOG = 5 * 1024 * 1024  # bytes por arquivo
+ARQUIVOS_ANTERIORES = 5  # execucoes.jsonl.1 … .5
+# ANTERA_INSTRUMENTACAO=0 desliga a gravação dos registros
+GRAVAR_REGISTROS = os.environ.get('ANTERA_INSTRUMENTACAO', '1') != '0'
+
+_contadores = defaultdict(Counter)
+_trava_contadores = threading.Lock()
+# Cada sessão do Streamlit roda o script na própria thread
+_local = threading.local()
+_trava_log = threading.Lock()
+
+def contar(cache, evento, quantidade=1):
+    """
+    Soma 'quantidade' ao contador 'evento' ('acertos', 'faltas' ou 'descartes') do cache.
+    """
+    with _trava_contadores:
+        _contadores[cache][evento] += quantidade
+
+def contadores():
+    """
+    Cópia dos contadores acumulados no processo: {cache: {acertos, faltas, descartes}}.
+    """
+    with _trava_contadores:
+        return {
+            cache: {evento: valores.get(evento, 0) for evento in ('acertos', 'faltas', 'descartes')}
+            for cache, valores in _contadores.items()
+        }
+
+@contextmanager
+def trecho(nome):
+    """
+    Mede o tempo do bloco e o registra na execução em andamento desta thread.
+    Trechos aninhados ficam com o caminho completo (ex.: "calcular_resultados/gerar_analise_crescimento").
+    """
+    execucao = getattr(_local, 'execucao', None)
+    if execucao is None:
+        yield
+        return
+    pilha = execucao['pilha']
+    pilha.append(nome)
+    caminho = '/'.join(pilha)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fim = time.perf_counter()
+        pilha.pop()
+        execucao['trechos'].append({
+            'nome': caminho,
+            'inicio_ms': round((inicio - execucao['inicio']) * 1000, 3),
+            'duracao_ms': round((fim - inicio) * 1000, 3)
+        })
+
+def medido(nome=None):
+    """
+    Decorador que mede cada chamada da função como um trecho (padrão: nome da função).
+    """
+    def decorador(funcao):
+        rotulo = nome or funcao.__name__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with trecho(rotulo):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
+
+def iniciar_execucao(**contexto):
+    """
+    Começa o registro de uma execução nesta thread (descarta uma anterior não finalizada).
+    'contexto' (ex.: sessão) é gravado junto com o registro.
+    """
+    _local.execucao = {
+        'inicio': time.perf_counter(),
+        'data': datetime.now().isoformat(timespec='milliseconds'),
+        'contexto': contexto,
+        'pilha': [],
+        'trechos': [],
+        'contadores': contadores()
+    }
+
+def finalizar_execucao(**extras):
+    """
+    Encerra a execução desta thread e grava o registro no JSONL.
+    Os contadores do registro são a variação durante a execução (no processo todo:
+    sessões simultâneas também entram). Retorna o registro, ou None se não havia execução.
+    """
+    execucao = getattr(_local, 'execucao', None)
+    if execucao is None:
+        return None
+    _local.execucao = None
+    antes = execucao['contadores']
+    variacao = {}
+    for cache, valores in contadores().items():
+        anteriores = antes.get(cache, {})
+        delta = {evento: valor - anteriores.get(evento, 0) for evento, valor in valores.items()}
+        if any(delta.values()):
+            variacao[cache] = delta
+    totais = defaultdict(float)
+    for item in execucao['trechos']:
+        totais[item['nome']] += item['duracao_ms']
+    registro = {
+        'data': execucao['data'],
+        **execucao['contexto'],
+        **extras,
+        'duracao_ms': round((time.perf_counter() - execucao['inicio']) * 1000, 3),
+        'totais_ms': {nome: round(total, 3) for nome, total in totais.items()},
+        'trechos': execucao['trechos'],
+        'caches': variacao
+    }
+    if GRAVAR_REGISTROS:
+        try:
+            _gravar_registro(json.dumps(registro, ensure_ascii=False, default=str))
+        except OSError:
+            pass  # Sem permissão de escrita: o registro continua disponível em memória
+    _local.ultima = registro
+    return registro
+
+def ultima_execucao():
+    """Último registro finalizado nesta thread (ou None)."""
+    return getattr(_local, 'ultima', None)
+
+def _gravar_registro(linha, caminho=ARQUIVO_EXECUCOES):
+    """
+    Acrescenta a linha ao JSONL; acima de TAMANHO_MAXIMO_LOG, o arquivo atual vira
+    .1 (e os anteriores são empurrados até ARQUIVOS_ANTERIORES).
+    """
+    with _trava_log:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        if os.path.exists(caminho) and os.path.getsize(caminho) + len(linha) > TAMANHO_MAXIMO_LOG:
+            for i in range(ARQUIVOS_ANTERIORES - 1, 0, -1):
+                if os.path.exists(f"{caminho}.{i}"):
+                    os.replace(f"{caminho}.{i}", f"{caminho}.{i + 1}")
+            os.replace(caminho, f"{caminho}.1")
+        with open(caminho, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(linha + '\n')
+
+def ler_execucoes(limite=200, caminho=ARQUIVO_EXECUCOES):
+    """
+    Lê os últimos 'limite' registros do arquivo atual (mais recentes no fim).
+    """
+    if not os.path.exists(caminho):
+        return []
+    with open(caminho, encoding='utf-8') as arquivo:
+        linhas = arquivo.readlines()[-limite:]
+    registros = []
+    for linha in linhas:
+        try:
+            registros.append(json.loads(linha))
+        except ValueError:
+            continue  # Linha truncada durante uma rotação
+    return registros
@@ -0,0 +1,135 @@
+import sys
+import copy
+import time
+import logging
+import threading
+import functools
+from modules.memo import CacheLRU, impressao_digital
+from modules.instrumentacao import contar
+
+logger = logging.getLogger("antera")
+
+def streamlit_carregado():
+    """
+    Indica se o Streamlit já foi importado neste processo (dashboard em execução).
+    Os módulos de cálculo nunca importam o Streamlit por conta própria.
+    """
+    return 'streamlit' in sys.modules
+
+def cache_data(funcao=None, *, ttl=None, max_itens=64):
+    """
+    Equivalente a st.cache_data para funções de cálculo. Com o Streamlit carregado,
+    usa o próprio st.cache_data; fora dele (modo em lote), memoriza em um CacheLRU
+    pela impressão digital dos argumentos e devolve cópias, como o Streamlit.
+    'ttl' aceita segundos ou textos como "12h" e "30m".
+    Acertos e faltas entram nos contadores da instrumentação, com o nome da função.
+    """
+    if funcao is None:
+        return functools.partial(cache_data, ttl=ttl, max_itens=max_itens)
+    if streamlit_carregado():
+        return _cache_streamlit(funcao, ttl)
+
+    validade = _segundos(ttl)
+    cache = CacheLRU(max_itens, nome=funcao.__name__)
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        partes = list(args)
+        for nome in sorted(kwargs):
+            partes += [nome, kwargs[nome]]
+        chave = impressao_digital(*partes)
+        guardado = cache.obter(chave)
+        if guardado is None or (validade is not None and time.monotonic() - guardado[0] > validade):
+            guardado = cache.guardar(chave, (time.monotonic(), funcao(*args, **kwargs)))
+        return copy.deepcopy(guardado[1])
+
+    envolvida.clear = cache.limpar
+    return envolvida
+
+def cache_resource(funcao=None, *, max_itens=8):
+    """
+    Equivalente a st.cache_resource: um único objeto por processo e argumentos,
+    devolvido sem cópia a todas as sessões (quem recebe não deve alterá-lo).
+    Fora do Streamlit, memoriza em um CacheLRU pela impressão digital dos argumentos.
+    """
+    if funcao is None:
+        return functools.partial(cache_resource, max_itens=max_itens)
+    if streamlit_carregado():
+        import streamlit as st
+        return _cache_streamlit(funcao, None, st.cache_resource)
+
+    cache = CacheLRU(max_itens, nome=funcao.__name__)
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        partes = list(args)
+        for nome in sorted(kwargs):
+            partes += [nome, kwargs[nome]]
+        chave = impressao_digital(*partes)
+        guardado = cache.obter(chave)
+        if guardado is None:
+            guardado = cache.guardar(chave, (funcao(*args, **kwargs),))
+        return guardado[0]
+
+    envolvida.clear = cache.limpar
+    return envolvida
+
+def _cache_streamlit(funcao, ttl, decorador=None):
+    """
+    st.cache_data (ou 'decorador', ex.: st.cache_resource) com contagem de acertos
+    e faltas: a função só executa em uma falta.
+    """
+    import streamlit as st
+    decorador = decorador or st.cache_data
+    executou = threading.local()
+
+    @functools.wraps(funcao)
+    def executar(*args, **kwargs):
+        executou.sim = True
+        return funcao(*args, **kwargs)
+
+    em_cache = decorador(executar, ttl=ttl) if ttl is not None else decorador(executar)
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        executou.sim = False
+        resultado = em_cache(*args, **kwargs)
+        contar(funcao.__name__, 'faltas' if executou.sim else 'acertos')
+        return resultado
+
+    envolvida.clear = em_cache.clear
+    return envolvida
+
+def _segundos(ttl):
+    if ttl is None or isinstance(ttl, (int, float)):
+        return ttl
+    unidades = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    return float(ttl[:-1]) * unidades[ttl[-1]]
+
+def erro(mensagem):
+    """Mostra o erro no dashboard ou, fora dele, registra no log."""
+    if streamlit_carregado():
+        import streamlit as st
+        st.error(mensagem)
+    else:
+        logger.error(mensagem)
+
+def aviso(mensagem):
+    """Mostra o aviso no dashboard ou, fora dele, registra no log."""
+    if streamlit_carregado():
+        import streamlit as st
+        st.warning(mensagem)
+    else:
+        logger.warning(mensagem)
+
+class _StreamlitSobDemanda:
+    """
+    Substituto do módulo streamlit para funções de sessão (callbacks, cenários):
+    o Streamlit só é importado quando um atributo é usado, não na importação.
+    """
+
+    def __getattr__(self, nome):
+        import streamlit
+        return getattr(streamlit, nome)
+
+st = _StreamlitSobDemanda()
@@ -0,0 +1,145 @@
+import os
+import time
+import sqlite3
+import requests
+import pandas as pd
+
+# Diretórios para localizar arquivos
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
+ARQUIVO_IPCA = os.path.join(DIRETORIO_DADOS, 'ipca.sqlite')
+
+# Série 433 (IPCA mensal) da API SGS do Banco Central
+URL_SERIE_IPCA = "https://api.bcb.gov.br/dados/serie/bcdata.sgs.433/dados"
+TIMEOUT_API = (3.05, 10)  # (conexão, leitura) em segundos
+TENTATIVAS_API = 3
+ESPERA_ENTRE_TENTATIVAS = 0.5  # segundos, dobra a cada nova tentativa
+INTERVALO_SINCRONIZACAO = 12 * 3600  # segundos entre tentativas de sincronização
+
+def _conectar(caminho):
+    """
+    Abre o arquivo SQLite da série do IPCA, criando as tabelas se necessário.
+    """
+    diretorio = os.path.dirname(caminho)
+    if diretorio and not os.path.exists(diretorio):
+        os.makedirs(diretorio)
+    conexao = sqlite3.connect(caminho, timeout=10)
+    conexao.execute("CREATE TABLE IF NOT EXISTS ipca (data TEXT PRIMARY KEY, valor REAL NOT NULL)")
+    conexao.execute("CREATE TABLE IF NOT EXISTS controle (chave TEXT PRIMARY KEY, valor TEXT)")
+    return conexao
+
+def ler_serie_local(caminho=ARQUIVO_IPCA):
+    """
+    Lê a série do IPCA gravada em disco, no mesmo formato de obter_ipca
+    (índice 'data', colunas 'valor' e 'variacao_decimal').
+    Retorna None se ainda não houver dados locais.
+    """
+    if not os.path.exists(caminho):
+        return None
+    conexao = _conectar(caminho)
+    try:
+        dados = pd.read_sql_query("SELECT data, valor FROM ipca ORDER BY data", conexao)
+    finally:
+        conexao.close()
+    if dados.empty:
+        return None
+    dados['data'] = pd.to_datetime(dados['data'], format='%Y-%m-%d')
+    dados.set_index('data', inplace=True)
+    dados['variacao_decimal'] = dados['valor'] / 100
+    return dados
+
+def ultima_data_local(caminho=ARQUIVO_IPCA):
+    """
+    Retorna o mês mais recente gravado em disco (ou None se não houver dados).
+    """
+    if not os.path.exists(caminho):
+        return None
+    conexao = _conectar(caminho)
+    try:
+        ultima = conexao.execute("SELECT MAX(data) FROM ipca").fetchone()[0]
+    finally:
+        conexao.close()
+    return pd.Timestamp(ultima) if ultima else None
+
+def precisa_sincronizar(caminho=ARQUIVO_IPCA, intervalo=INTERVALO_SINCRONIZACAO):
+    """
+    Indica se vale a pena consultar a API: não há dados locais, ou falta algum mês
+    já divulgado e a última tentativa de sincronização foi há mais de 'intervalo' segundos.
+    """
+    ultima = ultima_data_local(caminho)
+    if ultima is None:
+        return True
+    # O IPCA de um mês é divulgado no mês seguinte; o mês anterior ao atual basta
+    mes_anterior = pd.Timestamp.now().normalize().replace(day=1) - pd.DateOffset(months=1)
+    if ultima >= mes_anterior:
+        return False
+    conexao = _conectar(caminho)
+    try:
+        linha = conexao.execute(
+            "SELECT valor FROM controle WHERE chave = 'ultima_tentativa'"
+        ).fetchone()
+    finally:
+        conexao.close()
+    return linha is None or time.time() - float(linha[0]) > intervalo
+
+def baixar_serie_bcb(data_inicial=None, data_final=None, url=URL_SERIE_IPCA,
+                     timeout=TIMEOUT_API, tentativas=TENTATIVAS_API):
+    """
+    Baixa a série do IPCA da API do BCB, opcionalmente só entre data_inicial e data_final.
+    Usa timeout limitado e novas tentativas com espera crescente.
+    Retorna a lista de registros {'data', 'valor'} ou lança ConnectionError.
+    """
+    params = {'formato': 'json'}
+    if data_inicial is not None:
+        params['dataInicial'] = pd.Timestamp(data_inicial).strftime('%d/%m/%Y')
+        params['dataFinal'] = pd.Timestamp(data_final or pd.Timestamp.now()).strftime('%d/%m/%Y')
+    ultimo_erro = None
+    for tentativa in range(tentativas):
+        try:
+            response = requests.get(url, params=params, timeout=timeout)
+            # Consulta por período sem meses novos: a API responde 404
+            if response.status_code == 404 and data_inicial is not None:
+                return []
+            if response.status_code == 200:
+                return response.json() if response.text else []
+            ultimo_erro = f"status code {response.status_code}"
+        except (requests.RequestException, ValueError) as e:
+            ultimo_erro = e
+        if tentativa < tentativas - 1:
+            time.sleep(ESPERA_ENTRE_TENTATIVAS * 2 ** tentativa)
+    raise ConnectionError(f"Erro ao acessar API do BCB após {tentativas} tentativas: {ultimo_erro}")
+
+def sincronizar_ipca(caminho=ARQUIVO_IPCA, url=URL_SERIE_IPCA,
+                     timeout=TIMEOUT_API, tentativas=TENTATIVAS_API):
+    """
+    Atualiza o arquivo local buscando apenas os meses posteriores ao último gravado.
+    Retorna a quantidade de meses novos gravados.
+    """
+    ultima = ultima_data_local(caminho)
+    data_inicial = None if ultima is None else ultima + pd.DateOffset(months=1)
+    conexao = _conectar(caminho)
+    try:
+        with conexao:
+            conexao.execute(
+                "INSERT OR REPLACE INTO controle (chave, valor) VALUES ('ultima_tentativa', ?)",
+                (str(time.time()),)
+            )
+        if data_inicial is not None and data_inicial > pd.Timestamp.now():
+            return 0
+        registros = baixar_serie_bcb(data_inicial, url=url, timeout=timeout, tentativas=tentativas)
+        if not registros:
+            return 0
+        dados = pd.DataFrame(registros)
+        if 'data' not in dados.columns or 'valor' not in dados.columns:
+            raise ValueError("Resposta da API não contém os dados esperados.")
+        dados['data'] = pd.to_datetime(dados['data'], format='%d/%m/%Y')
+        dados['valor'] = pd.to_numeric(dados['valor'], errors='coerce')
+        dados.dropna(subset=['valor'], inplace=True)
+        with conexao:
+            conexao.executemany(
+                "INSERT OR REPLACE INTO ipca (data, valor) VALUES (?, ?)",
+                zip(dados['data'].dt.strftime('%Y-%m-%d'), dados['valor'].astype(float))
+            )
+        return len(dados)
+    finally:
+        conexao.close()
@@ -0,0 +1,101 @@
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from modules.instrumentacao import contar
+
+def impressao_digital(*partes):
+    """
+    Calcula uma impressão digital barata do conteúdo das partes informadas
+    (DataFrames, Series, arrays ou valores simples), usada como chave de cache.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for parte in partes:
+        if isinstance(parte, (pd.DataFrame, pd.Series)):
+            h.update(str(list(parte.columns) if isinstance(parte, pd.DataFrame) else parte.name).encode())
+            h.update(pd.util.hash_pandas_object(parte, index=False).to_numpy().tobytes())
+        elif isinstance(parte, np.ndarray):
+            h.update(str(parte.dtype).encode())
+            h.update(pd.util.hash_array(parte.ravel()).tobytes())
+        else:
+            h.update(repr(parte).encode())
+        h.update(b'|')
+    return h.hexdigest()
+
+class CacheLRU:
+    """
+    Cache em memória de tamanho limitado, com descarte do item usado há mais tempo.
+    É compartilhado entre sessões do mesmo processo, por isso usa uma trava.
+    Com 'nome', acertos, faltas e descartes entram nos contadores da instrumentação.
+    """
+
+    def __init__(self, max_itens=32, nome=None):
+        self.max_itens = max_itens
+        self.nome = nome
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave, padrao=None):
+        with self._trava:
+            encontrado = chave in self._itens
+            if encontrado:
+                self._itens.move_to_end(chave)
+                valor = self._itens[chave]
+        if self.nome:
+            contar(self.nome, 'acertos' if encontrado else 'faltas')
+        return valor if encontrado else padrao
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            descartados = max(len(self._itens) - self.max_itens, 0)
+            for _ in range(descartados):
+                self._itens.popitem(last=False)
+        if self.nome and descartados:
+            contar(self.nome, 'descartes', descartados)
+        return valor
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+# Marca de item ausente no cache (None também pode ser um resultado memorizado)
+_AUSENTE = object()
+
+def memorizar(cache, colunas=None):
+    """
+    Decorador que memoriza o resultado da função em 'cache' (um CacheLRU), pela
+    impressão digital dos argumentos. 'colunas' ({parâmetro: [colunas]}) limita
+    os DataFrames às colunas que a função usa, para que colunas extras não mudem
+    a chave. O resultado é compartilhado: quem o recebe não deve alterá-lo.
+    """
+    colunas = colunas or {}
+
+    def decorador(funcao):
+        assinatura = inspect.signature(funcao)
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            partes = [funcao.__qualname__]
+            for nome, valor in argumentos.arguments.items():
+                if nome in colunas and isinstance(valor, pd.DataFrame):
+                    valor = valor[[c for c in colunas[nome] if c in valor.columns]]
+                partes += [nome, valor]
+            chave = impressao_digital(*partes)
+            resultado = cache.obter(chave, _AUSENTE)
+            if resultado is _AUSENTE:
+                resultado = cache.guardar(chave, funcao(*args, **kwargs))
+            return resultado
+
+        return envolvida
+
+    return decorador
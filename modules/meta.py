@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from modules.instrumentacao import medido
+
+@medido()
+def resolver_meta(empresas, valores_investidos, multiplos, meta, multiplo_maximo=10.0, passo=0.1):
+    """
+    Encontra os múltiplos de menor aumento total (soma dos aumentos de múltiplo)
+    que levam o Sale da carteira até 'meta', sem passar de 'multiplo_maximo'.
+    Como cada ponto de múltiplo rende o Valor Investido da empresa, a solução ótima
+    sobe primeiro as maiores empresas até o teto e ajusta a última em múltiplos de
+    'passo' (uma soma acumulada e uma busca binária, sem laço por empresa).
+    Retorna (DataFrame por empresa, meta atingível?).
+    """
+    valores = np.nan_to_num(np.asarray(valores_investidos, dtype=float))
+    multiplos = np.nan_to_num(np.asarray(multiplos, dtype=float))
+    falta = meta - np.dot(valores, multiplos)
+
+    ordem = np.argsort(-valores, kind='stable')
+    capacidades = valores[ordem] * np.maximum(multiplo_maximo - multiplos[ordem], 0.0)
+    acumulado = np.cumsum(capacidades)
+    aumentos = np.zeros_like(valores)
+    atingivel = falta <= 0 or (acumulado.size > 0 and acumulado[-1] >= falta)
+    if falta > 0 and acumulado.size > 0:
+        # Empresas antes de 'ultima' vão ao teto; a última cobre o que falta
+        ultima = min(int(np.searchsorted(acumulado, falta)), acumulado.size - 1)
+        aumentos_ordem = np.maximum(multiplo_maximo - multiplos[ordem], 0.0)
+        aumentos_ordem[ultima + 1:] = 0.0
+        restante = falta - (acumulado[ultima - 1] if ultima > 0 else 0.0)
+        if valores[ordem[ultima]] > 0:
+            parcial = np.ceil(restante / valores[ordem[ultima]] / passo - 1e-9) * passo
+            aumentos_ordem[ultima] = min(parcial, aumentos_ordem[ultima])
+        aumentos[ordem] = aumentos_ordem
+
+    necessarios = multiplos + aumentos
+    solucao = pd.DataFrame({
+        'Empresa': np.asarray(empresas),
+        'Valor Investido': valores,
+        'Múltiplo Atual': multiplos,
+        'Múltiplo Necessário': np.round(necessarios, 6),
+        'Aumento': np.round(aumentos, 6),
+        'Sale Necessário': valores * necessarios
+    })
+    return solucao.iloc[ordem].reset_index(drop=True), bool(atingivel)
+
+@medido()
+def fronteira_pareto(valores_investidos, multiplos, meta, iteracoes=60):
+    """
+    Para k = 1..n, o menor múltiplo M com que as k maiores empresas precisam sair
+    (cada uma com max(múltiplo atual, M); as demais mantêm o múltiplo atual)
+    para o Sale total chegar a 'meta'. Resolve todos os k de uma vez por bisseção
+    vetorizada. Retorna DataFrame com 'Empresas' (k) e 'Múltiplo Necessário'.
+    """
+    valores = np.nan_to_num(np.asarray(valores_investidos, dtype=float))
+    multiplos = np.nan_to_num(np.asarray(multiplos, dtype=float))
+    ordem = np.argsort(-valores, kind='stable')
+    valores, multiplos = valores[ordem], multiplos[ordem]
+    n = valores.size
+    if n == 0:
+        return pd.DataFrame({'Empresas': [], 'Múltiplo Necessário': []})
+
+    vendas = valores * multiplos
+    # Sale das empresas fora do grupo das k maiores, para cada k
+    resto = vendas.sum() - np.cumsum(vendas)
+    grupo = np.tril(np.ones((n, n), dtype=bool))  # linha k-1: as k maiores empresas
+
+    def sale_do_grupo(m):
+        return np.where(grupo, valores * np.maximum(multiplos, m[:, None]), 0.0).sum(axis=1)
+
+    # Limites da bisseção: M = 0 mantém os múltiplos atuais; o superior sempre atinge a meta
+    baixo = np.zeros(n)
+    alto = np.maximum(multiplos.max(), (meta - resto) / np.maximum(np.cumsum(valores), 1e-12)) + 1.0
+    for _ in range(iteracoes):
+        meio = (baixo + alto) / 2
+        atinge = sale_do_grupo(meio) + resto >= meta
+        alto = np.where(atinge, meio, alto)
+        baixo = np.where(atinge, baixo, meio)
+
+    # Meta já atingida com os múltiplos atuais: nenhum aumento é necessário
+    necessario = np.where(vendas.sum() >= meta, 0.0, alto)
+    return pd.DataFrame({'Empresas': np.arange(1, n + 1), 'Múltiplo Necessário': necessario})
@@ -0,0 +1,76 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Diretórios para localizar arquivos
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
+# Arquivo opcional no formato {"Nome alternativo": "Nome da empresa"}
+ARQUIVO_ALIASES = os.path.join(DIRETORIO_DADOS, 'aliases_empresas.json')
+
+def normalizar_nomes(nomes):
+    """
+    Normaliza nomes de empresas para comparação: remove espaços nas pontas,
+    colapsa espaços internos, ignora maiúsculas/minúsculas e acentos.
+    Opera na coluna inteira de uma vez.
+    """
+    return (
+        pd.Series(nomes, dtype=object).fillna('').astype(str)
+        .str.normalize('NFKD')
+        .str.encode('ascii', errors='ignore')
+        .str.decode('ascii')
+        .str.strip()
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.casefold()
+    )
+
+def normalizar_nome(nome):
+    """
+    Normaliza um único nome de empresa (ver normalizar_nomes).
+    """
+    return normalizar_nomes([nome]).iloc[0]
+
+def carregar_aliases(caminho=ARQUIVO_ALIASES):
+    """
+    Carrega o mapeamento opcional de nomes alternativos, já normalizado.
+    Retorna dicionário vazio se o arquivo não existir.
+    """
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        aliases = json.load(f)
+    return dict(zip(normalizar_nomes(list(aliases.keys())), normalizar_nomes(list(aliases.values()))))
+
+def chaves_empresa(nomes, aliases=None):
+    """
+    Converte nomes de empresas em chaves canônicas (nome normalizado, com aliases aplicados).
+    """
+    chaves = normalizar_nomes(nomes)
+    if aliases:
+        chaves = chaves.replace(aliases)
+    return chaves.to_numpy()
+
+def indexar_empresas(nomes, aliases=None):
+    """
+    Monta o índice de empresas usado para juntar planilhas pelo nome.
+    Retorna (índice de chaves canônicas únicas, posição da primeira ocorrência de cada chave).
+    """
+    chaves = pd.Index(chaves_empresa(nomes, aliases))
+    primeiras = np.flatnonzero(~chaves.duplicated())
+    return chaves[primeiras], primeiras
+
+def juntar_por_empresa(nomes, tabela, coluna_valor, coluna_nome='Empresa', aliases=None):
+    """
+    Busca 'coluna_valor' de 'tabela' para cada nome em 'nomes' com um único hash join.
+    Retorna (valores alinhados a 'nomes', lista de nomes sem correspondência).
+    """
+    if aliases is None:
+        aliases = carregar_aliases()
+    indice, primeiras = indexar_empresas(tabela[coluna_nome], aliases)
+    posicoes = indice.get_indexer(chaves_empresa(nomes, aliases))
+    encontrados = posicoes >= 0
+    # Posições -1 (sem correspondência) viram NaN no reindex
+    resultado = pd.Series(tabela[coluna_valor].to_numpy()[primeiras]).reindex(posicoes).to_numpy()
+    nao_encontrados = [nome for nome, ok in zip(nomes, encontrados) if not ok]
+    return resultado, nao_encontrados
@@ -0,0 +1,163 @@
+import pandas as pd
+import numpy as np
+from modules.nomes import carregar_aliases, chaves_empresa
+
+# Valor em reais: sinal opcional, "R$" opcional, milhares com ponto e decimais com vírgula
+PADRAO_MOEDA_BRL = r'^\s*(-)?\s*(?:R\$)?\s*(-)?\s*(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?\s*$'
+
+def converter_moeda_brl(valores):
+    """
+    Converte uma coluna de valores em reais ("R$ 1.234,56", "-1.000", "1234,5" ou números)
+    para float, com uma única expressão regular aplicada à coluna inteira.
+    Retorna (valores, inválidos), onde 'inválidos' marca as células preenchidas
+    que não puderam ser interpretadas (ficam NaN em 'valores').
+    """
+    serie = pd.Series(valores)
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.astype(float), pd.Series(False, index=serie.index)
+
+    serie = serie.astype(object)
+    eh_texto = serie.str.len().notna()
+    convertidos = pd.to_numeric(serie.where(~eh_texto), errors='coerce').astype(float)
+
+    textos = serie[eh_texto].astype(str)
+    partes = textos.str.extract(PADRAO_MOEDA_BRL)
+    inteiros = partes[2].str.replace('.', '', regex=False)
+    numeros = pd.to_numeric(inteiros + '.' + partes[3].fillna('0'), errors='coerce')
+    negativos = partes[0].notna() | partes[1].notna()
+    convertidos[eh_texto] = np.where(negativos, -numeros, numeros)
+
+    vazios = serie.isna() | (eh_texto & (serie.where(eh_texto, 'x').str.strip() == ''))
+    return convertidos, convertidos.isna() & ~vazios
+
+# Versão da conversão de ler_parcelas_excel: incrementar ao alterá-la, para que as
+# conversões gravadas no cache colunar (ver ler_planilha) sejam refeitas
+VERSAO_PARCELAS_EXCEL = 1
+
+def ler_parcelas_excel(caminho):
+    """
+    Lê o ledger de parcelas (data_investimentos.xlsx) já com datas e valores convertidos.
+    Células preenchidas que não puderam ser convertidas são listadas em
+    attrs['linhas_invalidas'] (linha da planilha, coluna e conteúdo original).
+    """
+    df_parcelas = pd.read_excel(caminho)
+    originais = df_parcelas[['Data Investimento', 'Valor Investido']].astype(object)
+
+    # Aceita datas dd/mm/aaaa em texto e células já formatadas como data
+    df_parcelas['Data Investimento'] = pd.to_datetime(
+        df_parcelas['Data Investimento'], format='%d/%m/%Y', errors='coerce'
+    )
+    datas_invalidas = df_parcelas['Data Investimento'].isna() & originais['Data Investimento'].notna()
+    df_parcelas['Valor Investido'], valores_invalidos = converter_moeda_brl(df_parcelas['Valor Investido'])
+
+    linhas_invalidas = []
+    for coluna, invalidos in (('Data Investimento', datas_invalidas), ('Valor Investido', valores_invalidos)):
+        for posicao in np.flatnonzero(invalidos.to_numpy()):
+            linhas_invalidas.append({
+                'Linha': int(posicao) + 2,  # +1 do cabeçalho, +1 porque o Excel começa em 1
+                'Empresa': str(df_parcelas['Empresa'].iloc[posicao]),
+                'Coluna': coluna,
+                'Conteúdo': str(originais[coluna].iloc[posicao])
+            })
+    df_parcelas.attrs['linhas_invalidas'] = sorted(linhas_invalidas, key=lambda r: r['Linha'])
+    return df_parcelas
+
+def somar_por_grupo(chaves, valores):
+    """
+    Soma 'valores' (1-D, ou 2-D com uma linha por registro) agrupando por 'chaves',
+    com uma única ordenação e np.add.reduceat. Retorna (grupos, somas).
+    """
+    valores = np.asarray(valores, dtype=float)
+    codigos, grupos = pd.factorize(np.asarray(chaves), sort=True)
+    if codigos.size == 0:
+        return np.asarray(grupos), valores[:0]
+    ordem = np.argsort(codigos, kind='stable')
+    codigos_ordenados = codigos[ordem]
+    inicios = np.flatnonzero(np.r_[True, codigos_ordenados[1:] != codigos_ordenados[:-1]])
+    somas = np.add.reduceat(valores[ordem], inicios, axis=0)
+    return np.asarray(grupos)[codigos_ordenados[inicios]], somas
+
+def corrigir_parcelas(df_parcelas, corrigir_ipca_lote, adicional=6.0):
+    """
+    Corrige cada parcela pelo IPCA + 'adicional'% a partir da sua própria data.
+    Retorna um array alinhado às linhas de df_parcelas.
+    """
+    return corrigir_ipca_lote(
+        df_parcelas['Valor Investido'],
+        df_parcelas['Data Investimento'],
+        adicional=adicional
+    )
+
+def aportes(df_parcelas, chave='Empresa'):
+    """
+    Parcelas do ledger corrigidas pelo IPCA: linhas com 'chave', data e valor preenchidos
+    e valor positivo. Distribuições (parcelas negativas) não são corrigidas.
+    """
+    validas = df_parcelas.dropna(subset=[chave, 'Data Investimento', 'Valor Investido'])
+    return validas[validas['Valor Investido'].to_numpy(dtype=float) > 0]
+
+def corrigir_parcelas_por_empresa(df_parcelas, corrigir_ipca_lote, adicional=6.0, chave='Empresa'):
+    """
+    Corrige os aportes do ledger (data_investimentos.xlsx, ver aportes) um a um e agrega
+    por 'chave' (comparando nomes sem diferenciar maiúsculas, acentos e espaços).
+    Retorna DataFrame com Parcelas, Valor Investido e Valor Corrigido por grupo;
+    o total da carteira é a soma das linhas.
+    """
+    validas = aportes(df_parcelas, chave)
+    if validas.empty:
+        return pd.DataFrame(columns=[chave, 'Parcelas', 'Valor Investido', 'Valor Corrigido'])
+
+    valores = validas['Valor Investido'].to_numpy(dtype=float)
+    corrigidos = corrigir_parcelas(validas, corrigir_ipca_lote, adicional)
+
+    # Agrupa pelo nome normalizado (mesmo índice usado nas demais planilhas),
+    # exibindo a primeira grafia encontrada de cada grupo
+    chaves = chaves_empresa(validas[chave], carregar_aliases())
+    nomes = pd.Series(validas[chave].to_numpy(), index=chaves)
+    nomes = nomes[~nomes.index.duplicated()]
+    
+    # Soma contagem, valor investido e valor corrigido em uma única redução
+    grupos, somas = somar_por_grupo(
+        chaves,
+        np.column_stack([np.ones_like(valores), valores, corrigidos])
+    )
+    return pd.DataFrame({
+        chave: nomes.reindex(grupos).to_numpy(),
+        'Parcelas': somas[:, 0].astype(int),
+        'Valor Investido': somas[:, 1],
+        'Valor Corrigido': somas[:, 2]
+    })
+
+def grade_parcelas_por_empresa(df_parcelas, empresas, calcular_grade):
+    """
+    Grade de correção (empresas × taxas) pelos aportes do ledger (ver aportes): cada um
+    é corrigido a partir da sua própria data e as parcelas são somadas por empresa,
+    com uma única redução. 'empresas' são os nomes da carteira (comparados pelo nome
+    normalizado, com aliases) e 'calcular_grade(valores, datas)' é a grade de
+    data_utils.calcular_grade_correcao. Os valores do ledger (R$) são convertidos para R$ mil.
+    Retorna (grade, com_parcelas): linhas alinhadas a 'empresas' (zeradas nas empresas
+    sem aportes no ledger) e a máscara das empresas com aportes; grade é None se
+    nenhuma parcela pertence à carteira.
+    """
+    empresas = pd.Series(np.asarray(empresas, dtype=object))
+    com_parcelas = np.zeros(len(empresas), dtype=bool)
+    validas = aportes(df_parcelas)
+
+    # Chave canônica → posição da empresa na carteira (primeira ocorrência)
+    aliases = carregar_aliases()
+    posicoes = pd.Series(np.arange(len(empresas)), index=chaves_empresa(empresas, aliases))
+    posicoes = posicoes[~posicoes.index.duplicated()]
+    codigos = posicoes.index.get_indexer(chaves_empresa(validas['Empresa'], aliases))
+    encontradas = codigos >= 0
+    if not encontradas.any():
+        return None, com_parcelas
+
+    grade_parcelas = calcular_grade(
+        validas['Valor Investido'].to_numpy(dtype=float)[encontradas] / 1000,
+        validas['Data Investimento'].to_numpy()[encontradas]
+    )
+    grupos, somas = somar_por_grupo(posicoes.to_numpy()[codigos[encontradas]], grade_parcelas)
+    grade = np.zeros((len(empresas), grade_parcelas.shape[1]))
+    grade[grupos] = somas
+    com_parcelas[grupos] = True
+    return grade, com_parcelas
@@ -0,0 +1,163 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import pandas as pd
+from modules.instrumentacao import contar
+
+logger = logging.getLogger("antera")
+
+# Diretórios para localizar arquivos
+DIRETORIO_ATUAL = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_DADOS = os.path.join(DIRETORIO_ATUAL, 'data')
+DIRETORIO_CACHE = os.path.join(DIRETORIO_DADOS, '.cache')
+
+def assinatura_arquivo(caminho):
+    """
+    Retorna (tamanho, data de modificação em ns) do arquivo, ou None se ele não existir.
+    Serve de chave barata para caches que precisam perceber mudanças na planilha.
+    """
+    try:
+        info = os.stat(caminho)
+    except FileNotFoundError:
+        return None
+    return info.st_size, info.st_mtime_ns
+
+def hash_arquivo(caminho):
+    """
+    Calcula o hash (blake2b) do conteúdo do arquivo.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+def _identificar_conversor(conversor, versao):
+    """
+    Retorna (identidade, versão) do conversor como texto: módulo e nome qualificado
+    da função e a versão informada (pd.read_excel usa a versão do pandas).
+    """
+    if conversor is None:
+        conversor, versao = pd.read_excel, pd.__version__ if versao is None else versao
+    nome = getattr(conversor, '__qualname__', type(conversor).__qualname__)
+    return f"{getattr(conversor, '__module__', '')}.{nome}", str(versao)
+
+def _caminhos_cache(caminho, diretorio_cache, conversor):
+    """
+    Retorna (manifesto JSON, prefixo dos arquivos Parquet) da planilha no diretório de cache.
+    Os nomes levam um hash do caminho absoluto e da identidade do conversor: planilhas
+    de mesmo nome em diretórios diferentes (ex.: investimentos.xlsx de cada fundo) e
+    conversões diferentes da mesma planilha têm entradas separadas.
+    """
+    chave = f"{os.path.abspath(caminho)}\n{conversor}"
+    origem = hashlib.blake2b(chave.encode('utf-8'), digest_size=8).hexdigest()
+    nome = f"{os.path.basename(caminho)}.{origem}"
+    return os.path.join(diretorio_cache, nome + '.json'), os.path.join(diretorio_cache, nome + '.')
+
+def _gravar_atomico(caminho, gravar):
+    """
+    Grava o arquivo por meio de 'gravar(caminho_temporario)' e só então o move para
+    'caminho' (os.replace): quem lê nunca encontra um arquivo pela metade.
+    """
+    descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+    os.close(descritor)
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+def _ler_manifesto(caminho_manifesto):
+    try:
+        with open(caminho_manifesto, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_manifesto(caminho_manifesto, manifesto):
+    def gravar(destino):
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, indent=4, ensure_ascii=False)
+    try:
+        _gravar_atomico(caminho_manifesto, gravar)
+    except OSError as e:
+        logger.warning(f"Não foi possível gravar o manifesto {caminho_manifesto}: {e}")
+
+def _selecionar(df, colunas):
+    """
+    Mantém apenas as colunas pedidas que existem na planilha.
+    """
+    if colunas is None:
+        return df
+    return df[[c for c in colunas if c in df.columns]]
+
+def ler_planilha(caminho, colunas=None, conversor=None, diretorio_cache=DIRETORIO_CACHE,
+                 versao_conversor=None):
+    """
+    Lê uma planilha Excel por meio de uma cópia colunar (Parquet) em data/.cache.
+
+    Na primeira leitura a planilha é convertida com 'conversor' (padrão: pd.read_excel)
+    e gravada como <arquivo>.<origem>.<hash>.<versão>.parquet, com um manifesto
+    <arquivo>.<origem>.json (<origem>: hash do caminho absoluto e do módulo/nome do
+    conversor) guardando tamanho, data de modificação, hash do conteúdo e
+    'versao_conversor'. Nas leituras seguintes:
+      - tamanho e data iguais ao manifesto: lê direto o Parquet;
+      - tamanho ou data diferentes: recalcula o hash e só reconverte se o conteúdo mudou;
+      - outra 'versao_conversor' (altere-a quando a conversão mudar): reconverte.
+    Cada planilha e conversor têm sua própria entrada, então alterar uma não invalida as outras.
+    'colunas' restringe a leitura às colunas pedidas (as inexistentes são ignoradas).
+    Se não for possível gravar o cache, devolve a versão lida do Excel.
+    """
+    identidade, versao = _identificar_conversor(conversor, versao_conversor)
+    if conversor is None:
+        conversor = pd.read_excel
+    caminho_manifesto, prefixo = _caminhos_cache(caminho, diretorio_cache, identidade)
+    tamanho, modificado_em = assinatura_arquivo(caminho) or (None, None)
+    if tamanho is None:
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+    manifesto = _ler_manifesto(caminho_manifesto)
+    if manifesto is not None and (manifesto.get('tamanho'), manifesto.get('modificado_em')) == (tamanho, modificado_em):
+        conteudo = manifesto.get('hash')
+    else:
+        conteudo = hash_arquivo(caminho)
+
+    rotulo_versao = hashlib.blake2b(versao.encode('utf-8'), digest_size=4).hexdigest()
+    caminho_parquet = prefixo + f"{conteudo}.{rotulo_versao}.parquet"
+    if (os.path.exists(caminho_parquet) and manifesto is not None and manifesto.get('hash') == conteudo
+            and manifesto.get('versao_conversor') == versao):
+        if (manifesto['tamanho'], manifesto['modificado_em']) != (tamanho, modificado_em):
+            # Arquivo apenas "tocado" (ex.: checkout): atualiza o manifesto sem reconverter
+            manifesto.update(tamanho=tamanho, modificado_em=modificado_em)
+            _gravar_manifesto(caminho_manifesto, manifesto)
+        disponiveis = manifesto.get('colunas')
+        selecao = None if colunas is None or disponiveis is None else [c for c in colunas if c in disponiveis]
+        contar('planilhas', 'acertos')
+        return pd.read_parquet(caminho_parquet, columns=selecao)
+
+    contar('planilhas', 'faltas')
+    df = conversor(caminho)
+    try:
+        os.makedirs(diretorio_cache, exist_ok=True)
+        _gravar_atomico(caminho_parquet, lambda destino: df.to_parquet(destino, index=False))
+        # Remove versões antigas desta planilha
+        for antigo in os.listdir(diretorio_cache):
+            antigo = os.path.join(diretorio_cache, antigo)
+            if antigo.startswith(prefixo) and antigo.endswith('.parquet') and antigo != caminho_parquet:
+                os.remove(antigo)
+        _gravar_manifesto(caminho_manifesto, {
+            'tamanho': tamanho,
+            'modificado_em': modificado_em,
+            'hash': conteudo,
+            'conversor': identidade,
+            'versao_conversor': versao,
+            'colunas': [str(c) for c in df.columns]
+        })
+    except (OSError, ValueError, TypeError) as e:
+        # Sem permissão de escrita ou tipos não suportados pelo Parquet: segue em memória
+        logger.warning(f"Não foi possível gravar o cache de {caminho}: {e}")
+    return _selecionar(df, colunas)
@@ -1,82 +1,44 @@
-import streamlit as st
+from modules.interface import st
 import pandas as pd
 import numpy as np
+from modules.memo import CacheLRU, impressao_digital
+from modules.nomes import juntar_por_empresa
+from modules.instrumentacao import medido
 
 def init_writeoff_status():
     """
     Inicializa o status de Write-off para todas as empresas com múltiplo 0.
     Deve ser chamada logo após carregar os dados.
     """
-    if 'edited_df' in st.session_state:
-        for _, row in st.session_state.edited_df.iterrows():
-            empresa = row["Empresa"]
-            multiplo = float(row["Múltiplo"])
-            
-            # Se o múltiplo for 0, marca como write-off automaticamente
-            if multiplo == 0:
-                st.session_state.edited_df.loc[
-                    st.session_state.edited_df["Empresa"] == empresa, "Write-off"
-                ] = True
-                
-                # Também atualiza a variável de sessão para o checkbox
-                st.session_state[f"writeoff_{empresa}"] = True
-            else:
-                # Garante que empresas com múltiplo > 0 não estejam marcadas como write-off
-                st.session_state.edited_df.loc[
-                    st.session_state.edited_df["Empresa"] == empresa, "Write-off"
-                ] = False
-                
-                # Também atualiza a variável de sessão para o checkbox
-                st.session_state[f"writeoff_{empresa}"] = False
+    if 'carteira' in st.session_state:
+        st.session_state.carteira.sincronizar_writeoff()
 
 def sincronizar_writeoff_com_multiplos():
     """
     Sincroniza o status de write-off com empresas que têm múltiplo zero.
     Deve ser chamada depois de carregar os dados iniciais.
     """
-    if 'edited_df' in st.session_state:
-        # Encontra todas as empresas com múltiplo 0
-        empresas_com_multiplo_zero = st.session_state.edited_df[
-            st.session_state.edited_df['Múltiplo'] == 0
-        ]['Empresa'].tolist()
+    if 'carteira' in st.session_state:
+        carteira = st.session_state.carteira
+        carteira.sincronizar_writeoff()
         
-        # Marca essas empresas como write-off
-        for empresa in empresas_com_multiplo_zero:
-            # Atualiza o DataFrame
-            st.session_state.edited_df.loc[
-                st.session_state.edited_df['Empresa'] == empresa, 'Write-off'
-            ] = True
-            
-            # Também atualiza a variável de session_state se já existir
-            if f"writeoff_{empresa}" in st.session_state:
-                st.session_state[f"writeoff_{empresa}"] = True
+        # Atualiza o checkbox da empresa selecionada, se já existir
+        comp = st.session_state.get("select_company")
+        if comp in carteira and "multiplo_writeoff" in st.session_state:
+            st.session_state["multiplo_writeoff"] = carteira.writeoff(comp)
 
 def sincronizar_multiplo_writeoff():
     """
     Assegura que a relação entre múltiplo e write-off esteja consistente.
     Deve ser chamada sempre que carregar a interface para uma empresa.
     """
-    if 'select_company' in st.session_state:
+    if 'select_company' in st.session_state and 'carteira' in st.session_state:
         comp = st.session_state["select_company"]
-        try:
-            multiplo = st.session_state[f"num_{comp}"]
-            
-            # Se o múltiplo for zero, o write-off deve estar marcado
-            if multiplo == 0:
-                st.session_state[f"writeoff_{comp}"] = True
-                st.session_state.edited_df.loc[
-                    st.session_state.edited_df["Empresa"] == comp, "Write-off"
-                ] = True
-            # Se o múltiplo for maior que zero, o write-off não deve estar marcado
-            else:
-                st.session_state[f"writeoff_{comp}"] = False
-                st.session_state.edited_df.loc[
-                    st.session_state.edited_df["Empresa"] == comp, "Write-off"
-                ] = False
-        except:
-            # Se a empresa ainda não está no sistema, não faz nada
-            pass
+        if comp in st.session_state.carteira and "multiplo_num" in st.session_state:
+            st.session_state.carteira.definir_multiplo(comp, st.session_state["multiplo_num"])
+            st.session_state["multiplo_writeoff"] = st.session_state.carteira.writeoff(comp)
 
+@medido()
 def preparar_dados_iniciais(fair_value, investimentos):
     """
     Prepara o DataFrame inicial com os dados de investimentos e fair value.
@@ -99,63 +61,88 @@ def preparar_dados_iniciais(fair_value, investimentos):
     if "Write-off" not in df_empresas.columns:
         df_empresas["Write-off"] = False
     
-    # Preenche Fair Value total do df_empresas
-    for i, row in df_empresas.iterrows():
-        emp = row["Empresa"]
-        match = fair_value.loc[
-            fair_value["Empresa"].str.upper() == emp.strip().upper()
-        ]
-        if not match.empty:
-            df_empresas.at[i, "Fair Value"] = match.iloc[0]["Valor Primatec (R$ mil)"]
-        else:
-            df_empresas.at[i, "Fair Value"] = np.nan
+    # Preenche Fair Value total do df_empresas com um único join pelo nome normalizado
+    fair_values, sem_fair_value = juntar_por_empresa(
+        df_empresas["Empresa"], fair_value, "Valor Primatec (R$ mil)"
+    )
+    df_empresas["Fair Value"] = fair_values
+    df_empresas.attrs["empresas_sem_fair_value"] = sem_fair_value
     
     return df_empresas
 
-def gerar_analise_crescimento(active_investments, corrigir_ipca):
+# Colunas que determinam o resultado de gerar_analise_crescimento
+COLUNAS_ANALISE = [
+    'Empresa', 'Valor Investido', 'Data do Primeiro Investimento', 'Múltiplo',
+    'Write-off', 'Fair Value', 'Participação do Fundo (%)'
+]
+_cache_analise = CacheLRU(max_itens=32, nome='analise_crescimento')
+
+@medido()
+def gerar_analise_crescimento(active_investments, corrigir_ipca_lote, versao_ipca=None, ipca_6=None):
     """
     Gera DataFrame com análise de crescimento para empresas ativas.
+    'ipca_6' traz o IPCA+6% já corrigido de cada linha (ex.: parcela a parcela, ver
+    engine.grade_correcao_da_carteira); sem ele, 'corrigir_ipca_lote' corrige o
+    Valor Investido desde a Data do Primeiro Investimento (ver data_utils).
+    Se 'versao_ipca' for informada, o resultado é memorizado pela impressão digital
+    das colunas de entrada + 'ipca_6' + versão do IPCA, e entradas iguais voltam do cache.
     """
-    analise_crescimento = pd.DataFrame()
+    colunas = [c for c in COLUNAS_ANALISE if c in active_investments.columns]
+    if ipca_6 is not None:
+        ipca_6 = np.asarray(ipca_6, dtype=float)
+    chave = None
+    if versao_ipca is not None:
+        chave = impressao_digital(active_investments[colunas], ipca_6, versao_ipca)
+        em_cache = _cache_analise.obter(chave)
+        if em_cache is not None:
+            return em_cache.copy()
+    
+    valores_investidos = active_investments['Valor Investido'].to_numpy(dtype=float)
+    fair_value_total = active_investments['Fair Value'].to_numpy(dtype=float)
+    pct_fundo = active_investments['Participação do Fundo (%)'].to_numpy(dtype=float)
+    multiplicadores = active_investments['Múltiplo'].to_numpy()
     
-    for _, row in active_investments.iterrows():
-        valor_investido = row['Valor Investido']
-        valor_necessario = corrigir_ipca(
-            valor_investido,
-            row['Data do Primeiro Investimento'],
+    # Correção IPCA+6% de todas as empresas em uma única chamada vetorizada
+    if ipca_6 is not None:
+        valores_necessarios = ipca_6
+    else:
+        valores_necessarios = corrigir_ipca_lote(
+            valores_investidos,
+            active_investments['Data do Primeiro Investimento'],
             adicional=6.0
         )
-        fair_value_total = row["Fair Value"]
-        pct_fundo = row['Participação do Fundo (%)']
-        if pd.notna(fair_value_total) and pct_fundo > 0:
-            fv_part = fair_value_total * (pct_fundo / 100.0)
-        else:
-            fv_part = np.nan
-        
-        multiplicador = row['Múltiplo']
-        sale_value = valor_investido * multiplicador
-        
-        analise_crescimento = pd.concat([
-            analise_crescimento,
-            pd.DataFrame({
-                'Empresa': [row['Empresa']],
-                'Valor Investido': [valor_investido],
-                'FV Part.': [fv_part],
-                'IPCA+6%': [valor_necessario],
-                'Participação do Fundo (%)': [pct_fundo],
-                'Múltiplo': [multiplicador],
-                'Sale': [sale_value],
-                'Write-off': [row.get('Write-off', False)]
-            })
-        ])
+    
+    # FV Part. = Fair Value × participação do fundo (quando ambos existem)
+    fv_part = np.where(
+        ~np.isnan(fair_value_total) & (pct_fundo > 0),
+        fair_value_total * (pct_fundo / 100.0),
+        np.nan
+    )
+    
+    if 'Write-off' in active_investments.columns:
+        writeoff = active_investments['Write-off'].fillna(False).to_numpy(dtype=bool)
+    else:
+        writeoff = np.zeros(len(active_investments), dtype=bool)
+    
+    analise_crescimento = pd.DataFrame({
+        'Empresa': active_investments['Empresa'].to_numpy(),
+        'Valor Investido': valores_investidos,
+        'FV Part.': fv_part,
+        'IPCA+6%': valores_necessarios,
+        'Participação do Fundo (%)': pct_fundo,
+        'Múltiplo': multiplicadores,
+        'Sale': valores_investidos * multiplicadores,
+        'Write-off': writeoff
+    })
     
     # Cálculo do Peso na Carteira
-    valor_total_fv_part = analise_crescimento["FV Part."].sum()
+    valor_total_fv_part = np.nansum(fv_part)
     if valor_total_fv_part != 0:
-        analise_crescimento["Peso na Carteira"] = (
-            analise_crescimento["FV Part."] / valor_total_fv_part
-        ) * 100
+        analise_crescimento["Peso na Carteira"] = (fv_part / valor_total_fv_part) * 100
     else:
         analise_crescimento["Peso na Carteira"] = 0
     
-    return analise_crescimento.round(2)
+    analise_crescimento = analise_crescimento.round(2)
+    if chave is not None:
+        _cache_analise.guardar(chave, analise_crescimento.copy())
+    return analise_crescimento
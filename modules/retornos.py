@@ -0,0 +1,173 @@
+"""
+TIR (XIRR) e múltiplos de retorno (TVPI, DPI, RVPI) das empresas e do fundo, a partir
+do ledger de parcelas (data_investimentos.xlsx) e dos valores de saída do cenário.
+
+Convenções:
+  - parcelas positivas do ledger são aportes; negativas, distribuições já recebidas;
+  - a saída de cada empresa (Valor Investido × Múltiplo) entra como valor residual
+    na data-base (padrão: hoje), então TVPI = DPI + RVPI;
+  - a TIR é anual efetiva, com dias corridos / 365 (a convenção do XIRR do Excel).
+"""
+import numpy as np
+import pandas as pd
+from modules.nomes import carregar_aliases, chaves_empresa
+from modules.memo import CacheLRU, memorizar
+from modules.instrumentacao import medido
+
+# Intervalo de busca da TIR: de -99,99% a 100.000% ao ano
+TIR_MINIMA = -0.9999
+TIR_MAXIMA = 1000.0
+_cache_fluxos = CacheLRU(max_itens=8, nome='fluxos_tir')
+
+def xirr_lote(fluxos, anos, grupos, n_grupos, chute=0.1, tolerancia=1e-10, max_iteracoes=100):
+    """
+    Calcula a TIR de vários fluxos de caixa de uma vez: o fluxo i ocorre 'anos[i]' anos
+    depois da origem do grupo 'grupos[i]'. Cada iteração é um passo de Newton em todos
+    os grupos ainda não convergidos, protegido por bisseção: cada grupo mantém um
+    intervalo em que o VPL troca de sinal e usa o ponto médio quando o passo sai dele.
+    Retorna a TIR de cada grupo (NaN quando o VPL não troca de sinal no intervalo).
+    """
+    fluxos = np.asarray(fluxos, dtype=float)
+    anos = np.asarray(anos, dtype=float)
+    grupos = np.asarray(grupos, dtype=np.intp)
+
+    def vpl(taxas, fluxos, anos, grupos, com_derivada=False):
+        # (1 + r)^-t como exp(-t·log(1 + r)), limitado para não estourar perto de r = -1
+        descontados = fluxos * np.exp(np.clip(-anos * np.log1p(taxas)[grupos], -700, 700))
+        valor = np.bincount(grupos, weights=descontados, minlength=n_grupos)
+        if not com_derivada:
+            return valor
+        derivada = np.bincount(grupos, weights=-anos * descontados, minlength=n_grupos) / (1 + taxas)
+        return valor, derivada
+
+    baixo = np.full(n_grupos, TIR_MINIMA)
+    alto = np.full(n_grupos, TIR_MAXIMA)
+    vpl_baixo = vpl(baixo, fluxos, anos, grupos)
+    validos = np.sign(vpl_baixo) * np.sign(vpl(alto, fluxos, anos, grupos)) < 0
+    taxas = np.clip(np.broadcast_to(np.asarray(chute, dtype=float), (n_grupos,)), -0.99, 10.0)
+    taxas = np.where(validos, taxas, 0.0)
+    pendentes = validos.copy()
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iteracoes):
+            # Só os fluxos dos grupos ainda não convergidos entram na iteração
+            em_aberto = pendentes[grupos]
+            if not em_aberto.any():
+                break
+            if not em_aberto.all():
+                fluxos, anos, grupos = fluxos[em_aberto], anos[em_aberto], grupos[em_aberto]
+            valor, derivada = vpl(taxas, fluxos, anos, grupos, com_derivada=True)
+            # Estreita o intervalo: a taxa atual substitui a ponta de mesmo sinal
+            lado_baixo = np.sign(valor) == np.sign(vpl_baixo)
+            baixo = np.where(pendentes & lado_baixo, taxas, baixo)
+            vpl_baixo = np.where(pendentes & lado_baixo, valor, vpl_baixo)
+            alto = np.where(pendentes & ~lado_baixo, taxas, alto)
+
+            newton = taxas - valor / derivada
+            dentro = np.isfinite(newton) & (newton > baixo) & (newton < alto)
+            # Bisseção em log(1 + r): o intervalo inicial cobre cinco ordens de grandeza
+            meio = np.sqrt((1 + baixo) * (1 + alto)) - 1
+            # VPL exatamente zero: a taxa atual já é a raiz
+            novas = np.where(valor == 0, taxas, np.where(dentro, newton, meio))
+            convergiu = np.abs(novas - taxas) <= tolerancia * (1 + np.abs(taxas))
+            taxas = np.where(pendentes, novas, taxas)
+            pendentes &= ~convergiu
+    return np.where(validos, taxas, np.nan)
+
+@memorizar(_cache_fluxos, colunas={'parcelas': ['Empresa', 'Data Investimento', 'Valor Investido']})
+def preparar_fluxos(parcelas, empresas, data_base):
+    """
+    Parte dos fluxos que não depende dos múltiplos: associa cada parcela válida a uma
+    empresa de 'empresas' (pelo nome normalizado, com aliases) e a posiciona no tempo.
+    Cada empresa é um grupo com origem na sua primeira parcela; o fundo é o último
+    grupo (n), com origem na primeira parcela da carteira.
+    Retorna dict com os fluxos dos aportes/distribuições ('fluxos', 'anos', 'grupos'),
+    a duração de cada grupo até a data-base, 'aportado' e 'distribuido' (R$) por
+    empresa e 'sem_parcelas' (empresas sem nenhuma parcela no ledger).
+    """
+    empresas = np.asarray(empresas)
+    n = len(empresas)
+    validas = parcelas.dropna(subset=['Empresa', 'Data Investimento', 'Valor Investido'])
+    aliases = carregar_aliases()
+    # Chave canônica → posição da empresa na carteira (primeira ocorrência)
+    posicoes = pd.Series(np.arange(n), index=chaves_empresa(pd.Series(empresas), aliases))
+    posicoes = posicoes[~posicoes.index.duplicated()]
+    codigos = posicoes.index.get_indexer(chaves_empresa(validas['Empresa'], aliases))
+    encontradas = codigos >= 0
+    grupos = posicoes.to_numpy()[codigos[encontradas]]
+
+    valores = validas['Valor Investido'].to_numpy(dtype=float)[encontradas]
+    datas = pd.to_datetime(validas['Data Investimento']).to_numpy(dtype='datetime64[ns]')[encontradas]
+    anos_ate_base = (np.datetime64(data_base, 'ns') - datas).astype('timedelta64[D]').astype(float) / 365
+
+    duracao = np.zeros(n + 1)
+    if grupos.size:
+        duracao[:n] = pd.Series(anos_ate_base).groupby(grupos).max().reindex(np.arange(n), fill_value=0.0).to_numpy()
+        duracao[n] = anos_ate_base.max()
+    # No fundo, parcelas da mesma data viram um único fluxo
+    anos_fundo, posicao_data = np.unique(anos_ate_base, return_inverse=True)
+    valores_fundo = np.bincount(posicao_data, weights=valores, minlength=anos_fundo.size)
+    return {
+        # Aportes saem do caixa (negativos); distribuições entram (positivas)
+        'fluxos': np.concatenate([-valores, -valores_fundo]),
+        'anos': np.concatenate([duracao[grupos] - anos_ate_base, duracao[n] - anos_fundo]),
+        'grupos': np.concatenate([grupos, np.full(anos_fundo.size, n)]),
+        'duracao': duracao,
+        'aportado': np.bincount(grupos, weights=np.clip(valores, 0, None), minlength=n),
+        'distribuido': np.bincount(grupos, weights=np.clip(-valores, 0, None), minlength=n),
+        'sem_parcelas': [str(e) for e, com in zip(empresas, np.bincount(grupos, minlength=n) > 0) if not com]
+    }
+
+@medido()
+def calcular_retornos(parcelas, carteira, data_base=None):
+    """
+    TIR, TVPI, DPI e RVPI de cada empresa da carteira e do fundo, com a saída de cada
+    empresa igual a Valor Investido (R$ mil) × Múltiplo na data-base.
+    Só o valor de saída depende dos múltiplos: aportes e datas ficam em cache
+    (preparar_fluxos), então recalcular após editar um múltiplo é uma única
+    rodada de xirr_lote sobre todas as empresas.
+    Retorna DataFrame (valores em R$ mil) com uma linha por empresa e a linha "Fundo";
+    empresas sem parcelas no ledger ficam sem indicadores e fora da linha do fundo
+    (listadas em attrs['empresas_sem_parcelas']). Empresas sem nenhum valor recebido
+    (write-offs) têm TIR de -100%.
+    """
+    data_base = pd.Timestamp.now().normalize() if data_base is None else pd.Timestamp(data_base)
+    empresas = carteira['Empresa'].to_numpy()
+    n = len(empresas)
+    base = preparar_fluxos(parcelas, empresas, data_base)
+    com_parcelas = base['aportado'] + base['distribuido'] > 0
+
+    saida = carteira['Valor Investido'].to_numpy(dtype=float) * 1000 * carteira['Múltiplo'].to_numpy(dtype=float)
+    saida = np.where(com_parcelas, saida, 0.0)
+    aportado = np.append(base['aportado'], base['aportado'].sum())
+    distribuido = np.append(base['distribuido'], base['distribuido'].sum())
+    saida = np.append(saida, saida.sum())
+
+    # Valores de saída: um fluxo positivo por grupo, no fim do prazo do grupo
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tvpi = (distribuido + saida) / aportado
+        chute = np.where(tvpi > 0, tvpi ** (2 / np.maximum(base['duracao'], 0.25)) - 1, -0.5)
+    tir = xirr_lote(
+        np.concatenate([base['fluxos'], saida]),
+        np.concatenate([base['anos'], base['duracao']]),
+        np.concatenate([base['grupos'], np.arange(n + 1)]),
+        n + 1,
+        chute=np.nan_to_num(chute, nan=0.1)
+    )
+    recebeu = np.append(com_parcelas, com_parcelas.any()) & (distribuido + saida > 0)
+    tir = np.where(np.append(com_parcelas, com_parcelas.any()) & ~recebeu & (aportado > 0), -1.0, tir)
+
+    retornos = pd.DataFrame({
+        'Empresa': np.append(empresas, 'Fundo'),
+        'Aportado': aportado / 1000,
+        'Distribuído': distribuido / 1000,
+        'Valor de Saída': saida / 1000,
+        'TVPI': tvpi,
+        'DPI': distribuido / np.where(aportado > 0, aportado, np.nan),
+        'RVPI': saida / np.where(aportado > 0, aportado, np.nan),
+        'TIR (% a.a.)': tir * 100
+    })
+    sem_parcelas = np.append(~com_parcelas, False)
+    retornos.loc[sem_parcelas, ['TVPI', 'DPI', 'RVPI', 'TIR (% a.a.)']] = np.nan
+    retornos.attrs['empresas_sem_parcelas'] = base['sem_parcelas']
+    return retornos
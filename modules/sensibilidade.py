@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+# Grades de perturbação padrão: variação relativa do múltiplo e pontos percentuais da taxa
+VARIACOES_MULTIPLO = np.array([-0.5, -0.25, 0.25, 0.5])
+VARIACOES_TAXA = np.array([-2.0, -1.0, 1.0, 2.0])
+
+def calcular_sensibilidade(empresas, valores_investidos, multiplos, writeoffs,
+                           hurdle_nominal, totais_corrigidos, taxa, taxas,
+                           variacoes_multiplo=VARIACOES_MULTIPLO, variacoes_taxa=VARIACOES_TAXA):
+    """
+    Calcula quanto (Sale total − hurdle) muda quando cada empresa tem o múltiplo
+    variado em 'variacoes_multiplo' (relativo) e quando a taxa (IPCA + %) varia em
+    'variacoes_taxa' pontos. O hurdle acompanha a taxa na proporção do total corrigido
+    ('totais_corrigidos', um total por taxa da grade 'taxas').
+    Todas as perturbações saem de uma única operação com broadcasting.
+    Retorna DataFrame com uma linha por fator (empresas e taxa), uma coluna por
+    variação e Menor/Maior/Amplitude, ordenado pela amplitude.
+    """
+    valores = np.nan_to_num(np.asarray(valores_investidos, dtype=float))
+    multiplos = np.nan_to_num(np.asarray(multiplos, dtype=float))
+    writeoffs = np.asarray(writeoffs, dtype=bool)
+    variacoes_multiplo = np.asarray(variacoes_multiplo, dtype=float)
+    variacoes_taxa = np.asarray(variacoes_taxa, dtype=float)
+    taxas = np.asarray(taxas, dtype=float)
+    totais_corrigidos = np.asarray(totais_corrigidos, dtype=float)
+
+    # Sale de cada empresa (write-off não vende) × variação relativa: empresas × variações
+    vendas = np.where(writeoffs, 0.0, valores * multiplos)
+    deltas_empresas = vendas[:, None] * variacoes_multiplo[None, :]
+
+    # Taxa perturbada limitada à grade; o hurdle escala com o total corrigido
+    posicoes = np.abs(taxas[None, :] - np.clip(taxa + variacoes_taxa, taxas[0], taxas[-1])[:, None]).argmin(axis=1)
+    posicao_atual = np.abs(taxas - taxa).argmin()
+    hurdles = hurdle_nominal * totais_corrigidos[posicoes] / totais_corrigidos[posicao_atual]
+    deltas_taxa = hurdle_nominal - hurdles
+
+    rotulos_multiplo = [f"{v:+.0%}" for v in variacoes_multiplo]
+    rotulos_taxa = [f"{v:+g} p.p." for v in variacoes_taxa]
+    sensibilidade = pd.concat([
+        pd.DataFrame(deltas_empresas, columns=rotulos_multiplo).assign(Fator=np.asarray(empresas), Tipo='Múltiplo'),
+        pd.DataFrame([deltas_taxa], columns=rotulos_taxa).assign(Fator=f"Taxa (IPCA+{taxa}%)", Tipo='Taxa')
+    ], ignore_index=True)
+    variacoes = sensibilidade[rotulos_multiplo + rotulos_taxa].to_numpy()
+    sensibilidade['Menor'] = np.nanmin(np.fmin(variacoes, 0.0), axis=1)
+    sensibilidade['Maior'] = np.nanmax(np.fmax(variacoes, 0.0), axis=1)
+    sensibilidade['Amplitude'] = sensibilidade['Maior'] - sensibilidade['Menor']
+    colunas = ['Fator', 'Tipo'] + rotulos_multiplo + rotulos_taxa + ['Menor', 'Maior', 'Amplitude']
+    return sensibilidade[colunas].sort_values('Amplitude', ascending=False, ignore_index=True)
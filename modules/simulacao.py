@@ -0,0 +1,200 @@
+import os
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+import numpy as np
+import pandas as pd
+from modules.memo import CacheLRU, impressao_digital
+from modules.instrumentacao import medido
+
+# Sorteios por bloco: cada bloco é independente (semente própria) e cabe em memória
+TAMANHO_BLOCO = 50_000
+# Abaixo deste volume (sorteios × empresas) os blocos rodam no próprio processo.
+# Um bloco de 50 mil sorteios × 16 empresas custa ~0,07 s e o pool é criado uma
+# vez e reaproveitado: a partir de ~2 milhões (ex.: 16 empresas × 125 mil sorteios,
+# três blocos) distribuir os blocos já compensa o envio dos argumentos e resultados
+LIMITE_PARALELO = 2_000_000
+PERCENTIS = [5, 25, 50, 75, 95]
+
+_cache_simulacoes = CacheLRU(16, nome='simulacoes')
+_pool = None
+_trava_pool = threading.Lock()
+
+def _obter_pool(processos):
+    """
+    Pool de processos reaproveitado entre simulações (criado na primeira simulação grande).
+    Usa 'spawn' para não copiar o estado do servidor do Streamlit para os filhos.
+    """
+    global _pool
+    with _trava_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=processos,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def limiares_writeoff(probabilidades):
+    """
+    Converte probabilidades de write-off em limiares da variável latente normal:
+    a empresa vai a write-off quando a latente fica abaixo do limiar.
+    """
+    normal = NormalDist()
+    return np.array([
+        -np.inf if p <= 0 else np.inf if p >= 1 else normal.inv_cdf(p)
+        for p in np.asarray(probabilidades, dtype=float)
+    ])
+
+def _latentes(rng, n, codigos_setor, n_setores, correlacao):
+    """
+    Sorteia n × empresas normais padrão correlacionadas por setor (cópula gaussiana
+    de um fator): Z = √ρ · fator do setor + √(1-ρ) · choque da empresa.
+    """
+    choques = rng.standard_normal((n, codigos_setor.size))
+    if correlacao <= 0:
+        return choques
+    fatores = rng.standard_normal((n, n_setores))
+    # Em place: escala os fatores antes de expandi-los para as empresas
+    fatores *= np.sqrt(correlacao)
+    choques *= np.sqrt(1 - correlacao)
+    choques += np.take(fatores, codigos_setor, axis=1)
+    return choques
+
+def _simular_bloco(semente, n, valores, log_medianas, volatilidade, limiares,
+                   codigos_setor, n_setores, correlacao, amostras):
+    """
+    Simula um bloco de n carteiras. Retorna (Sale total de cada sorteio,
+    soma do Sale de cada empresa, soma de Sale da empresa × Sale total),
+    acumuladores suficientes para médias e covariâncias com o total.
+    """
+    rng = np.random.default_rng(semente)
+    sobrevive = _latentes(rng, n, codigos_setor, n_setores, correlacao) >= limiares
+    z = _latentes(rng, n, codigos_setor, n_setores, correlacao)
+    multiplos = z * volatilidade
+    multiplos += log_medianas
+    np.exp(multiplos, out=multiplos)
+
+    # Empresas com distribuição empírica: o posto de z no bloco escolhe o quantil da amostra
+    for coluna, amostra in amostras.items():
+        quantis = (np.argsort(np.argsort(z[:, coluna])) + 0.5) / n
+        multiplos[:, coluna] = np.quantile(amostra, quantis)
+
+    multiplos[~sobrevive] = 0.0
+    vendas = multiplos
+    vendas *= valores
+    totais = vendas.sum(axis=1)
+    return totais, vendas.sum(axis=0), vendas.T @ totais
+
+def simular_carteira(valores_investidos, multiplos, prob_writeoff, volatilidade=0.75,
+                     setores=None, correlacao=0.0, amostras_empiricas=None,
+                     n_simulacoes=100_000, semente=None, processos=None):
+    """
+    Simulação de Monte Carlo do Sale da carteira (mesma unidade de 'valores_investidos').
+
+    Cada empresa vai a write-off com probabilidade 'prob_writeoff' (número ou array);
+    caso contrário sai com múltiplo lognormal de mediana igual ao múltiplo informado
+    e desvio 'volatilidade' no log. 'amostras_empiricas' ({posição: múltiplos})
+    troca a lognormal pela distribuição empírica nas empresas indicadas.
+    Se 'setores' for informado, os sorteios de empresas do mesmo setor têm
+    correlação 'correlacao' (cópula gaussiana de um fator).
+
+    Os sorteios rodam em blocos de TAMANHO_BLOCO com sementes independentes
+    (o resultado não depende de quantos processos foram usados); simulações
+    grandes distribuem os blocos em um pool de processos.
+    Retorna (totais, medias_empresa, covariancias_empresa_total).
+    """
+    valores = np.nan_to_num(np.asarray(valores_investidos, dtype=float))
+    multiplos = np.asarray(multiplos, dtype=float)
+    probabilidades = np.broadcast_to(np.asarray(prob_writeoff, dtype=float), valores.shape)
+    # Múltiplo 0 (ou inválido) é write-off certo
+    probabilidades = np.where(np.nan_to_num(multiplos) > 0, probabilidades, 1.0)
+    with np.errstate(divide='ignore'):
+        log_medianas = np.where(multiplos > 0, np.log(np.where(multiplos > 0, multiplos, 1.0)), 0.0)
+    limiares = limiares_writeoff(probabilidades)
+
+    if setores is None:
+        codigos_setor, n_setores = np.arange(valores.size), valores.size
+    else:
+        # Empresa sem setor fica sozinha no próprio grupo (sem correlação com as demais)
+        setores = pd.Series(setores, dtype=object).reset_index(drop=True)
+        setores = setores.where(setores.notna(), pd.Series([f"_{i}" for i in range(valores.size)], dtype=object))
+        codigos_setor, unicos = pd.factorize(setores)
+        n_setores = len(unicos)
+    amostras = {
+        int(posicao): np.sort(np.asarray(amostra, dtype=float))
+        for posicao, amostra in (amostras_empiricas or {}).items()
+        if len(amostra) > 0
+    }
+
+    sementes = np.random.SeedSequence(semente).spawn(-(-n_simulacoes // TAMANHO_BLOCO))
+    tamanhos = [min(TAMANHO_BLOCO, n_simulacoes - i * TAMANHO_BLOCO) for i in range(len(sementes))]
+    argumentos = [
+        (s, n, valores, log_medianas, float(volatilidade), limiares,
+         codigos_setor, n_setores, float(correlacao), amostras)
+        for s, n in zip(sementes, tamanhos)
+    ]
+
+    processos = processos or os.cpu_count() or 1
+    if processos > 1 and len(argumentos) > 1 and n_simulacoes * valores.size >= LIMITE_PARALELO:
+        blocos = list(_obter_pool(processos).map(_simular_bloco, *zip(*argumentos)))
+    else:
+        blocos = [_simular_bloco(*args) for args in argumentos]
+
+    totais = np.concatenate([b[0] for b in blocos])
+    medias = sum(b[1] for b in blocos) / n_simulacoes
+    covariancias = sum(b[2] for b in blocos) / n_simulacoes - medias * totais.mean()
+    return totais, medias, covariancias
+
+def resumir_simulacao(empresas, totais, medias, covariancias, hurdle_nominal):
+    """
+    Resume a simulação: probabilidade de o Sale total atingir o hurdle, percentis
+    do Sale total e a contribuição de cada empresa para a variância do total
+    (Cov(empresa, total) / Var(total), que soma 100%).
+    Retorna (probabilidade, percentis, contribuicoes).
+    """
+    probabilidade = float(np.mean(totais >= hurdle_nominal))
+    percentis = pd.Series(
+        np.percentile(totais, PERCENTIS),
+        index=[f"P{p}" for p in PERCENTIS],
+        name='Sale Total'
+    )
+    variancia = totais.var()
+    contribuicoes = pd.DataFrame({
+        'Empresa': np.asarray(empresas),
+        'Sale Médio': medias,
+        'Contribuição para a Variância (%)': covariancias / variancia * 100 if variancia > 0 else 0.0
+    }).sort_values('Contribuição para a Variância (%)', ascending=False, ignore_index=True)
+    return probabilidade, percentis, contribuicoes
+
+@medido()
+def simular_e_resumir(empresas, valores_investidos, multiplos, hurdle_nominal, **parametros):
+    """
+    Roda simular_carteira e resumir_simulacao. Os sorteios são memorizados pelos
+    parâmetros da simulação (informe 'semente' para que sejam reprodutíveis);
+    mudar só o hurdle refaz apenas o resumo.
+    Retorna (totais, probabilidade, percentis, contribuicoes).
+    """
+    partes = [
+        np.asarray(empresas, dtype=object),
+        np.asarray(valores_investidos, dtype=float),
+        np.asarray(multiplos, dtype=float)
+    ]
+    for nome in sorted(parametros):
+        valor = parametros[nome]
+        if isinstance(valor, dict):
+            valor = repr(sorted((k, np.asarray(v, dtype=float).tolist()) for k, v in valor.items()))
+        elif isinstance(valor, (list, tuple, pd.Series, np.ndarray)):
+            valor = np.asarray(valor, dtype=object)
+        partes += [nome, valor]
+    chave = impressao_digital(*partes)
+
+    simulacao = _cache_simulacoes.obter(chave)
+    if simulacao is None:
+        simulacao = _cache_simulacoes.guardar(
+            chave, simular_carteira(valores_investidos, multiplos, **parametros)
+        )
+    totais, medias, covariancias = simulacao
+    return (totais,) + resumir_simulacao(empresas, totais, medias, covariancias, hurdle_nominal)
@@ -1,9 +1,13 @@
-import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import plotly.graph_objects as go
-import plotly.express as px
+from modules.memo import CacheLRU, memorizar
+from modules.instrumentacao import medido
+
+# Figuras prontas, compartilhadas entre sessões do mesmo processo: entradas iguais
+# (pela impressão digital das colunas usadas) devolvem a mesma figura sem reconstruí-la
+_cache_figuras = CacheLRU(max_itens=64, nome='figuras')
 
 def format_brazil(value):
     """
@@ -12,6 +16,8 @@ def format_brazil(value):
     formatted = f"{value:,.2f}"
     return formatted.replace(',', 'X').replace('.', ',').replace('X', '.')
 
+@medido()
+@memorizar(_cache_figuras)
 def plot_comparativo(empresas, valores_investidos, valores_corrigidos, cor_corrigido, label_corrigido):
     """
     Cria um gráfico comparativo entre valores investidos e corrigidos.
@@ -38,38 +44,79 @@ def plot_comparativo(empresas, valores_investidos, valores_corrigidos, cor_corri
     )
     return fig
 
-def criar_grafico_aportes_no_tempo(df_parcelas):
+# Resoluções do gráfico de aportes: rótulo → frequência do pandas (None = cada data de aporte)
+RESOLUCOES_APORTES = {
+    'Diária': None,
+    'Semanal': 'W',
+    'Mensal': 'M',
+    'Trimestral': 'Q',
+    'Anual': 'Y'
+}
+# Máximo de pontos por série enviados ao navegador
+MAX_PONTOS_APORTES = 500
+
+def _reduzir_pontos(datas, valores, max_pontos):
+    """
+    Reduz uma série em degraus (soma cumulativa) a no máximo 'max_pontos' pontos:
+    divide o período em faixas de mesma duração e mantém o último ponto de cada
+    faixa, de modo que o valor final e os degraus grandes são preservados.
+    """
+    if len(datas) <= max_pontos:
+        return datas, valores
+    tempos = (datas - datas[0]).astype('int64').astype(float)
+    faixas = np.minimum((tempos / max(tempos[-1], 1.0) * max_pontos).astype(int), max_pontos - 1)
+    ultimos = np.flatnonzero(np.r_[faixas[1:] != faixas[:-1], True])
+    return datas[ultimos], valores[ultimos]
+
+@medido()
+def criar_grafico_aportes_no_tempo(df_parcelas, resolucao='Diária', coluna_fundo='Fundo',
+                                   max_pontos=MAX_PONTOS_APORTES):
     """
-    Cria um gráfico de análise de aportes ao longo do tempo.
+    Cria o gráfico da soma cumulativa dos aportes ao longo do tempo.
+    Envia só os pontos em que a soma muda (linha em degraus, line_shape='hv'),
+    agregados pela 'resolucao' (ver RESOLUCOES_APORTES) e limitados a 'max_pontos'
+    por série. Se houver 'coluna_fundo', desenha uma série por fundo.
     """
-    if df_parcelas.empty:
+    parcelas = df_parcelas.dropna(subset=["Data Investimento", "Valor Investido"])
+    if parcelas.empty:
         return None
         
-    min_date = df_parcelas["Data Investimento"].min()
+    min_date = parcelas["Data Investimento"].min()
     current_month_first = pd.to_datetime(datetime.now().strftime("%Y-%m-01"))
+    frequencia = RESOLUCOES_APORTES[resolucao]
     
-    df_agrupado = df_parcelas.groupby("Data Investimento", as_index=False)["Valor Investido"].sum()
-    df_agrupado.sort_values("Data Investimento", inplace=True)
-    df_agrupado["SomaCumulativa"] = df_agrupado["Valor Investido"].cumsum()
-
-    daily_index = pd.date_range(start=min_date, end=current_month_first, freq='D')
-    df_agrupado.set_index("Data Investimento", inplace=True)
-    df_agrupado = df_agrupado.reindex(daily_index, method="ffill").fillna(0)
-    df_agrupado.index.name = "Data Investimento"
+    datas = parcelas["Data Investimento"]
+    if frequencia is not None:
+        # Cada aporte entra no início do período (semana, mês, trimestre, ano) em que ocorreu
+        datas = datas.dt.to_period(frequencia).dt.start_time
+    if coluna_fundo in parcelas.columns:
+        fundos = parcelas[coluna_fundo]
+    else:
+        fundos = pd.Series('Cumulativo', index=parcelas.index)
+    grupos = parcelas["Valor Investido"].groupby([fundos.rename('Fundo'), datas.rename('Data')]).sum()
+    uma_serie = grupos.index.get_level_values('Fundo').nunique() == 1
 
     fig = go.Figure()
-    fig.add_trace(
-        go.Scatter(
-            x=daily_index,
-            y=df_agrupado["SomaCumulativa"],
-            mode='lines+markers',
-            line=dict(color='orange'),
-            marker=dict(color='orange'),
-            name='Cumulativo'
+    for fundo, serie in grupos.groupby(level='Fundo', sort=False):
+        datas_fundo = serie.index.get_level_values('Data').to_numpy(dtype='datetime64[ns]')
+        acumulado = serie.to_numpy().cumsum()
+        datas_fundo, acumulado = _reduzir_pontos(datas_fundo, acumulado, max_pontos)
+        # Último degrau estendido até o mês atual
+        if datas_fundo[-1] < np.datetime64(current_month_first, 'ns'):
+            datas_fundo = np.append(datas_fundo, np.datetime64(current_month_first, 'ns'))
+            acumulado = np.append(acumulado, acumulado[-1])
+        fig.add_trace(
+            go.Scatter(
+                x=datas_fundo,
+                y=acumulado,
+                mode='lines+markers',
+                line=dict(color='orange', shape='hv') if uma_serie else dict(shape='hv'),
+                marker=dict(color='orange', size=5) if uma_serie else dict(size=5),
+                name=str(fundo)
+            )
         )
-    )
     fig.update_layout(
-        title="Período de Investimentos (Trimestral) - Soma Cumulativa",
+        title=f"Período de Investimentos ({resolucao}) - Soma Cumulativa",
         xaxis_title="Data",
         xaxis=dict(
             type='date',
@@ -83,6 +130,8 @@ def criar_grafico_aportes_no_tempo(df_parcelas):
     )
     return fig
 
+@medido()
+@memorizar(_cache_figuras, colunas={'edited_df': ['Valor Investido', 'Múltiplo', 'Write-off']})
 def criar_grafico_distribuicao_portfolio(edited_df):
     """
     Cria um gráfico pizza que mostra a distribuição do portfólio entre vendas, write-offs e sem saída.
@@ -94,7 +143,7 @@ def criar_grafico_distribuicao_portfolio(edited_df):
     
     # Calcular totais
     total_writeoffs = writeoffs_df['Valor Investido'].sum() if not writeoffs_df.empty else 0
-    total_vendas = vendas_df.apply(lambda row: row['Valor Investido'] * row['Múltiplo'], axis=1).sum() if not vendas_df.empty else 0
+    total_vendas = (vendas_df['Valor Investido'] * vendas_df['Múltiplo']).sum() if not vendas_df.empty else 0
     total_sem_saida = sem_saida_df['Valor Investido'].sum() if not sem_saida_df.empty else 0
     
     # Criar dados para gráfico de pizza
@@ -124,6 +173,8 @@ def criar_grafico_distribuicao_portfolio(edited_df):
     else:
         return None, 0, 0, 0
 
+@medido()
+@memorizar(_cache_figuras, colunas={'df_ativos': ['Empresa', 'Participação do Fundo (%)']})
 def criar_grafico_participacao_fundo(df_ativos):
     """
     Cria um gráfico de barras da participação do fundo por empresa.
@@ -140,6 +191,7 @@ def criar_grafico_participacao_fundo(df_ativos):
     )
     return fig
 
+@medido()
 def criar_grafico_hurdle_vs_realizado(total_sale, hurdle_nominal, total_writeoff=0):
     """
     Cria um gráfico comparando o valor de venda realizado versus o hurdle.
@@ -156,6 +208,106 @@ def criar_grafico_hurdle_vs_realizado(total_sale, hurdle_nominal, total_writeoff
     )
     return fig
 
+@medido()
+def criar_grafico_tornado(sensibilidade, max_fatores=15):
+    """
+    Cria o gráfico tornado: para cada fator, a maior queda e a maior alta de
+    (Sale total − hurdle), do fator de maior amplitude (no topo) para o menor.
+    """
+    dados = sensibilidade.head(max_fatores).iloc[::-1]
+    fig = go.Figure(data=[
+        go.Bar(name='Queda', y=dados['Fator'], x=dados['Menor'], orientation='h', marker_color='#F44336'),
+        go.Bar(name='Alta', y=dados['Fator'], x=dados['Maior'], orientation='h', marker_color='#4CAF50')
+    ])
+    fig.update_layout(
+        barmode='overlay',
+        xaxis_title='Variação de Sale − Hurdle (R$ mil)',
+        template='plotly_dark',
+        title="Sensibilidade (Tornado)"
+    )
+    return fig
+
+@medido()
+def criar_grafico_fronteira(fronteira, multiplo_maximo=None):
+    """
+    Cria o gráfico da fronteira: múltiplo necessário em função de quantas
+    das maiores empresas saem com ele.
+    """
+    fig = go.Figure(data=[go.Scatter(
+        x=fronteira['Empresas'],
+        y=fronteira['Múltiplo Necessário'],
+        mode='lines+markers',
+        line=dict(color='orange'),
+        marker=dict(color='orange'),
+        name='Múltiplo Necessário'
+    )])
+    if multiplo_maximo is not None:
+        fig.add_hline(y=multiplo_maximo, line_dash='dash', line_color='#F44336', annotation_text='Teto')
+    fig.update_layout(
+        xaxis_title='Número de empresas (maiores investimentos primeiro)',
+        yaxis_title='Múltiplo de saída necessário',
+        template='plotly_dark',
+        title="Fronteira: Empresas × Múltiplo"
+    )
+    return fig
+
+@medido()
+def criar_grafico_comparacao_cenarios(comparacao, hurdle_nominal):
+    """
+    Cria um gráfico com Sale e perda com write-offs de cada cenário, com o hurdle como referência.
+    """
+    fig = go.Figure(data=[
+        go.Bar(name='Sale', x=comparacao.index, y=comparacao['Sale'], marker_color='#4CAF50'),
+        go.Bar(name='Perda Write-off', x=comparacao.index, y=comparacao['Perda Write-off'], marker_color='#F44336')
+    ])
+    fig.add_hline(
+        y=hurdle_nominal,
+        line_dash='dash',
+        line_color='#8BC34A',
+        annotation_text='Hurdle',
+        annotation_position='top left'
+    )
+    fig.update_layout(
+        barmode='group',
+        yaxis_title='Valores (R$ mil)',
+        template='plotly_dark',
+        title="Comparativo de Cenários"
+    )
+    return fig
+
+@medido()
+def criar_grafico_simulacao(totais, hurdle_nominal, n_faixas=60):
+    """
+    Cria o histograma do Sale total simulado, com o hurdle como referência.
+    Envia ao navegador só as faixas do histograma, não os sorteios.
+    """
+    contagens, limites = np.histogram(totais, bins=n_faixas)
+    centros = (limites[:-1] + limites[1:]) / 2
+    fig = go.Figure(data=[go.Bar(
+        x=centros,
+        y=contagens / contagens.sum() * 100,
+        width=np.diff(limites),
+        marker_color='#2196F3',
+        name='Sale Total'
+    )])
+    fig.add_vline(
+        x=hurdle_nominal,
+        line_dash='dash',
+        line_color='#8BC34A',
+        annotation_text='Hurdle',
+        annotation_position='top right'
+    )
+    fig.update_layout(
+        xaxis_title='Sale Total (R$ mil)',
+        yaxis_title='Frequência (%)',
+        bargap=0,
+        template='plotly_dark',
+        title="Distribuição Simulada do Sale Total"
+    )
+    return fig
+
+@medido()
+@memorizar(_cache_figuras, colunas={'filtered': ['Valor Investido', 'FV Part.', 'IPCA+6%', 'Sale']})
 def criar_grafico_uplift_empresa(empresa, filtered):
     """
     Cria um gráfico de análise de uplift para uma empresa específica.
@@ -232,6 +384,8 @@ def criar_grafico_uplift_empresa(empresa, filtered):
     
     return fig_uplift
 
+@medido()
+@memorizar(_cache_figuras, colunas={'investimentos_ativos': ['Empresa', 'Valor Investido']})
 def criar_comparativo_valores(investimentos_ativos, valores_aprovados=None, valores_corrigidos=None, label_corrigido="", cor_corrigido="#FF5722"):
     """
     Cria um gráfico comparativo entre diferentes valores (aprovado, investido, corrigido, etc).
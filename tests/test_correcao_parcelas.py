@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from data_utils import calcular_grade_correcao, coluna_da_grade
+from modules.engine import grade_correcao_da_carteira
+
+def test_empresas_com_parcelas_sao_corrigidas_parcela_a_parcela():
+    investimentos = pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta'],
+        'Valor Investido': [3000.0, 1000.0],
+        'Data do Primeiro Investimento': ['01/03/2018', '15/06/2020']
+    })
+    parcelas = pd.DataFrame({
+        'Empresa': ['ALFA', 'Alfa', 'Alfa', 'Gama'],
+        'Data Investimento': pd.to_datetime(['2018-03-01', '2021-09-10', '2023-01-05', '2019-01-01']),
+        # A distribuição (negativa) e a empresa fora da carteira não entram
+        'Valor Investido': [1_000_000.0, 2_000_000.0, -500_000.0, 700_000.0]
+    })
+    grade = grade_correcao_da_carteira(investimentos, parcelas)
+
+    por_parcela = calcular_grade_correcao(
+        np.array([1000.0, 2000.0]), pd.to_datetime(['2018-03-01', '2021-09-10']).to_numpy()
+    ).sum(axis=0)
+    primeira_data = calcular_grade_correcao(investimentos['Valor Investido'], investimentos['Data do Primeiro Investimento'])
+    np.testing.assert_allclose(grade[0], por_parcela)
+    np.testing.assert_allclose(grade[1], primeira_data[1])
+    # Corrigir tudo desde a primeira data superestima o valor da Alfa
+    assert coluna_da_grade(grade, 9.0)[0] < coluna_da_grade(primeira_data, 9.0)[0]
+
+def test_sem_parcelas_usa_a_primeira_data():
+    investimentos = pd.DataFrame({
+        'Empresa': ['Alfa'],
+        'Valor Investido': [3000.0],
+        'Data do Primeiro Investimento': ['01/03/2018']
+    })
+    vazio = pd.DataFrame(columns=['Empresa', 'Data Investimento', 'Valor Investido'])
+    esperada = calcular_grade_correcao(investimentos['Valor Investido'], investimentos['Data do Primeiro Investimento'])
+    np.testing.assert_allclose(grade_correcao_da_carteira(investimentos, vazio), esperada)
+    np.testing.assert_allclose(grade_correcao_da_carteira(investimentos), esperada)
+
+def _parcelas_alfa():
+    return pd.DataFrame({
+        'Empresa': ['Alfa', 'Alfa', 'Alfa'],
+        'Data Investimento': pd.to_datetime(['2018-03-01', '2021-09-10', '2023-01-05']),
+        'Valor Investido': [1_000_000.0, 2_000_000.0, -5_000_000.0]
+    })
+
+def test_crescimento_usa_o_mesmo_ipca_6_da_correcao_por_parcela():
+    from modules.engine import montar_carteira, calcular_resultados
+    investimentos = pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta'],
+        'Valor Investido até a presente data (R$ mil)': [3000.0, 1000.0],
+        'Participação do Fundo (%)': [30.0, 20.0],
+        'Data do Primeiro Investimento': ['01/03/2018', '15/06/2020'],
+        'Múltiplo': [2.0, 1.0]
+    })
+    carteira = investimentos.rename(columns={'Valor Investido até a presente data (R$ mil)': 'Valor Investido'})
+    carteira['Fair Value'] = [1500.0, 900.0]
+    resultados = calcular_resultados(montar_carteira(carteira), investimentos, 9.0, _parcelas_alfa())
+
+    crescimento = resultados['analise_crescimento']['IPCA+6%'].to_numpy()
+    np.testing.assert_allclose(crescimento, resultados['correcao']['Corrigido IPCA+6%'].round(2))
+
+def test_painel_de_aportes_e_grade_ignoram_as_mesmas_distribuicoes():
+    from data_utils import corrigir_ipca_lote
+    from modules.parcelas import corrigir_parcelas_por_empresa
+    parcelas = _parcelas_alfa()
+    investimentos = pd.DataFrame({
+        'Empresa': ['Alfa'], 'Valor Investido': [3000.0], 'Data do Primeiro Investimento': ['01/03/2018']
+    })
+    por_empresa = corrigir_parcelas_por_empresa(parcelas, corrigir_ipca_lote, adicional=9.0)
+    assert por_empresa['Parcelas'].tolist() == [2]
+    assert por_empresa['Valor Investido'].tolist() == [3_000_000.0]
+    grade = grade_correcao_da_carteira(investimentos, parcelas)
+    np.testing.assert_allclose(por_empresa['Valor Corrigido'] / 1000, coluna_da_grade(grade, 9.0))
+
+def test_grade_refeita_quando_a_serie_do_ipca_muda(monkeypatch):
+    import data_utils
+    from benchmarks.sintetico import gerar_ipca
+
+    def usar_serie(serie):
+        monkeypatch.setattr(data_utils, 'obter_ipca', lambda: serie)
+        data_utils.construir_indice_ipca.clear()
+
+    valores, datas = np.array([1000.0, 2000.0]), ['01/03/2018', '15/06/2020']
+    try:
+        usar_serie(gerar_ipca(semente=1))
+        antes = calcular_grade_correcao(valores, datas)
+        # Série sincronizada (nova versão do IPCA): a grade em cache não é reaproveitada
+        serie = gerar_ipca(semente=1)
+        serie.iloc[-1] = [1.0, 0.01]
+        usar_serie(serie)
+        depois = calcular_grade_correcao(valores, datas)
+    finally:
+        data_utils.construir_indice_ipca.clear()
+    assert not np.allclose(antes, depois)
@@ -0,0 +1,22 @@
+import warnings
+import datetime
+import numpy as np
+import pandas as pd
+from data_utils import converter_datas
+
+def test_formatos_misturados():
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        datas = converter_datas([
+            '05/05/2017', '17/08/16', '1/2/19', datetime.datetime(2019, 1, 2),
+            pd.Timestamp('2020-02-03'), '2018-03-01', None, 'sem data'
+        ])
+    esperadas = np.array([
+        '2017-05-05', '2016-08-17', '2019-02-01', '2019-01-02',
+        '2020-02-03', '2018-03-01', 'NaT', 'NaT'
+    ], dtype='datetime64[ns]')
+    np.testing.assert_array_equal(datas, esperadas)
+
+def test_formato_da_primeira_data_nao_se_impoe_as_demais():
+    datas = converter_datas(['17/08/16', '05/05/2017'])
+    np.testing.assert_array_equal(datas, np.array(['2016-08-17', '2017-05-05'], dtype='datetime64[ns]'))
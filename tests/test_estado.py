@@ -0,0 +1,31 @@
+import pandas as pd
+from modules.estado import CarteiraBase, EstadoCarteira
+
+def _carteira():
+    return EstadoCarteira(CarteiraBase(pd.DataFrame({
+        'Empresa': ['A', 'B', 'C'],
+        'Múltiplo': [1.0, 0.0, 2.0],
+        'Valor Investido': [100, 200, 300],
+    })))
+
+def test_definir_multiplo_grava_so_a_linha_e_segue_o_writeoff():
+    carteira = _carteira()
+    df = carteira.df
+    assert carteira.definir_multiplo('A', 3.5)
+    assert carteira.df is not df
+    assert carteira.definir_multiplo('A', 0)
+    assert carteira.writeoff('A')
+    assert carteira.df['Múltiplo'].tolist() == [0.0, 0.0, 2.0]
+    assert carteira.df['Write-off'].tolist() == [True, True, False]
+    # A base compartilhada não muda
+    assert carteira.base.df['Múltiplo'].tolist() == [1.0, 0.0, 2.0]
+
+def test_valores_seguidos_gravam_o_ultimo_e_voltar_a_base_descarta_a_alteracao():
+    carteira = _carteira()
+    for valor in (1.5, 2.0, 2.5):
+        carteira.definir_multiplo('C', valor)
+    assert carteira.multiplo('C') == 2.5
+    assert carteira.alteradas_desde(0) == ['C']
+    assert not carteira.definir_multiplo('C', 2.5)
+    carteira.definir_multiplo('C', 2.0)
+    assert carteira._multiplos == {}
@@ -0,0 +1,89 @@
+import os
+import functools
+import pandas as pd
+import data_utils
+from modules.planilhas import ler_planilha
+from modules.fundos import carregar_fundos, _carregar_fundos
+from modules.engine import consolidar_fundos
+from modules.instrumentacao import contadores
+
+def _gravar_fundo(diretorio, multiplos):
+    os.makedirs(diretorio)
+    pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta'],
+        'Valor Primatec (R$ mil)': [1500, 900]
+    }).to_excel(os.path.join(diretorio, 'fair_value.xlsx'), index=False)
+    pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta'],
+        'Valor Aprovado em CI (R$ mil)': [1000, 2000],
+        'Valor Investido até a presente data (R$ mil)': [1000, 2000],
+        'Participação do Fundo (%)': [30.0, 20.0],
+        'Data do Primeiro Investimento': ['05/05/2017', '12/06/2018'],
+        'Múltiplo': multiplos,
+        'Write-off': [False, False]
+    }).to_excel(os.path.join(diretorio, 'investimentos.xlsx'), index=False)
+    return {
+        'fair_value': os.path.join(diretorio, 'fair_value.xlsx'),
+        'investimentos': os.path.join(diretorio, 'investimentos.xlsx'),
+        'hurdle_nominal': None
+    }
+
+def test_fundos_em_diretorios_separados(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache')
+    monkeypatch.setattr(data_utils, 'ler_planilha', functools.partial(ler_planilha, diretorio_cache=cache))
+    registro = {
+        'Fundo A': _gravar_fundo(str(tmp_path / 'a'), [2, 1]),
+        'Fundo B': _gravar_fundo(str(tmp_path / 'b'), [0, 3])
+    }
+
+    _carregar_fundos.clear()
+    dados = carregar_fundos(registro)
+    assert dados['Fundo A'][1]['Múltiplo'].tolist() == [2, 1]
+    assert dados['Fundo B'][1]['Múltiplo'].tolist() == [0, 3]
+    # Quatro planilhas de nomes repetidos, quatro entradas no cache
+    assert len([n for n in os.listdir(cache) if n.endswith('.parquet')]) == 4
+
+    # Segunda carga: todas as planilhas vêm do Parquet
+    faltas = contadores().get('planilhas', {}).get('faltas', 0)
+    _carregar_fundos.clear()
+    assert carregar_fundos(registro)['Fundo B'][1]['Múltiplo'].tolist() == [0, 3]
+    assert contadores()['planilhas']['faltas'] == faltas
+
+    tabela = consolidar_fundos(dados, 9.0).set_index('Fundo')
+    assert tabela.loc['Fundo A', 'Write-offs'] == 0
+    assert tabela.loc['Fundo B', 'Write-offs'] == 1000
+    assert tabela.loc['Fundo B', 'Sale'] == 6000
+    assert tabela.loc['Consolidado', 'Write-offs'] == 1000
+    assert tabela.loc['Consolidado', 'Sale'] == 2000 + 2000 + 6000
+
+def test_writeoffs_iguais_no_resultado_no_consolidado_e_no_cli(tmp_path, monkeypatch, capsys):
+    import json
+    import antera
+    from modules import engine, cenarios_local
+
+    cache = str(tmp_path / 'cache')
+    monkeypatch.setattr(data_utils, 'ler_planilha', functools.partial(ler_planilha, diretorio_cache=cache))
+    registro = {'Fundo': _gravar_fundo(str(tmp_path / 'fundo'), [0, 3])}
+    _carregar_fundos.clear()
+    dados = carregar_fundos(registro)
+
+    carteira = engine.montar_carteira(engine.preparar_dados_iniciais(*dados['Fundo']))
+    totais = engine.calcular_resultados(carteira, dados['Fundo'][1], 9.0)['totais']
+    consolidado = consolidar_fundos(dados, 9.0).set_index('Fundo').loc['Consolidado']
+    assert totais['writeoff'] == consolidado['Write-offs'] == 1000
+    assert totais['sale'] == consolidado['Sale'] == 6000
+
+    # Cenário que leva a Beta a write-off: resumo e comparação de cenários concordam
+    monkeypatch.setattr(engine, 'carregar_dados', lambda: dados['Fundo'])
+    monkeypatch.setattr(engine, 'carregar_parcelas_investimento', lambda: None)
+    cenario = {'Beta': {'Múltiplo': 0.0, 'Write-off': True}}
+    monkeypatch.setattr(cenarios_local, 'carregar_todos', lambda: {'Perda': cenario})
+    assert antera.main(['report', '--scenario', 'Perda', '--tabelas', 'resumo', 'cenarios', '--formato', 'csv']) == 0
+    saida = capsys.readouterr().out
+    resumo = dict(linha.rsplit(',', 1) for linha in saida.splitlines() if linha.startswith(('Write-offs', 'Sale total')))
+    assert float(resumo['Write-offs']) == 3000
+    assert float(resumo['Sale total']) == 0
+
+    tabelas = engine.gerar_relatorio(*dados['Fundo'], 117000, 9.0, cenario, {'Perda': cenario})
+    perda = tabelas['cenarios'].set_index('Cenário').loc['Perda', 'Perda Write-off']
+    assert perda == float(resumo['Write-offs'])
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+import pandas as pd
+from modules.estado import EstadoCarteira
+from modules.engine import montar_carteira, calcular_resultados
+from modules.incremental import RecalculoIncremental
+
+def _dados():
+    investimentos = pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta', 'Gama', 'Delta'],
+        'Valor Investido até a presente data (R$ mil)': [1000.0, 2000.0, 1500.0, 800.0],
+        'Participação do Fundo (%)': [30.0, 20.0, 10.0, 5.0],
+        'Data do Primeiro Investimento': pd.to_datetime(['2017-05-05', '2018-06-12', '2019-01-10', '2020-03-02']),
+        'Múltiplo': [2.0, 0.0, 1.5, 1.0]
+    })
+    carteira = investimentos.rename(columns={'Valor Investido até a presente data (R$ mil)': 'Valor Investido'})
+    carteira['Fair Value'] = [1500.0, np.nan, 2000.0, 700.0]
+    return investimentos, montar_carteira(carteira)
+
+def _conferir(recalculo, estado, investimentos, taxa, parcelas=None):
+    incremental = recalculo.resultados(estado, investimentos, taxa, versao_dados='v1', parcelas=parcelas)
+    completo = calcular_resultados(estado.df, investimentos, taxa, parcelas)
+    for nome, valor in completo['totais'].items():
+        assert incremental['totais'][nome] == pytest.approx(valor, abs=1e-6), nome
+    pd.testing.assert_frame_equal(
+        incremental['analise_crescimento'].reset_index(drop=True),
+        completo['analise_crescimento'][incremental['analise_crescimento'].columns].reset_index(drop=True),
+        check_dtype=False
+    )
+
+@pytest.mark.parametrize('parcelas', [None, pd.DataFrame({
+    'Empresa': ['Alfa', 'Alfa', 'Gama'],
+    'Data Investimento': pd.to_datetime(['2017-05-05', '2021-02-01', '2019-01-10']),
+    'Valor Investido': [400_000.0, 600_000.0, 1_500_000.0]
+})])
+def test_totais_atualizados_pela_diferenca_iguais_ao_recalculo_completo(parcelas):
+    investimentos, carteira = _dados()
+    estado = EstadoCarteira(carteira)
+    recalculo = RecalculoIncremental()
+    _conferir(recalculo, estado, investimentos, 9.0, parcelas)
+    assert recalculo.resultados(estado, investimentos, 9.0, versao_dados='v1', parcelas=parcelas)['totais']['writeoff'] == 2000
+
+    edicoes = [
+        lambda: estado.definir_multiplo('Alfa', 3.25),
+        lambda: estado.definir_writeoff('Gama', True),
+        lambda: estado.definir_writeoff('Beta', False),
+        lambda: estado.definir_multiplo('Delta', 0),
+        lambda: estado.aplicar_edicoes({0: {'Múltiplo': 0.5}, 2: {'Write-off': False}}),
+    ]
+    for editar in edicoes:
+        editar()
+        _conferir(recalculo, estado, investimentos, 6.0, parcelas)
@@ -0,0 +1,141 @@
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pandas as pd
+import pytest
+import requests
+import modules.ipca_local as ipca_local
+from modules.ipca_local import baixar_serie_bcb, sincronizar_ipca, precisa_sincronizar, ler_serie_local
+
+def _meses(inicio, fim):
+    return [
+        {'data': data.strftime('%d/%m/%Y'), 'valor': f"{0.1 + i / 100:.2f}"}
+        for i, data in enumerate(pd.date_range(inicio, fim, freq='MS'))
+    ]
+
+class ServidorBCB:
+    """
+    Substituto local da API SGS: responde à série com os registros de 'serie',
+    filtrados por dataInicial/dataFinal como a API real (404 sem meses no período).
+    'falhas' respostas 503 (ou atrasos de 'atraso' segundos) precedem as normais.
+    """
+
+    def __init__(self, serie):
+        self.serie = serie
+        self.falhas = 0
+        self.atraso = 0
+        self.consultas = []
+        servidor = self
+
+        class Tratador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+                servidor.consultas.append(params)
+                if servidor.atraso:
+                    time.sleep(servidor.atraso)
+                if servidor.falhas > 0:
+                    servidor.falhas -= 1
+                    self._responder(503, b'')
+                    return
+                registros = servidor.serie
+                if 'dataInicial' in params:
+                    inicio = pd.to_datetime(params['dataInicial'], format='%d/%m/%Y')
+                    fim = pd.to_datetime(params['dataFinal'], format='%d/%m/%Y')
+                    registros = [
+                        r for r in registros
+                        if inicio <= pd.to_datetime(r['data'], format='%d/%m/%Y') <= fim
+                    ]
+                    if not registros:
+                        self._responder(404, b'{"error": "Value(s) not found"}')
+                        return
+                self._responder(200, json.dumps(registros).encode())
+
+            def _responder(self, status, corpo):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._http = ThreadingHTTPServer(('127.0.0.1', 0), Tratador)
+        self.url = f"http://127.0.0.1:{self._http.server_address[1]}/dados/serie/bcdata.sgs.433/dados"
+        threading.Thread(target=self._http.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+@pytest.fixture
+def servidor(monkeypatch):
+    monkeypatch.setattr(ipca_local, 'ESPERA_ENTRE_TENTATIVAS', 0)
+    mes_anterior = pd.Timestamp.now().normalize().replace(day=1) - pd.DateOffset(months=1)
+    servidor = ServidorBCB(_meses('2015-01-01', mes_anterior - pd.DateOffset(months=3)))
+    servidor.mes_anterior = mes_anterior
+    yield servidor
+    servidor.fechar()
+
+def test_sincronizacao_inicial_completa(servidor, tmp_path):
+    caminho = str(tmp_path / 'ipca.sqlite')
+    assert sincronizar_ipca(caminho, url=servidor.url) == len(servidor.serie)
+    assert 'dataInicial' not in servidor.consultas[0]
+    serie = ler_serie_local(caminho)
+    assert len(serie) == len(servidor.serie)
+    assert serie['valor'].iloc[0] == pytest.approx(0.1)
+
+def test_sincronizacao_incremental_busca_so_meses_novos(servidor, tmp_path):
+    caminho = str(tmp_path / 'ipca.sqlite')
+    sincronizar_ipca(caminho, url=servidor.url)
+    ultimo = pd.to_datetime(servidor.serie[-1]['data'], format='%d/%m/%Y')
+    novos = _meses(ultimo + pd.DateOffset(months=1), servidor.mes_anterior)
+    servidor.serie = servidor.serie + novos
+
+    assert sincronizar_ipca(caminho, url=servidor.url) == len(novos)
+    consulta = servidor.consultas[-1]
+    assert consulta['dataInicial'] == (ultimo + pd.DateOffset(months=1)).strftime('%d/%m/%Y')
+    assert len(ler_serie_local(caminho)) == len(servidor.serie)
+
+def test_404_em_consulta_por_periodo_e_ausencia_de_meses_novos(servidor, tmp_path):
+    caminho = str(tmp_path / 'ipca.sqlite')
+    sincronizar_ipca(caminho, url=servidor.url)
+    assert sincronizar_ipca(caminho, url=servidor.url) == 0
+    assert 'dataInicial' in servidor.consultas[-1]
+    assert len(ler_serie_local(caminho)) == len(servidor.serie)
+
+def test_novas_tentativas_apos_erro_5xx(servidor):
+    servidor.falhas = 2
+    assert len(baixar_serie_bcb(url=servidor.url, tentativas=3)) == len(servidor.serie)
+    assert len(servidor.consultas) == 3
+
+    servidor.falhas = 5
+    with pytest.raises(ConnectionError, match='503'):
+        baixar_serie_bcb(url=servidor.url, tentativas=2)
+
+def test_timeout_de_leitura(servidor):
+    servidor.atraso = 0.5
+    with pytest.raises(ConnectionError):
+        baixar_serie_bcb(url=servidor.url, timeout=(1, 0.1), tentativas=2)
+    assert len(servidor.consultas) == 2
+
+def test_serie_em_dia_nao_consulta_a_api(servidor, tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'ipca.sqlite')
+    servidor.serie = _meses('2015-01-01', servidor.mes_anterior)
+    sincronizar_ipca(caminho, url=servidor.url)
+    consultas = len(servidor.consultas)
+
+    def sem_rede(*args, **kwargs):
+        raise AssertionError("precisa_sincronizar não deve acessar a rede")
+    monkeypatch.setattr(requests, 'get', sem_rede)
+    assert precisa_sincronizar(caminho) is False
+    assert len(servidor.consultas) == consultas
+
+def test_tentativa_recente_adia_a_sincronizacao(servidor, tmp_path):
+    caminho = str(tmp_path / 'ipca.sqlite')
+    sincronizar_ipca(caminho, url=servidor.url)
+    # Falta o último mês, mas a tentativa acabou de ser feita
+    assert precisa_sincronizar(caminho) is False
+    assert precisa_sincronizar(caminho, intervalo=0) is True
@@ -0,0 +1,70 @@
+import os
+import pandas as pd
+from modules.planilhas import ler_planilha
+from modules.instrumentacao import contadores
+
+def _conversor_csv(caminho):
+    return pd.read_csv(caminho)
+
+def _planilha(diretorio, valores):
+    os.makedirs(diretorio, exist_ok=True)
+    caminho = os.path.join(diretorio, 'investimentos.xlsx')
+    pd.DataFrame({'Empresa': ['A', 'B'], 'Valor': valores}).to_csv(caminho, index=False)
+    return caminho
+
+def _faltas():
+    return contadores().get('planilhas', {}).get('faltas', 0)
+
+def test_planilhas_de_mesmo_nome_em_diretorios_diferentes(tmp_path):
+    cache = str(tmp_path / 'cache')
+    fundo_a = _planilha(str(tmp_path / 'a'), [1, 2])
+    fundo_b = _planilha(str(tmp_path / 'b'), [3, 4])
+
+    for caminho in (fundo_a, fundo_b):
+        ler_planilha(caminho, conversor=_conversor_csv, diretorio_cache=cache)
+    assert len([n for n in os.listdir(cache) if n.endswith('.parquet')]) == 2
+
+    # Já convertidas: nenhuma das duas volta a ser lida do arquivo original
+    faltas = _faltas()
+    lido_a = ler_planilha(fundo_a, conversor=_conversor_csv, diretorio_cache=cache)
+    lido_b = ler_planilha(fundo_b, conversor=_conversor_csv, diretorio_cache=cache)
+    assert _faltas() == faltas
+    assert lido_a['Valor'].tolist() == [1, 2]
+    assert lido_b['Valor'].tolist() == [3, 4]
+
+def _conversor_dobro(caminho):
+    df = pd.read_csv(caminho)
+    df['Valor'] *= 2
+    return df
+
+def test_conversores_e_versoes_diferentes_nao_compartilham_o_cache(tmp_path):
+    cache = str(tmp_path / 'cache')
+    caminho = _planilha(str(tmp_path / 'a'), [1, 2])
+
+    assert ler_planilha(caminho, conversor=_conversor_dobro, diretorio_cache=cache)['Valor'].tolist() == [2, 4]
+    # Mesma planilha com outro conversor: não recebe a conversão anterior
+    assert ler_planilha(caminho, conversor=_conversor_csv, diretorio_cache=cache)['Valor'].tolist() == [1, 2]
+    faltas = _faltas()
+    assert ler_planilha(caminho, conversor=_conversor_dobro, diretorio_cache=cache)['Valor'].tolist() == [2, 4]
+    assert _faltas() == faltas
+
+    # Nova versão do conversor: reconverte e substitui a entrada da versão anterior
+    ler_planilha(caminho, conversor=_conversor_dobro, diretorio_cache=cache, versao_conversor=2)
+    assert _faltas() == faltas + 1
+    ler_planilha(caminho, conversor=_conversor_dobro, diretorio_cache=cache, versao_conversor=2)
+    assert _faltas() == faltas + 1
+    assert len([n for n in os.listdir(cache) if n.endswith('.parquet')]) == 2
+
+def test_falha_na_gravacao_nao_deixa_arquivo_parcial(tmp_path, monkeypatch):
+    cache = str(tmp_path / 'cache')
+    caminho = _planilha(str(tmp_path / 'a'), [1, 2])
+
+    def falhar(self, destino, **kwargs):
+        with open(destino, 'wb') as f:
+            f.write(b'PAR1')
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', falhar)
+    lido = ler_planilha(caminho, conversor=_conversor_csv, diretorio_cache=cache)
+    assert lido['Valor'].tolist() == [1, 2]
+    assert os.listdir(cache) == []
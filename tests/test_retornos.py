@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+from modules.retornos import xirr_lote, calcular_retornos
+
+DATA_BASE = pd.Timestamp('2024-06-30')
+
+def _dias_antes(dias):
+    return DATA_BASE - pd.Timedelta(days=dias)
+
+def test_xirr_lote_resolve_varios_grupos_de_uma_vez():
+    tir = xirr_lote(
+        fluxos=[-100, 121, -1000, 300, 500, 600, -100, -50],
+        anos=[0, 2, 0, 1, 2, 3, 0, 1],
+        grupos=[0, 0, 1, 1, 1, 1, 2, 2],
+        n_grupos=3
+    )
+    assert tir[0] == pytest.approx(0.10)
+    # Raiz do VPL de -1000, 300, 500 e 600 em 0, 1, 2 e 3 anos
+    assert tir[1] == pytest.approx(0.16795, abs=1e-5)
+    assert -1000 + 300 / (1 + tir[1]) + 500 / (1 + tir[1]) ** 2 + 600 / (1 + tir[1]) ** 3 == pytest.approx(0, abs=1e-6)
+    # Só saídas de caixa: o VPL não troca de sinal e não há TIR
+    assert np.isnan(tir[2])
+
+def test_retornos_por_empresa_e_do_fundo():
+    parcelas = pd.DataFrame({
+        # Grafias diferentes da mesma empresa são agrupadas pelo nome normalizado
+        'Empresa': ['ALFA ', 'Beta', 'Delta', 'Délta', 'Fora da carteira'],
+        'Data Investimento': [_dias_antes(730), _dias_antes(365), _dias_antes(730), _dias_antes(365), _dias_antes(100)],
+        # Valores em R$; a parcela negativa é uma distribuição recebida
+        'Valor Investido': [1_000_000.0, 500_000.0, 1_000_000.0, -500_000.0, 300_000.0]
+    })
+    carteira = pd.DataFrame({
+        'Empresa': ['Alfa', 'Beta', 'Gama', 'Delta'],
+        'Valor Investido': [1000.0, 500.0, 700.0, 1000.0],
+        'Múltiplo': [1.21, 0.0, 2.0, 0.8]
+    })
+    retornos = calcular_retornos(parcelas, carteira, data_base=DATA_BASE).set_index('Empresa')
+
+    alfa = retornos.loc['Alfa']
+    assert alfa['TIR (% a.a.)'] == pytest.approx(10.0)
+    assert (alfa['TVPI'], alfa['DPI'], alfa['RVPI']) == pytest.approx((1.21, 0.0, 1.21))
+
+    # Write-off: nada recebido, TIR de -100%
+    assert retornos.loc['Beta', 'TIR (% a.a.)'] == -100.0
+    assert retornos.loc['Beta', 'TVPI'] == 0.0
+
+    # Empresa sem parcelas no ledger: sem indicadores e fora do fundo
+    assert retornos.loc['Gama', ['TVPI', 'DPI', 'RVPI', 'TIR (% a.a.)']].isna().all()
+    assert retornos.attrs['empresas_sem_parcelas'] == ['Gama']
+
+    delta = retornos.loc['Delta']
+    assert (delta['Aportado'], delta['Distribuído'], delta['Valor de Saída']) == pytest.approx((1000.0, 500.0, 800.0))
+    assert (delta['TVPI'], delta['DPI'], delta['RVPI']) == pytest.approx((1.3, 0.5, 0.8))
+    assert delta['TVPI'] == pytest.approx(delta['DPI'] + delta['RVPI'])
+
+    fundo = retornos.loc['Fundo']
+    assert (fundo['Aportado'], fundo['Distribuído'], fundo['Valor de Saída']) == pytest.approx((2500.0, 500.0, 2010.0))
+    assert fundo['TVPI'] == pytest.approx((500.0 + 2010.0) / 2500.0)
+    # Aportes de 2 milhões há dois anos; o aporte da Beta e a distribuição da Delta,
+    # na mesma data, se anulam; saídas de 2,01 milhões na data-base
+    assert fundo['TIR (% a.a.)'] == pytest.approx((np.sqrt(2010 / 2000) - 1) * 100)
@@ -0,0 +1,22 @@
+import numpy as np
+import modules.simulacao as simulacao
+from modules.simulacao import simular_carteira, TAMANHO_BLOCO, LIMITE_PARALELO
+
+def test_pool_e_processo_unico_dao_o_mesmo_resultado():
+    valores = np.linspace(500, 5000, 16)
+    multiplos = np.linspace(0, 4, 16)
+    setores = list('AABBCCDDEEFFGGHH')
+    n_simulacoes = 3 * TAMANHO_BLOCO
+    assert n_simulacoes * valores.size >= LIMITE_PARALELO
+    parametros = dict(
+        prob_writeoff=0.2, setores=setores, correlacao=0.3,
+        amostras_empiricas={3: [0.5, 1.0, 2.0, 4.0]},
+        n_simulacoes=n_simulacoes, semente=42
+    )
+
+    no_processo = simular_carteira(valores, multiplos, processos=1, **parametros)
+    assert simulacao._pool is None
+    em_pool = simular_carteira(valores, multiplos, processos=2, **parametros)
+    assert simulacao._pool is not None
+    for a, b in zip(no_processo, em_pool):
+        np.testing.assert_array_equal(a, b)